@@ -1,10 +1,45 @@
+from ParallelismandTaskScheduling import ParallelExecutor, TaskFailed, TaskGraph
+
 class ExecutionTable:
-    def __init__(self):
+    def __init__(self, executor=None):
         self.tasks = []
-    
-    def add_task(self, task):
+        self.graph = TaskGraph()
+        self.executor = executor
+        self.serial = True          # every task added without deps
+
+    def add_task(self, task, deps=None, name=None, cost=1.0):
+        """ Without deps a task runs after the one added before it, as
+            tasks always have. Given deps (an empty list too) it runs as
+            soon as they have finished and gets their results as
+            arguments. Returns the name to depend on """
+        if name is None:
+            name = len(self.tasks)
+        func = task
+        if deps is not None:
+            self.serial = False
+        else:
+            deps = self.graph.order[-1:]
+            if deps:
+                # Ordered after the previous task, not handed its result
+                func = _ignoring_result(task)
+        name = self.graph.add(name, func, deps, cost)
         self.tasks.append(task)
-    
+        return name
+
     def run(self):
-        for task in self.tasks:
-            task()
+        """ Results by task name. A failing task raises TaskFailed, except
+            in a table built without deps, which raises the task's own
+            exception as running the tasks in turn always did """
+        executor = self.executor or ParallelExecutor()
+        try:
+            return executor.run_graph(self.graph)
+        except TaskFailed as failure:
+            if self.serial:
+                raise failure.error
+            raise
+        finally:
+            if self.executor is None:
+                executor.shutdown()
+
+def _ignoring_result(task):
+    return lambda previous: task()
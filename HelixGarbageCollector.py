@@ -1,8 +1,137 @@
+from collections import Counter
+
 class HelixicalGC:
-    def __init__(self, memory_manager):
+    """ Reachability-driven, generational collector over a MemoryManager.
+        Objects start young. A minor collection traces from the roots and
+        from the remembered set (old objects written to point at young
+        ones) through young objects only, frees the young objects it did
+        not reach and promotes those that survived `promote_after` minor
+        collections. A major collection traces the whole heap; allocation
+        runs one instead of a minor once the old generation has doubled
+        since the last. Objects can also be grouped into regions and freed
+        together. """
+
+    def __init__(self, memory_manager, promote_after=2, young_limit=1024):
         self.memory_manager = memory_manager
-    
+        self.promote_after = promote_after
+        self.young_limit = young_limit
+        self.old_limit = 8 * young_limit
+        self.roots = set()
+        self.references = {}        # name -> names it points to
+        self.young = {}             # name -> minor collections survived
+        self.old = set()
+        self.remembered = set()
+        self.regions = {}           # region -> names allocated in it
+        self.region_of = {}
+        self.stats = Counter()
+
+    def allocate(self, name, size, region=None):
+        """ A young object; a full nursery triggers a collection first """
+        if len(self.young) >= self.young_limit:
+            self.collect(full=len(self.old) >= self.old_limit)
+        if name in self.references:
+            self._renew(name)
+        address = self.memory_manager.allocate(name, size)
+        self.references[name] = set()
+        self.young[name] = 0
+        if region is not None:
+            self.regions.setdefault(region, set()).add(name)
+            self.region_of[name] = region
+        return address
+
+    def _renew(self, name):
+        """ Take an allocated object out of its generation and region so it
+            can start again as a young one """
+        if name in self.old:
+            self.old.discard(name)
+            self.remembered.discard(name)
+            # Old objects pointing at it now point into the young generation
+            references = self.references
+            self.remembered.update(source for source in self.old if name in references[source])
+        region = self.region_of.pop(name, None)
+        if region is not None and region in self.regions:
+            self.regions[region].discard(name)
+
+    def add_root(self, name):
+        self.roots.add(name)
+
+    def remove_root(self, name):
+        self.roots.discard(name)
+
+    def write(self, source, target):
+        """ Record that `source` points at `target` (the write barrier) """
+        self.references[source].add(target)
+        if source in self.old and target in self.young:
+            self.remembered.add(source)
+
+    def unlink(self, source, target):
+        self.references[source].discard(target)
+
+    def collect(self, full=False):
+        """ Free what is unreachable: young objects only, or with `full`
+            the whole heap. Returns the number of objects freed. """
+        self.stats["major" if full else "minor"] += 1
+        if full:
+            marked = self._mark(self.roots, lambda name: True)
+            garbage = [name for name in self.references if name not in marked]
+        else:
+            young = self.young
+            start = [name for name in self.roots if name in young]
+            for source in self.remembered:
+                start += [target for target in self.references[source] if target in young]
+            marked = self._mark(start, young.__contains__)
+            garbage = [name for name in young if name not in marked]
+        for name in garbage:
+            self._free(name)
+        self._age()
+        if full:
+            self.old_limit = max(8 * self.young_limit, 2 * len(self.old))
+        return len(garbage)
+
+    def _mark(self, start, traced):
+        references = self.references
+        marked = {name for name in start if name in references}
+        stack = list(marked)
+        while stack:
+            for target in references[stack.pop()]:
+                if target not in marked and traced(target) and target in references:
+                    marked.add(target)
+                    stack.append(target)
+        return marked
+
+    def _age(self):
+        promoted = []
+        for name, survived in list(self.young.items()):
+            if survived + 1 >= self.promote_after:
+                del self.young[name]
+                self.old.add(name)
+                promoted.append(name)
+            else:
+                self.young[name] = survived + 1
+        self.stats["promoted"] += len(promoted)
+        # Only old objects that still point into the young generation stay
+        young, references = self.young, self.references
+        self.remembered = {name for name in self.remembered.union(promoted)
+                           if any(target in young for target in references[name])}
+
+    def free_region(self, region):
+        """ Free every object allocated in `region`, reachable or not """
+        names = self.regions.pop(region, ())
+        for name in names:
+            self._free(name)
+        return len(names)
+
+    def _free(self, name):
+        self.memory_manager.deallocate(name)
+        del self.references[name]
+        self.young.pop(name, None)
+        self.old.discard(name)
+        self.remembered.discard(name)
+        self.roots.discard(name)
+        region = self.region_of.pop(name, None)
+        if region is not None and region in self.regions:
+            self.regions[region].discard(name)
+        self.stats["freed"] += 1
+
     def collect_garbage(self):
-        for var_name in list(self.memory_manager.variables):
-            if self.memory_manager.variables[var_name]['location'] is None:
-                self.memory_manager.deallocate(var_name)
+        return self.collect(full=True)
@@ -1,27 +1,152 @@
-class MemoryManager:
-    def __init__(self):
-        self.variables = {}
-    
-    def allocate(self, var_name, size):
-        self.variables[var_name] = {'size': size, 'location': None}
-    
-    def deallocate(self, var_name):
-        if var_name in self.variables:
-            del self.variables[var_name]
+import bisect
+from collections import Counter
+
+ALIGNMENT = 8
+# Small requests are rounded up to one of these and kept on per-class free
+# lists; anything larger is a general block, split and coalesced
+SIZE_CLASSES = (8, 16, 24, 32, 48, 64, 96, 128, 192, 256)
+SIZE_CLASS_OF = {}
+for _size in range(ALIGNMENT, SIZE_CLASSES[-1] + 1, ALIGNMENT):
+    SIZE_CLASS_OF[_size] = next(c for c in SIZE_CLASSES if c >= _size)
+
+class HeapAllocator:
+    """ Addresses for blocks of memory on a heap that starts at `base`.
+        Freed small blocks go on their size class's free list and are
+        handed out again first. General free blocks are kept in address
+        order and binned by size (one bin per power of two, each sorted by
+        size): allocation splits the smallest free block that fits, found
+        by bisection, release merges a block with free neighbours, and a
+        free block at the top of the heap shrinks it. The heap only grows
+        when nothing free fits. """
+
+    def __init__(self, base=0x2000):
+        self.base = self.top = base
+        self.free_lists = {size: [] for size in SIZE_CLASSES}
+        self.free_starts = []       # general free blocks, by address
+        self.free_sizes = {}        # address -> size
+        self.free_bins = [[] for _ in range(64)]   # (size, address) by size.bit_length()
+        self.blocks = {}            # live address -> block size
+        self.live_bytes = 0
+        self.peak_live_bytes = 0
+        self.high_water_mark = 0
+        self.stats = Counter()
+
+    def allocate(self, size=8):
+        size = max(ALIGNMENT, -(-size // ALIGNMENT) * ALIGNMENT)
+        size = SIZE_CLASS_OF.get(size, size)
+        self.stats["allocations"] += 1
+        free_list = self.free_lists.get(size)
+        if free_list:
+            address = free_list.pop()
+            self.stats["reused"] += 1
+        else:
+            address = self._take_free_block(size)
+            if address is None:
+                address = self.top
+                self.top += size
+                self.high_water_mark = max(self.high_water_mark, self.top - self.base)
+            else:
+                self.stats["reused"] += 1
+        self.blocks[address] = size
+        self.live_bytes += size
+        self.peak_live_bytes = max(self.peak_live_bytes, self.live_bytes)
+        return address
+
+    def free(self, address):
+        size = self.blocks.pop(address, None)
+        if size is None:
+            raise Exception(f"Address {hex(address)} is not allocated.")
+        self.stats["frees"] += 1
+        self.live_bytes -= size
+        if size in self.free_lists:
+            self.free_lists[size].append(address)
+        else:
+            self._release_block(address, size)
+
+    def _take_free_block(self, size):
+        low = size.bit_length()
+        free_bin = self.free_bins[low]
+        i = bisect.bisect_left(free_bin, (size, 0))
+        if i < len(free_bin):
+            address = free_bin[i][1]
+        else:
+            # Every block in a higher bin is big enough
+            address = next((b[0][1] for b in self.free_bins[low + 1:] if b), None)
+            if address is None:
+                return None
+        available = self._remove_free_block(address)
+        if available > size:
+            self._insert_free_block(address + size, available - size)
+        return address
+
+    def _release_block(self, address, size):
+        i = bisect.bisect_left(self.free_starts, address)
+        if i < len(self.free_starts) and address + size == self.free_starts[i]:
+            size += self._remove_free_block(self.free_starts[i])
+            self.stats["coalesced"] += 1
+        if i and self.free_starts[i - 1] + self.free_sizes[self.free_starts[i - 1]] == address:
+            address = self.free_starts[i - 1]
+            size += self._remove_free_block(address)
+            self.stats["coalesced"] += 1
+        if address + size == self.top:
+            self.top = address
+        else:
+            self._insert_free_block(address, size)
+
+    def _insert_free_block(self, address, size):
+        bisect.insort(self.free_starts, address)
+        self.free_sizes[address] = size
+        bisect.insort(self.free_bins[size.bit_length()], (size, address))
+
+    def _remove_free_block(self, address):
+        del self.free_starts[bisect.bisect_left(self.free_starts, address)]
+        size = self.free_sizes.pop(address)
+        free_bin = self.free_bins[size.bit_length()]
+        del free_bin[bisect.bisect_left(free_bin, (size, address))]
+        return size
+
+    def free_bytes(self):
+        return (sum(self.free_sizes.values()) +
+                sum(size * len(addresses) for size, addresses in self.free_lists.items()))
+
+    def fragmentation(self):
+        """ Share of the heap below the top that is not in live blocks """
+        extent = self.top - self.base
+        return 1 - self.live_bytes / extent if extent else 0.0
+
+    def statistics(self):
+        largest = max(self.free_sizes.values(), default=0)
+        free = self.free_bytes()
+        return {
+            **self.stats,
+            "live_blocks": len(self.blocks),
+            "live_bytes": self.live_bytes,
+            "peak_live_bytes": self.peak_live_bytes,
+            "heap_bytes": self.top - self.base,
+            "high_water_mark": self.high_water_mark,
+            "free_bytes": free,
+            "largest_free_block": largest,
+            "fragmentation": self.fragmentation(),
+            # Free memory a large request cannot use because it is split up
+            "external_fragmentation": 1 - largest / free if free else 0.0,
+        }
 
 class MemoryManager:
-    def __init__(self):
+    def __init__(self, heap=None):
         self.memory = {}
+        self.heap = heap if heap is not None else HeapAllocator()
 
     def allocate(self, var_name, size):
         if var_name not in self.memory:
-            self.memory[var_name] = {'size': size, 'address': None}
+            self.memory[var_name] = {'size': size, 'address': self.heap.allocate(size)}
+        return self.memory[var_name]['address']
 
     def deallocate(self, var_name):
-        if var_name in self.memory:
-            del self.memory[var_name]
+        entry = self.memory.pop(var_name, None)
+        if entry is not None:
+            self.heap.free(entry['address'])
 
     def cleanup(self):
+        """ Deallocate every variable, giving all its memory back to the heap """
         for var_name in list(self.memory):
-            if self.memory[var_name]['address'] is None:
-                self.deallocate(var_name)
+            self.deallocate(var_name)
@@ -1,13 +1,328 @@
+import collections
 import concurrent.futures
+import heapq
+import itertools
+import os
+import queue
+import random
+import threading
+import time
 
-class ParallelExecutor:
+class TaskFailed(Exception):
+    def __init__(self, name, error):
+        super().__init__(f"Task '{name}' failed: {error!r}")
+        self.name = name
+        self.error = error
+
+class GraphTask:
+    __slots__ = ("name", "func", "deps", "cost", "priority", "state",
+                 "result", "error", "started", "finished")
+
+    def __init__(self, name, func, deps, cost):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.cost = cost
+        self.priority = cost
+        self.state = "pending"
+        self.result = None
+        self.error = None
+        self.started = None
+        self.finished = None
+
+    @property
+    def duration(self):
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+class TaskGraph:
+    """ Tasks with dependencies, run as a DAG: a task is dispatched as soon as
+        everything it depends on has finished and receives their results as
+        positional arguments. Ready tasks go out longest remaining critical
+        path first; the first failure cancels whatever has not started. """
     def __init__(self):
-        self.executor = concurrent.futures.ThreadPoolExecutor()
+        self.tasks = {}
+        self.order = []
+
+    def add(self, name, func, deps=(), cost=1.0):
+        if name in self.tasks:
+            raise ValueError(f"Duplicate task '{name}'")
+        self.tasks[name] = GraphTask(name, func, deps, cost)
+        self.order.append(name)
+        return name
+
+    def topological_order(self):
+        dependents = {name: [] for name in self.tasks}
+        waiting = {}
+        for task in self.tasks.values():
+            for dep in task.deps:
+                if dep not in self.tasks:
+                    raise ValueError(f"Task '{task.name}' depends on unknown task '{dep}'")
+                dependents[dep].append(task.name)
+            waiting[task.name] = len(task.deps)
+        ready = [name for name in self.order if waiting[name] == 0]
+        order = []
+        while ready:
+            name = ready.pop()
+            order.append(name)
+            for child in dependents[name]:
+                waiting[child] -= 1
+                if waiting[child] == 0:
+                    ready.append(child)
+        if len(order) != len(self.tasks):
+            cycle = sorted(name for name, count in waiting.items() if count)
+            raise ValueError(f"Dependency cycle among {cycle}")
+        return order, dependents
+
+    def prioritize(self, order, dependents):
+        # Bottom level: a task's cost plus the costliest chain hanging off it
+        for name in reversed(order):
+            task = self.tasks[name]
+            task.priority = task.cost + max(
+                (self.tasks[child].priority for child in dependents[name]), default=0)
+
+    def run(self, executor, max_workers=None, critical_path=True):
+        """ Run every task on `executor` and return {name: result}. At most
+            `max_workers` tasks are handed to the pool at once so the
+            scheduler, not the pool's FIFO queue, decides what runs next. """
+        order, dependents = self.topological_order()
+        if critical_path:
+            self.prioritize(order, dependents)
+        max_workers = max_workers or 1
+        waiting = {name: len(task.deps) for name, task in self.tasks.items()}
+        sequence = itertools.count()
+        ready = []
+        for name in self.order:
+            task = self.tasks[name]
+            task.state, task.result, task.error = "pending", None, None
+            task.started = task.finished = None
+            if waiting[name] == 0:
+                heapq.heappush(ready, (-task.priority if critical_path else 0, next(sequence), name))
+        done = queue.SimpleQueue()
+        running = {}
+        failure = None
+        while ready or running:
+            while ready and len(running) < max_workers and failure is None:
+                _, _, name = heapq.heappop(ready)
+                task = self.tasks[name]
+                args = [self.tasks[dep].result for dep in task.deps]
+                task.state = "running"
+                future = executor.submit(_timed_call, task.func, args)
+                future.add_done_callback(lambda f, name=name: done.put((name, f)))
+                running[name] = future
+            if not running:
+                break
+            name, future = done.get()
+            del running[name]
+            task = self.tasks[name]
+            try:
+                task.result, task.started, task.finished = future.result()
+                task.state = "done"
+            except concurrent.futures.CancelledError:
+                task.state = "cancelled"
+                continue
+            except Exception as error:
+                task.state, task.error = "failed", error
+                if failure is None:
+                    failure = task
+                    for other in running.values():
+                        other.cancel()
+                continue
+            for child in dependents[name]:
+                waiting[child] -= 1
+                if waiting[child] == 0:
+                    child_task = self.tasks[child]
+                    heapq.heappush(ready, (-child_task.priority if critical_path else 0,
+                                           next(sequence), child))
+        if failure is not None:
+            for task in self.tasks.values():
+                if task.state in ("pending", "running"):
+                    task.state = "cancelled"
+            raise TaskFailed(failure.name, failure.error) from failure.error
+        return {name: self.tasks[name].result for name in self.order}
+
+    def timings(self):
+        return {name: task.duration for name, task in self.tasks.items()}
+
+    def report(self):
+        origin = min((t.started for t in self.tasks.values() if t.started is not None), default=0)
+        for name in self.order:
+            task = self.tasks[name]
+            if task.started is None:
+                print(f"[Task] {name}: {task.state}")
+            else:
+                print(f"[Task] {name}: {task.state} at +{(task.started - origin) * 1e3:.2f}ms "
+                      f"for {task.duration * 1e3:.2f}ms (critical path {task.priority:g})")
+
+def _timed_call(func, args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, started, time.perf_counter()
+
+class ParallelExecutor:
+    def __init__(self, max_workers=None):
+        # Same default as ThreadPoolExecutor
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.executor = concurrent.futures.ThreadPoolExecutor(self.max_workers)
 
     def spawn_parallel(self, tasks):
-        futures = [self.executor.submit(task) for task in tasks]
-        concurrent.futures.wait(futures)
+        graph = TaskGraph()
+        for index, task in enumerate(tasks):
+            graph.add(index, task)
+        results = self.run_graph(graph)
+        return [results[index] for index in range(len(tasks))]
+
+    def run_graph(self, graph, critical_path=True):
+        return graph.run(self.executor, self.max_workers, critical_path)
 
     def execute_task(self, task):
         # Task execution logic
         pass
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+class StealingTask:
+    __slots__ = ("func", "args", "result", "error", "done", "waiter")
+
+    def __init__(self, func, args, waiter=None):
+        self.func = func
+        self.args = args
+        self.result = None
+        self.error = None
+        self.done = False
+        self.waiter = waiter
+
+    def run(self):
+        try:
+            self.result = self.func(*self.args)
+        except Exception as error:
+            self.error = error
+        self.finish()
+
+    def cancel(self):
+        self.error = concurrent.futures.CancelledError("pool shut down before the task ran")
+        self.finish()
+
+    def finish(self):
+        self.done = True
+        if self.waiter is not None:
+            self.waiter.set()
+
+class WorkStealingPool:
+    """ Thread pool for many small tasks. Each worker owns a deque: tasks it
+        spawns go on the right end and it pops from there, so a task's
+        children run hot on the same thread; idle workers steal the oldest
+        task from the left end of a random victim. join() from inside a task
+        keeps running queued work until the joined task is done, so a
+        parent never ties up a worker while its children are pending. """
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.deques = [collections.deque() for _ in range(self.workers)]
+        self.injected = collections.deque()
+        self.local = threading.local()
+        self.wake = threading.Condition()
+        self.sleeping = 0
+        self.running = True
+        self.steals = 0
+        self.threads = [threading.Thread(target=self.worker_loop, args=(index,),
+                                         name=f"scx-worker-{index}", daemon=True)
+                        for index in range(self.workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def spawn(self, func, *args):
+        if not self.running:
+            raise RuntimeError("spawn on a WorkStealingPool that has been shut down")
+        index = getattr(self.local, "index", None)
+        if index is None:
+            # Submitted from outside the pool: the caller waits on an event
+            task = StealingTask(func, args, threading.Event())
+            self.injected.append(task)
+        else:
+            task = StealingTask(func, args)
+            self.deques[index].append(task)
+        if self.sleeping:
+            with self.wake:
+                self.wake.notify()
+        return task
+
+    def join(self, task):
+        index = getattr(self.local, "index", None)
+        if index is None:
+            if task.waiter is not None:
+                task.waiter.wait()
+            while not task.done:
+                time.sleep(0.0005)
+        else:
+            while not task.done:
+                work = self.find_work(index)
+                if work is None:
+                    # The task is running on another worker
+                    time.sleep(0)
+                else:
+                    work.run()
+        if task.error is not None:
+            raise task.error
+        return task.result
+
+    def spawn_parallel(self, tasks):
+        spawned = [self.spawn(task) for task in tasks]
+        return [self.join(task) for task in spawned]
+
+    def find_work(self, index):
+        try:
+            return self.deques[index].pop()
+        except IndexError:
+            pass
+        try:
+            return self.injected.popleft()
+        except IndexError:
+            pass
+        start = random.randrange(self.workers)
+        for offset in range(self.workers):
+            victim = (start + offset) % self.workers
+            if victim != index:
+                try:
+                    task = self.deques[victim].popleft()
+                except IndexError:
+                    continue
+                self.steals += 1
+                return task
+        return None
+
+    def has_work(self):
+        return bool(self.injected) or any(self.deques)
+
+    def worker_loop(self, index):
+        self.local.index = index
+        while self.running:
+            task = self.find_work(index)
+            if task is not None:
+                task.run()
+                continue
+            with self.wake:
+                # Counted as sleeping before the last look, so a spawn that
+                # misses this check is guaranteed to notify
+                self.sleeping += 1
+                if self.running and not self.has_work():
+                    self.wake.wait(0.05)
+                self.sleeping -= 1
+
+    def shutdown(self):
+        self.running = False
+        with self.wake:
+            self.wake.notify_all()
+        for thread in self.threads:
+            thread.join()
+        # Nothing will run what is still queued; fail it so joiners wake up
+        for tasks in (self.injected, *self.deques):
+            while tasks:
+                tasks.popleft().cancel()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
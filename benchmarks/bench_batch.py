@@ -0,0 +1,77 @@
+"""
+Batch compilation benchmark.
+
+Compiles a generated project directory with compile_batch at several
+worker counts, cache bypassed so every file is really compiled, and
+compares against a serial compile_supercodex loop.
+
+    python benchmarks/bench_batch.py --files 3000 --workers 1 2 4 8
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from supercodex_compiler import (  # noqa: E402
+    batch_output_paths,
+    collect_sources,
+    compile_batch,
+    compile_supercodex,
+)
+
+COMMANDS = ["PRINT", "ADD", "SUB", "MUL", "DIV"]
+
+
+def write_project(root, files, lines, rng):
+    for i in range(files):
+        folder = os.path.join(root, f"module{i % 16}")
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"unit{i}.scdx"), "w") as file:
+            file.write("\n".join(f"{rng.choice(COMMANDS)} r{n % 8}" for n in range(lines)))
+            file.write("\nEXIT\n")
+
+
+def serial(sources, out_dir):
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for source, output in zip(sources, batch_output_paths(sources, out_dir)):
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+            compile_supercodex(source, output, cache=None, assemble=False)
+    return time.perf_counter() - start
+
+
+def run(files, lines, worker_counts):
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as root:
+        project = os.path.join(root, "src")
+        write_project(project, files, lines, rng)
+        sources = collect_sources([project])
+        for source in sources:
+            # Warm the page cache so the first timing is not paying for it
+            with open(source, "rb") as file:
+                file.read()
+        print(f"{len(sources):,} files x {lines} lines, {os.cpu_count()} cores")
+
+        baseline = serial(sources, os.path.join(root, "serial"))
+        print(f"  {'serial loop':<12} {baseline:>8.2f}s  {files / baseline:>8,.0f} files/s")
+        for workers in worker_counts:
+            batch = compile_batch([project], os.path.join(root, f"out{workers}"),
+                                  workers=workers, cache_dir=None)
+            if batch.failed:
+                raise AssertionError(batch.failed[0]["error"])
+            print(f"  {f'{workers} workers':<12} {batch.wall_time:>8.2f}s  "
+                  f"{files / batch.wall_time:>8,.0f} files/s  ({baseline / batch.wall_time:.2f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=3_000)
+    parser.add_argument("--lines", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    opts = parser.parse_args()
+    run(opts.files, opts.lines, opts.workers)
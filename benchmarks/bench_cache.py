@@ -0,0 +1,84 @@
+"""
+Compilation cache benchmark.
+
+Compiles a tree of .scdx files the way CI does (one compile_supercodex per
+file) with a cold cache, then rebuilds it with nothing changed, with a
+fraction of files edited, and with the cache switched off.
+
+    python benchmarks/bench_cache.py --files 2000 --lines 200 --changed 0.01
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from supercodex_compiler import CompilationCache, compile_batch, compile_supercodex  # noqa: E402
+
+COMMANDS = ["PRINT", "ADD", "SUB", "MUL", "DIV"]
+
+
+def write_tree(root, files, lines, rng):
+    paths = []
+    for i in range(files):
+        path = os.path.join(root, f"unit{i}.scdx")
+        with open(path, "w") as file:
+            file.write("\n".join(f"{rng.choice(COMMANDS)} r{n % 8}" for n in range(lines)))
+            file.write("\nEXIT\n")
+        paths.append(path)
+    return paths
+
+
+def build(paths, cache):
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for path in paths:
+            compile_supercodex(path, path[:-5] + ".asm", ["--optimize"], cache, assemble=False)
+    return time.perf_counter() - start
+
+
+def run(files, lines, changed, cache_size):
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as root:
+        paths = write_tree(root, files, lines, rng)
+        cache = CompilationCache(os.path.join(root, "cache"), cache_size)
+
+        def row(name, use_cache=True):
+            hits, misses = cache.hits, cache.misses
+            seconds = build(paths, cache if use_cache else None)
+            counts = (f"hits {cache.hits - hits:>6,}  misses {cache.misses - misses:>6,}"
+                      if use_cache else "")
+            print(f"  {name:<24} {seconds * 1e3:>9.1f}ms  {files / seconds:>9,.0f} files/s  {counts}")
+
+        print(f"{files:,} files x {lines} lines")
+        row("cold cache")
+        row("rebuild, unchanged")
+        for path in rng.sample(paths, max(1, int(files * changed))):
+            with open(path, "a") as file:
+                file.write("ADD r1\n")
+        row(f"rebuild, {changed:.0%} edited")
+        row("rebuild, --no-cache", use_cache=False)
+        batch = compile_batch([root], flags=["--optimize"], cache_dir=cache.directory,
+                              cache_size=cache_size)
+        counters = batch.cache_counters()
+        assert counters["hits"] == files and not counters["misses"], counters
+        print(f"  {'compile_batch, unchanged':<24} {batch.wall_time * 1e3:>9.1f}ms  "
+              f"{files / batch.wall_time:>9,.0f} files/s  hits {counters['hits']:>6,}  "
+              f"misses {counters['misses']:>6,}")
+        cache.merge(counters)
+        cache.report()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=2_000)
+    parser.add_argument("--lines", type=int, default=200)
+    parser.add_argument("--changed", type=float, default=0.01,
+                        help="fraction of files edited before the second rebuild")
+    parser.add_argument("--cache-size", type=int, default=256 * 1024 * 1024)
+    opts = parser.parse_args()
+    run(opts.files, opts.lines, opts.changed, opts.cache_size)
@@ -0,0 +1,104 @@
+"""
+CALL overhead benchmark.
+
+Compares the old CALL, which built a sub-interpreter for every call,
+with call frames on the interpreter's own frame stack. Two workloads:
+a hot call site that calls a three-instruction function over and over,
+and a chain of nested calls f0 -> f1 -> ... -> fN. The chain is where
+the old approach runs out of Python stack.
+
+    python benchmarks/bench_calls.py --calls 100000 --depth 20000
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from supercodex_compiler import (  # noqa: E402
+    BytecodeInterpreter,
+    Instruction,
+    TRACE_OFF,
+    lower_program,
+)
+
+
+class SpanCallInterpreter(BytecodeInterpreter):
+    """ CALL as it was before call frames: a new interpreter per call """
+    def op_call(self, ins):
+        if ins.a in self.functions:
+            self.run_span(*self.functions[ins.a])
+        else:
+            print(f"[ERROR] Function '{ins.a}' not found.")
+
+
+def hot_call_program(calls):
+    program = [
+        Instruction("ALLOC", ["acc"]),
+        Instruction("FUNC", ["bump"]),
+        Instruction("ADD", ["acc", "3"]),
+        Instruction("SUB", ["acc", "1"]),
+        Instruction("ADD", ["acc", "1"]),
+        Instruction("END", []),
+    ]
+    program += [Instruction("CALL", ["bump"])] * calls
+    return program, {"acc": 3 * calls}
+
+
+def chain_program(depth):
+    """ Functions are defined after their callers; the load-time function
+        table makes those forward calls resolve """
+    program = [Instruction("ALLOC", ["depth"]), Instruction("CALL", ["f0"])]
+    for i in range(depth):
+        program.append(Instruction("FUNC", [f"f{i}"]))
+        program.append(Instruction("ADD", ["depth", "1"]))
+        if i + 1 < depth:
+            program.append(Instruction("CALL", [f"f{i + 1}"]))
+        program.append(Instruction("END", []))
+    return program, {"depth": depth}
+
+
+def timed_run(cls, compact, expected):
+    interp = cls(compact, trace=TRACE_OFF)
+    start = time.perf_counter()
+    try:
+        interp.execute()
+    except RecursionError:
+        return None
+    elapsed = time.perf_counter() - start
+    values = interp.variables()
+    assert all(values[name] == value for name, value in expected.items()), values
+    return elapsed
+
+
+def report(title, program, expected, calls, repeat):
+    compact = lower_program(program)
+    print(title)
+    results = {}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for label, cls in (("sub-interpreter per CALL", SpanCallInterpreter),
+                           ("call frames", BytecodeInterpreter)):
+            runs = [timed_run(cls, compact, expected) for _ in range(repeat)]
+            results[label] = None if None in runs else min(runs)
+    baseline = results["sub-interpreter per CALL"]
+    for label, seconds in results.items():
+        if seconds is None:
+            print(f"  {label:<26} RecursionError (Python stack exhausted)")
+            continue
+        speedup = f"({baseline / seconds:.2f}x)" if baseline else ""
+        print(f"  {label:<26} {seconds * 1e3:>9.1f} ms  {calls / seconds:>12,.0f} calls/s  {speedup}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--depth", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    opts = parser.parse_args()
+    program, expected = hot_call_program(opts.calls)
+    report(f"hot call site, {opts.calls:,} calls:", program, expected, opts.calls, opts.repeat)
+    for depth in (200, opts.depth):
+        program, expected = chain_program(depth)
+        report(f"call chain {depth:,} deep:", program, expected, depth, opts.repeat)
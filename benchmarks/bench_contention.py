@@ -0,0 +1,117 @@
+"""
+Variable store contention benchmark.
+
+PARALLEL functions each run --adds ADD instructions. The benchmark checks
+that no update is lost, both when every function increments one shared
+counter and when each function has its own variable. It also times the
+variant that brackets each ADD with LOCK / UNLOCK. The "unlocked"
+baseline runs the single-threaded dispatch table on several threads.
+Its losses depend on where the interpreter can switch threads, and
+CPython builds that only switch at calls and loop back-edges may report
+none.
+
+    python benchmarks/bench_contention.py --functions 8 --adds 20000
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from supercodex_compiler import (  # noqa: E402
+    BytecodeInterpreter,
+    Instruction,
+    PARALLEL_PROCESSES,
+    TRACE_OFF,
+    lower_program,
+)
+
+
+def increment_program(functions, adds, shared, locked=False):
+    """ `functions` FUNC blocks of `adds` ADDs on one counter or one each """
+    program = []
+    names = [f"inc{i}" for i in range(functions)]
+    counters = ["counter"] if shared else [f"counter{i}" for i in range(functions)]
+    for var in counters:
+        program.append(Instruction("ALLOC", [var]))
+        program.append(Instruction("STORE", [var, "0"]))
+    for i, fname in enumerate(names):
+        var = counters[0] if shared else counters[i]
+        program.append(Instruction("FUNC", [fname]))
+        for _ in range(adds):
+            if locked:
+                program.append(Instruction("LOCK", [var]))
+            program.append(Instruction("ADD", [var, "1"]))
+            if locked:
+                program.append(Instruction("UNLOCK", [var]))
+        program.append(Instruction("END", []))
+    program.append(Instruction("PARALLEL", names))
+    return program, counters
+
+
+class UnsynchronisedInterpreter(BytecodeInterpreter):
+    """ Threaded PARALLEL as it was before the atomic handlers """
+    def run_function(self, fname):
+        self.run_span(*self.functions[fname], concurrent=False)
+
+
+def run_once(make, program, counters):
+    with make(program) as interp:
+        start = time.perf_counter()
+        interp.execute()
+        elapsed = time.perf_counter() - start
+        values = interp.variables()
+        return elapsed, sum(values[var] for var in counters), list(interp.deferral.errors)
+
+
+def run(functions, adds, processes):
+    expected = functions * adds
+    modes = [
+        ("unlocked", lambda p: UnsynchronisedInterpreter(p, trace=TRACE_OFF)),
+        ("striped (threads)", lambda p: BytecodeInterpreter(p, trace=TRACE_OFF)),
+    ]
+    if processes:
+        modes.append(("striped (processes)", lambda p: BytecodeInterpreter(
+            p, trace=TRACE_OFF, parallel=PARALLEL_PROCESSES, workers=functions)))
+    print(f"{functions} functions x {adds} ADDs, {os.cpu_count()} CPU(s)")
+    lost_unlocked = 0
+    # A short switch interval makes the threads interleave as often as
+    # the interpreter allows
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            results = []
+            for layout, shared in (("one shared counter", True), ("one counter each", False)):
+                for locked in (False, True):
+                    program, counters = increment_program(functions, adds, shared, locked)
+                    compact = lower_program(program)
+                    for label, make in modes:
+                        if locked and label == "unlocked":
+                            continue
+                        seconds, total, errors = run_once(make, compact, counters)
+                        assert not errors, errors
+                        if label == "unlocked":
+                            lost_unlocked += expected - total
+                        else:
+                            assert total == expected, (label, layout, total, expected)
+                        suffix = " + LOCK/UNLOCK" if locked else ""
+                        results.append((f"{layout}, {label}{suffix}", seconds, expected - total))
+    finally:
+        sys.setswitchinterval(interval)
+    for label, seconds, lost in results:
+        print(f"  {label:<52} {seconds * 1e3:>8.1f} ms  {expected / seconds:>12,.0f} ADD/s  "
+              f"lost {lost}")
+    print(f"lost updates: {lost_unlocked} unlocked, 0 with striped locks")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--functions", type=int, default=8)
+    parser.add_argument("--adds", type=int, default=20_000)
+    parser.add_argument("--no-processes", action="store_true",
+                        help="skip the shared-memory process mode")
+    opts = parser.parse_args()
+    run(opts.functions, opts.adds, not opts.no_processes)
@@ -0,0 +1,182 @@
+"""
+Control flow benchmark.
+
+Loops and recursion lowered to resolved JUMP / BRANCH records. Before
+this, bytecode had no loops: the only way to repeat work was to unroll
+it, so the FOR loop is timed against its unrolled equivalent. The loop
+pays a branch and an increment per iteration on top of the same ADDs,
+and in exchange its code stays a handful of records however many times
+it runs. Recursive fib uses CALL, IF / ELSE and
+PUSH / POP. Every result is checked, and malformed control flow is
+checked to be a SyntaxError naming its line.
+
+    python benchmarks/bench_control.py --iterations 200000 --fib 20
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from supercodex_compiler import (  # noqa: E402
+    BytecodeInterpreter,
+    Instruction,
+    SuperCodeXEmulator,
+    TRACE_OFF,
+    lower_program,
+    parse_source,
+)
+
+MALFORMED = [
+    ("ALLOC x\n\nIF x\nEND", "line 3: IF needs 3 operands"),
+    ("WHILE x <\nEND", "line 1: WHILE needs 3 operands"),
+    ("ALLOC x\nJMP nowhere", "line 2: JMP to unknown label 'nowhere'"),
+]
+MALFORMED_EMULATOR = [
+    ([{"op": "IF", "args": ["x"]}], "instruction 1: IF takes 3 operands"),
+    ([{"op": "WHILE", "args": ["x", "<", "y", [{"op": "JMP", "args": ["nowhere"]}]]}],
+     "instruction 2: JMP to unknown label 'nowhere'"),
+]
+
+
+def unrolled_program(iterations):
+    program = [Instruction("ALLOC", ["total"]), Instruction("ALLOC", ["i"])]
+    for _ in range(iterations):
+        program.append(Instruction("ADD", ["total", "i"]))
+        program.append(Instruction("ADD", ["i", "1"]))
+    return program, {"total": iterations * (iterations - 1) // 2}
+
+
+def for_program(iterations):
+    return [
+        Instruction("ALLOC", ["total"]),
+        Instruction("FOR", ["i", "0", str(iterations)]),
+        Instruction("ADD", ["total", "i"]),
+        Instruction("END", []),
+    ], {"total": iterations * (iterations - 1) // 2}
+
+
+def while_program(iterations):
+    """ Count down, with an IF / ELSE in the body """
+    return [
+        Instruction("ALLOC", ["n"]),
+        Instruction("STORE", ["n", str(iterations)]),
+        Instruction("ALLOC", ["odd"]),
+        Instruction("ALLOC", ["parity"]),
+        Instruction("WHILE", ["n", ">", "0"]),
+        Instruction("IF", ["parity", "==", "0"]),
+        Instruction("ADD", ["odd", "1"]),
+        Instruction("ADD", ["parity", "1"]),
+        Instruction("ELSE", []),
+        Instruction("SUB", ["parity", "1"]),
+        Instruction("END", []),
+        Instruction("SUB", ["n", "1"]),
+        Instruction("END", []),
+    ], {"n": 0, "odd": (iterations + 1) // 2}
+
+
+def label_program(iterations):
+    return [
+        Instruction("ALLOC", ["n"]),
+        Instruction("LABEL", ["top"]),
+        Instruction("ADD", ["n", "1"]),
+        Instruction("IF", ["n", "==", str(iterations)]),
+        Instruction("JMP", ["done"]),
+        Instruction("END", []),
+        Instruction("JMP", ["top"]),
+        Instruction("LABEL", ["done"]),
+    ], {"n": iterations}
+
+
+def fib_program(n):
+    """ acc += fib(n): every leaf adds 0 or 1, n is restored on return """
+    return [
+        Instruction("ALLOC", ["n"]),
+        Instruction("STORE", ["n", str(n)]),
+        Instruction("ALLOC", ["acc"]),
+        Instruction("CALL", ["fib"]),
+        Instruction("FUNC", ["fib"]),
+        Instruction("IF", ["n", "<", "2"]),
+        Instruction("ADD", ["acc", "n"]),
+        Instruction("ELSE", []),
+        Instruction("SUB", ["n", "1"]),
+        Instruction("PUSH", ["n"]),
+        Instruction("CALL", ["fib"]),
+        Instruction("POP", ["n"]),
+        Instruction("SUB", ["n", "1"]),
+        Instruction("CALL", ["fib"]),
+        Instruction("ADD", ["n", "2"]),
+        Instruction("END", []),
+        Instruction("END", []),
+    ], {"n": n, "acc": fib(n)}
+
+
+def fib(n):
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+
+
+def best_of(program, expected, repeat):
+    compact = lower_program(program)
+    best = float("inf")
+    for _ in range(repeat):
+        interp = BytecodeInterpreter(compact, trace=TRACE_OFF)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            interp.execute()
+            best = min(best, time.perf_counter() - start)
+        assert not interp.deferral.errors, interp.deferral.errors
+        values = interp.variables()
+        assert all(values[name] == value for name, value in expected.items()), values
+    return len(compact.code), best
+
+
+def report(label, size, seconds, count, unit, baseline=None):
+    speedup = f"({baseline / seconds:.2f}x)" if baseline else ""
+    print(f"  {label:<28} {size:>9,} records {seconds * 1e3:>9.1f} ms  "
+          f"{count / seconds:>12,.0f} {unit}/s  {speedup}")
+
+
+def check_malformed():
+    cases = [(lambda s=source: lower_program(parse_source(s)), message)
+             for source, message in MALFORMED]
+    cases += [(lambda p=program: SuperCodeXEmulator().execute(p), message)
+              for program, message in MALFORMED_EMULATOR]
+    for lower, message in cases:
+        try:
+            lower()
+        except SyntaxError as e:
+            assert str(e).startswith(message), (str(e), message)
+        else:
+            raise AssertionError(f"no SyntaxError, expected {message!r}")
+
+
+def run(iterations, n, repeat):
+    check_malformed()
+    print(f"sum of 0..{iterations - 1}:")
+    size, unrolled = best_of(*unrolled_program(iterations), repeat)
+    report("unrolled (no loops)", size, unrolled, iterations, "iterations", unrolled)
+    size, seconds = best_of(*for_program(iterations), repeat)
+    report("FOR", size, seconds, iterations, "iterations", unrolled)
+    print(f"{iterations:,} iterations:")
+    size, seconds = best_of(*while_program(iterations), repeat)
+    report("WHILE with IF / ELSE", size, seconds, iterations, "iterations")
+    size, seconds = best_of(*label_program(iterations), repeat)
+    report("LABEL / JMP", size, seconds, iterations, "iterations")
+    calls = 2 * fib(n + 1) - 1
+    print(f"recursive fib({n}) = {fib(n):,}, {calls:,} calls:")
+    size, seconds = best_of(*fib_program(n), repeat)
+    report("CALL + IF / ELSE + PUSH / POP", size, seconds, calls, "calls")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--fib", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    opts = parser.parse_args()
+    run(opts.iterations, opts.fib, opts.repeat)
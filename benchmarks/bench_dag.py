@@ -0,0 +1,129 @@
+"""
+DAG scheduler benchmark.
+
+Runs a graph with one long dependency chain and many short independent
+tasks three ways: the old serial ExecutionTable loop, the TaskGraph with
+FIFO ready order, and the TaskGraph with critical-path priority. Tasks
+sleep, so the pool overlaps them even on a single core. Then measures
+the scheduler's own overhead per task on a wide graph of no-op tasks,
+and checks that ExecutionTable still runs tasks added without deps in
+the order they were added.
+
+    python benchmarks/bench_dag.py --workers 4 --chain 10 --side 40
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ExecutionTableGenerator import ExecutionTable  # noqa: E402
+from ParallelismandTaskScheduling import ParallelExecutor, TaskGraph  # noqa: E402
+
+
+def sleeper(seconds):
+    def task(*inputs):
+        time.sleep(seconds)
+        return sum(inputs) + 1
+    return task
+
+
+def chain_graph(chain, side, task_time):
+    """ Independent tasks are added first, so FIFO order runs them ahead
+        of the chain that decides the makespan """
+    graph = TaskGraph()
+    for i in range(side):
+        graph.add(f"side{i}", sleeper(task_time), cost=task_time)
+    previous = ()
+    for i in range(chain):
+        previous = (graph.add(f"chain{i}", sleeper(task_time), previous, cost=task_time),)
+    return graph
+
+
+def serial(graph):
+    # ExecutionTable.run before the scheduler: one task after another
+    results = {}
+    for name in graph.order:
+        task = graph.tasks[name]
+        results[name] = task.func(*[results[dep] for dep in task.deps])
+    return results
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def report_makespan(workers, chain, side, task_time):
+    graph = chain_graph(chain, side, task_time)
+    bound = max(chain, (chain + side) / workers) * task_time
+    executor = ParallelExecutor(workers)
+    expected, serial_time = timed(lambda: serial(graph))
+    runs = [("serial loop", serial_time)]
+    for label, critical in (("DAG, FIFO", False), ("DAG, critical path", True)):
+        results, seconds = timed(lambda: executor.run_graph(graph, critical_path=critical))
+        assert results == expected and results[f"chain{chain - 1}"] == chain
+        runs.append((label, seconds))
+    executor.shutdown()
+    print(f"{chain}-task chain + {side} independent tasks of {task_time * 1e3:.0f}ms, "
+          f"{workers} workers (lower bound {bound * 1e3:.0f}ms)")
+    for label, seconds in runs:
+        print(f"  {label:<20} {seconds * 1e3:>8.1f} ms  ({serial_time / seconds:.2f}x)")
+
+
+def report_overhead(workers, count):
+    """ Each task depends on up to two random earlier tasks """
+    rng = random.Random(7)
+    graph = TaskGraph()
+    for i in range(count):
+        deps = {rng.randrange(i) for _ in range(2)} if i else ()
+        graph.add(i, lambda *inputs: None, sorted(deps))
+    executor = ParallelExecutor(workers)
+    _, seconds = timed(lambda: executor.run_graph(graph))
+    executor.shutdown()
+    print(f"scheduler overhead: {count:,} no-op tasks in {seconds * 1e3:.1f} ms "
+          f"({seconds / count * 1e6:.1f} us/task)")
+
+
+def check_serial_table(workers, count):
+    """ Later tasks sleep less, so anything run concurrently finishes out of order """
+    ran = []
+    table = ExecutionTable(ParallelExecutor(workers))
+    for i in range(count):
+        table.add_task(lambda i=i: (time.sleep((count - i) * 1e-3), ran.append(i)))
+    table.run()
+    table.executor.shutdown()
+    assert ran == list(range(count)), ran
+    print(f"ExecutionTable: {count} tasks without deps ran in the order added")
+
+    # A failing task raises its own exception and stops the ones after it
+    ran.clear()
+    table = ExecutionTable(ParallelExecutor(workers))
+    table.add_task(lambda: ran.append(0))
+    table.add_task(lambda: 1 // 0)
+    table.add_task(lambda: ran.append(2))
+    try:
+        table.run()
+    except ZeroDivisionError:
+        pass
+    else:
+        raise AssertionError("ExecutionTable.run did not raise the task's exception")
+    finally:
+        table.executor.shutdown()
+    assert ran == [0], ran
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chain", type=int, default=10)
+    parser.add_argument("--side", type=int, default=40)
+    parser.add_argument("--task-ms", type=float, default=20.0)
+    parser.add_argument("--overhead-tasks", type=int, default=20_000)
+    opts = parser.parse_args()
+    report_makespan(opts.workers, opts.chain, opts.side, opts.task_ms / 1e3)
+    report_overhead(opts.workers, opts.overhead_tasks)
+    check_serial_table(opts.workers, opts.side)
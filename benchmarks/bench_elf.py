@@ -0,0 +1,164 @@
+"""
+ELF64 emitter benchmark.
+
+Build time for a native executable with the in-process assembler
+(write_elf64) and with an external assembler and linker, for the
+examples shipped with the compiler and a large generated program, all
+through the x64 backend. The external path is nasm -f elf64 + ld when
+nasm is installed, and otherwise GNU as + ld on the same code in GAS
+syntax: the same two process spawns and object file round trip. Both
+binaries are run and their output is checked against each other and
+against the bytecode interpreter. Each example is also built end to end
+by compile_supercodex, and that executable's output checked against the
+interpreter's.
+
+    python benchmarks/bench_elf.py --lines 20000 --repeat 3
+"""
+import argparse
+import contextlib
+import io
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from bench_regalloc import examples, generated_program  # noqa: E402
+from supercodex_compiler import (  # noqa: E402
+    AssemblerError,
+    BytecodeInterpreter,
+    PeepholeOptimizer,
+    TRACE_OFF,
+    compile_supercodex,
+    generate_assembly,
+    generate_x64,
+    lower_program,
+    parse_source,
+    write_elf64,
+)
+
+
+def to_gas(asm):
+    """ The NASM the x64 backend emits, in GNU as Intel syntax """
+    lines = [".intel_syntax noprefix"]
+    for line in asm:
+        line = re.sub(r"^section (\.\w+)", r"\1", line).replace("global ", ".globl ")
+        line = re.sub(r"\b(qword|byte) \[", r"\1 ptr [", line)
+        line = re.sub(r"\[rel ([\w.+]+)\]", r"[rip+\1]", line)
+        line = re.sub(r"^(\w+) db (.*)", r"\1: .byte \2", line)
+        line = re.sub(r"^(\w+) equ \$ - (\w+)", r".set \1, . - \2", line)
+        line = re.sub(r"^(\w+) resq (\d+)", lambda m: f"{m[1]}: .zero {8 * int(m[2])}", line)
+        line = re.sub(r", (str\d+_len)$", r", OFFSET \1", line)
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def external_build(asm, path):
+    if shutil.which("nasm"):
+        with open(f"{path}.asm", "w") as file:
+            file.write("\n".join(asm))
+        subprocess.run(["nasm", "-f", "elf64", f"{path}.asm", "-o", f"{path}.o"], check=True)
+    else:
+        with open(f"{path}.s", "w") as file:
+            file.write(to_gas(asm))
+        subprocess.run(["as", "-o", f"{path}.o", f"{path}.s"], check=True)
+    subprocess.run(["ld", "-o", path, f"{path}.o"], check=True)
+
+
+def best_of(build, asm, path, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build(asm, path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def interpreted_output(instructions):
+    interp = BytecodeInterpreter(lower_program(instructions), trace=TRACE_OFF)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        interp.execute()
+    # Native code wraps at 64 bits where Python integers keep growing
+    values = (int(line.split(": ", 1)[1]) for line in output.getvalue().splitlines())
+    return "".join(f"{(value + 2 ** 63) % 2 ** 64 - 2 ** 63}\n" for value in values)
+
+
+def run_binary(path):
+    return subprocess.run([path], capture_output=True, text=True, timeout=60, check=True).stdout
+
+
+def report(name, instructions, directory, repeat, check=True):
+    asm, stats = generate_x64(instructions)
+    asm = PeepholeOptimizer().optimize(asm)
+    internal, external = os.path.join(directory, "internal"), os.path.join(directory, "external")
+    in_process = best_of(lambda asm, path: write_elf64(path, asm), asm, internal, repeat)
+    spawned = best_of(external_build, asm, external, repeat)
+    output = run_binary(internal)
+    assert output == run_binary(external), name
+    # The interpreter has no string constants, and runs the FUNC bodies
+    # the backend skips with a diagnostic
+    strings = any(arg.startswith('"') for instr in instructions for arg in instr.args)
+    if check and not strings and not stats["diagnostics"]:
+        assert output == interpreted_output(instructions), name
+    size = os.path.getsize(internal)
+    print(f"{name:<24} {len(asm):>7,} lines {size:>8,} bytes  {spawned * 1e3:>8.1f} ms -> "
+          f"{in_process * 1e3:>7.1f} ms  ({spawned / in_process:.1f}x)")
+
+
+UNSUPPORTED_SOURCE = "ALLOC a\nSTORE a 1\nFUNC foo\nPRINT a\nADD a 100\nEND\nCALL foo\nPRINT a\n"
+
+
+def check_compiled(name, source, directory):
+    """ compile_supercodex's own executable prints what the interpreter
+        does, or is not built at all when the x64 backend left something
+        out """
+    path = os.path.join(directory, "compiled.scdx")
+    with open(path, "w") as file:
+        file.write(source)
+    executable = os.path.join(directory, "compiled")
+    if os.path.exists(executable):
+        os.remove(executable)
+    diagnostics = generate_assembly(source, regalloc=True)[1]
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            compile_supercodex(path, os.path.join(directory, "compiled.asm"), cache=None)
+    except AssemblerError:
+        assert diagnostics and not os.path.exists(executable), name
+        return False
+    assert not diagnostics, name
+    instructions = parse_source(source)
+    output = run_binary(executable)
+    if any(arg.startswith('"') for instr in instructions for arg in instr.args):
+        return False
+    assert output == interpreted_output(instructions), name
+    return True
+
+
+def run(variables, lines, repeat):
+    toolchain = "nasm + ld" if shutil.which("nasm") else "as + ld"
+    print(f"build time: {toolchain} -> write_elf64 (best of {repeat})")
+    with tempfile.TemporaryDirectory() as directory:
+        checked = 0
+        for name, source in examples():
+            report(name, parse_source(source), directory, repeat)
+            checked += check_compiled(name, source, directory)
+        # A FUNC body the backend skips must fail the build, not vanish
+        assert not check_compiled("FUNC", UNSUPPORTED_SOURCE, directory)
+        assert checked, "no compile_supercodex executable was checked against the interpreter"
+        report(f"generated ({lines:,} lines)", generated_program(variables, lines),
+               directory, repeat, check=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--variables", type=int, default=40)
+    parser.add_argument("--lines", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    opts = parser.parse_args()
+    run(opts.variables, opts.lines, opts.repeat)
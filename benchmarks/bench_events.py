@@ -0,0 +1,171 @@
+"""
+Event bus benchmark.
+
+1. Producer stall: a burst of triggers where every 100th hook call takes
+   1ms. With StreamSplicerEngine.trigger_hook the producer absorbs every
+   stall; with AsyncEventBus it only enqueues.
+2. Sustained throughput: triggers fanned out to sync and coroutine hooks
+   under the block policy, with queue depth and dispatch latency.
+3. Bursts into a slow consumer under drop-oldest and coalesce.
+4. Recovery: triggers are still delivered after a dispatch fails, after
+   the dispatcher task is cancelled and on a second event loop.
+
+    python benchmarks/bench_events.py --events 100000 --burst 20000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from supercodex_compiler import (  # noqa: E402
+    AsyncEventBus,
+    OVERFLOW_BLOCK,
+    OVERFLOW_COALESCE,
+    OVERFLOW_DROP_OLDEST,
+    StreamSplicerEngine,
+    TRACE_OFF,
+)
+
+EVENT = "tempThresholdReached"
+
+
+def slow_every(n, seconds):
+    calls = [0]
+
+    def hook(*args):
+        calls[0] += 1
+        if calls[0] % n == 0:
+            time.sleep(seconds)
+    return hook, calls
+
+
+def report_stall(events):
+    engine = StreamSplicerEngine()
+    hook, calls = slow_every(100, 0.001)
+    engine.add_hook(EVENT, hook)
+    start = time.perf_counter()
+    for _ in range(events):
+        engine.trigger_hook(EVENT)
+    sync_time = time.perf_counter() - start
+    assert calls[0] == events
+
+    async def run_bus():
+        bus = AsyncEventBus(maxsize=events, policy=OVERFLOW_BLOCK, trace=TRACE_OFF)
+        bus_hook, bus_calls = slow_every(100, 0.001)
+        bus.subscribe(EVENT, bus_hook)
+        start = time.perf_counter()
+        for _ in range(events):
+            bus.publish_nowait(EVENT)
+        produced = time.perf_counter() - start
+        await bus.close()
+        assert bus_calls[0] == events
+        return produced, time.perf_counter() - start
+
+    produced, total = asyncio.run(run_bus())
+    print(f"producer stall, {events:,} triggers, 1ms hook every 100th call:")
+    print(f"  trigger_hook (inline)    producer {sync_time * 1e3:>8.1f} ms")
+    print(f"  AsyncEventBus            producer {produced * 1e3:>8.1f} ms  "
+          f"(all delivered after {total * 1e3:.1f} ms)")
+
+
+def report_throughput(events, maxsize):
+    async def run_bus():
+        bus = AsyncEventBus(maxsize=maxsize, policy=OVERFLOW_BLOCK, trace=TRACE_OFF)
+        counts = [0, 0]
+
+        def sync_hook(reading):
+            counts[0] += 1
+
+        async def async_hook(reading):
+            counts[1] += 1
+
+        for hook in (sync_hook, sync_hook, async_hook, async_hook):
+            bus.subscribe(EVENT, hook)
+        start = time.perf_counter()
+        for i in range(events):
+            await bus.publish(EVENT, i)
+        await bus.close()
+        elapsed = time.perf_counter() - start
+        assert counts == [2 * events, 2 * events]
+        return elapsed, bus.metrics()[EVENT]
+
+    elapsed, m = asyncio.run(run_bus())
+    print(f"throughput, 2 sync + 2 coroutine hooks, queue {maxsize}:")
+    print(f"  {events / elapsed:>12,.0f} events/s  max depth {m.max_depth}  "
+          f"latency p50 {m.percentile(0.5) * 1e6:.0f}us p99 {m.percentile(0.99) * 1e6:.0f}us")
+
+
+def report_bursts(burst, maxsize):
+    print(f"burst of {burst:,} into a 50us consumer, queue {maxsize}:")
+    for policy in (OVERFLOW_DROP_OLDEST, OVERFLOW_COALESCE):
+        async def run_bus():
+            bus = AsyncEventBus(maxsize=maxsize, policy=policy, trace=TRACE_OFF)
+            last = []
+
+            async def hook(reading):
+                await asyncio.sleep(0.00005)
+                last.append(reading)
+
+            bus.subscribe(EVENT, hook)
+            start = time.perf_counter()
+            for i in range(burst):
+                bus.publish_nowait(EVENT, i)
+            produced = time.perf_counter() - start
+            await bus.close()
+            # The newest reading always survives the overflow
+            assert last[-1] == burst - 1
+            return produced, bus.metrics()[EVENT]
+
+        produced, m = asyncio.run(run_bus())
+        print(f"  {policy:<12} producer {produced * 1e3:>7.1f} ms  delivered {m.delivered:,}  "
+              f"dropped {m.dropped:,}  coalesced {m.coalesced:,}")
+
+
+def check_recovery():
+    bus = AsyncEventBus(trace=TRACE_OFF)
+    seen = []
+    bus.subscribe(EVENT, seen.append)
+    plan = bus.plan
+
+    def failing_plan(event):
+        bus.plan = plan
+        raise RuntimeError("plan failed")
+
+    async def first_loop():
+        bus.publish_nowait(EVENT, 0)
+        await asyncio.wait_for(bus.drain(), 5)
+        bus.plan = failing_plan
+        bus.publish_nowait(EVENT, 1)
+        await asyncio.wait_for(bus.drain(), 5)
+        bus.publish_nowait(EVENT, 2)
+        await asyncio.wait_for(bus.drain(), 5)
+        bus.channels[EVENT].dispatcher.cancel()
+        await asyncio.sleep(0)
+        bus.publish_nowait(EVENT, 3)
+        await asyncio.wait_for(bus.drain(), 5)
+
+    async def second_loop():
+        await bus.publish(EVENT, 4)
+        await asyncio.wait_for(bus.close(), 5)
+
+    asyncio.run(first_loop())
+    asyncio.run(second_loop())
+    # Trigger 1 went out with the failed dispatch
+    assert seen == [0, 2, 3, 4], seen
+    assert bus.deferral.errors == ["plan failed"], bus.deferral.errors
+    print("recovery: delivered after a failed dispatch, a cancelled dispatcher and a new loop")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--burst", type=int, default=20_000)
+    parser.add_argument("--maxsize", type=int, default=1024)
+    opts = parser.parse_args()
+    report_stall(opts.events // 10)
+    report_throughput(opts.events, opts.maxsize)
+    report_bursts(opts.burst, opts.maxsize)
+    check_recovery()
@@ -0,0 +1,178 @@
+"""
+Interpreter throughput benchmark.
+
+Compares the original string-compare interpreter loop (dict-backed
+SymbolTable / MemoryAllocator) against the compact bytecode, slot-indexed
+loop in BytecodeInterpreter, then the cost of each trace level against an
+interpreter built with no trace support at all.
+
+    python benchmarks/bench_interpreter.py --size 200000
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from supercodex_compiler import (  # noqa: E402
+    BytecodeInterpreter,
+    ErrorDeferralHandler,
+    Instruction,
+    MemoryAllocator,
+    SymbolTable,
+    TRACE_BUFFERED,
+    TRACE_OFF,
+    TRACE_VERBOSE,
+    OPCODE_NAMES,
+    lower_program,
+)
+
+
+# === Reference: the interpreter loop before compact lowering ===
+class LegacyInterpreter:
+    def __init__(self, instructions, symbol_table, memory):
+        self.instructions = instructions
+        self.symbol_table = symbol_table
+        self.memory = memory
+        self.deferral = ErrorDeferralHandler()
+        self.instruction_pointer = 0
+
+    def execute(self):
+        while self.instruction_pointer < len(self.instructions):
+            instr = self.instructions[self.instruction_pointer]
+            self.run_instruction(instr)
+            self.instruction_pointer += 1
+
+    def run_instruction(self, instr):
+        op = instr.op
+        args = instr.args
+        if op == "PRINT":
+            print(f"[OUTPUT]: {self.resolve(args[0])}")
+        elif op == "ALLOC":
+            self.deferral.handle(self.memory.alloc, args[0])
+        elif op == "STORE":
+            self.deferral.handle(self.memory.store, args[0], int(args[1]))
+        elif op == "LOAD":
+            self.symbol_table.set(args[0], self.memory.load(args[0]))
+        elif op == "ADD":
+            a = self.resolve(args[0])
+            b = self.resolve(args[1])
+            self.symbol_table.set(args[0], a + b)
+        elif op == "SUB":
+            a = self.resolve(args[0])
+            b = self.resolve(args[1])
+            self.symbol_table.set(args[0], a - b)
+
+    def resolve(self, arg):
+        if arg.isdigit():
+            return int(arg)
+        if arg in self.memory.memory:
+            return self.memory.load(arg)
+        return self.symbol_table.get(arg)
+
+
+# === Workloads ===
+def arithmetic_program(size):
+    """ Straight-line ADD/SUB mix over a handful of variables """
+    program = [
+        Instruction("ALLOC", ["x"]),
+        Instruction("STORE", ["x", "1"]),
+        Instruction("ALLOC", ["y"]),
+        Instruction("STORE", ["y", "3"]),
+    ]
+    body = [
+        Instruction("ADD", ["acc", "x"]),
+        Instruction("ADD", ["acc", "7"]),
+        Instruction("SUB", ["acc", "y"]),
+        Instruction("LOAD", ["y"]),
+    ]
+    while len(program) < size:
+        program.extend(body)
+    program.append(Instruction("PRINT", ["acc"]))
+    return program
+
+
+class UntracedInterpreter(BytecodeInterpreter):
+    """ Baseline with the plain handlers and no trace hooks whatsoever """
+    def build_dispatch(self):
+        return [getattr(self, f"op_{name.lower()}") for name in OPCODE_NAMES]
+
+
+def time_call(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(size, repeat, variables):
+    program = arithmetic_program(size)
+    count = len(program)
+    results = {}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        # Logging is switched off on both sides so the numbers compare
+        # dispatch and operand handling rather than stdout
+        results["legacy"] = time_call(lambda: LegacyInterpreter(
+            program, SymbolTable(TRACE_OFF), MemoryAllocator(TRACE_OFF)).execute(), repeat)
+        results["compact (incl. lowering)"] = time_call(
+            lambda: BytecodeInterpreter(program, trace=TRACE_OFF).execute(), repeat)
+        compact = lower_program(program)
+        results["compact (pre-lowered)"] = time_call(
+            lambda: BytecodeInterpreter(compact, trace=TRACE_OFF).execute(), repeat)
+
+    print(f"instructions: {count}")
+    baseline = results["legacy"]
+    for name, seconds in results.items():
+        print(f"  {name:<26} {count / seconds:>14,.0f} instr/s  "
+              f"({baseline / seconds:.2f}x)")
+    report_trace_levels(compact, repeat)
+    report_footprint(variables)
+
+
+def report_trace_levels(compact, repeat):
+    """ Trace level cost relative to an interpreter without trace support """
+    count = len(compact)
+    runs = {
+        "no tracing": lambda: UntracedInterpreter(compact, trace=TRACE_OFF),
+        TRACE_OFF: lambda: BytecodeInterpreter(compact, trace=TRACE_OFF),
+        TRACE_BUFFERED: lambda: BytecodeInterpreter(compact, trace=TRACE_BUFFERED),
+        TRACE_VERBOSE: lambda: BytecodeInterpreter(compact, trace=TRACE_VERBOSE),
+    }
+    results = {}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for name, make in runs.items():
+            results[name] = time_call(lambda: make().execute(), repeat)
+    print("trace levels:")
+    baseline = results["no tracing"]
+    for name, seconds in results.items():
+        print(f"  {name:<26} {count / seconds:>14,.0f} instr/s  "
+              f"({seconds / baseline - 1:+.1%} vs. no tracing)")
+
+
+def report_footprint(count):
+    """ Storage for `count` variables: dict-backed stores vs. one slot store """
+    program = [Instruction("ALLOC", [f"v{i}"]) for i in range(count)]
+    program += [Instruction("ADD", [f"v{i}", "1"]) for i in range(count)]
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        legacy = LegacyInterpreter(program, SymbolTable(TRACE_OFF), MemoryAllocator(TRACE_OFF))
+        legacy.execute()
+        slotted = BytecodeInterpreter(program, trace=TRACE_OFF)
+        slotted.execute()
+    dict_bytes = (sys.getsizeof(legacy.memory.memory)
+                  + sys.getsizeof(legacy.symbol_table.variables))
+    slot_bytes = sys.getsizeof(slotted.values) + sys.getsizeof(slotted.store.allocated)
+    print(f"storage for {count} variables: dicts {dict_bytes:,} B, "
+          f"slots {slot_bytes:,} B")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--variables", type=int, default=10_000)
+    opts = parser.parse_args()
+    run(opts.size, opts.repeat, opts.variables)
@@ -0,0 +1,110 @@
+"""
+Lexer benchmark.
+
+Throughput of SuperCodeXLexer.tokenize against the single-pass
+tokenize_fast on a large buffer, then the per-keystroke cost of
+IncrementalLexer.edit against re-lexing the whole buffer, for growing
+file sizes.
+
+    python benchmarks/bench_lexer.py --megabytes 1 --lines 1000 10000 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from supercodex_compiler import IncrementalLexer, SuperCodeXLexer  # noqa: E402
+
+SOURCE_LINES = [
+    "# generated SuperCodeX source",
+    "ALLOC memA",
+    "STORE memA 99",
+    "FUNC launch",
+    '    PRINT "Launching"',
+    "    ADD memA 1",
+    "END",
+    "HOOK onStart",
+    "    CALL launch",
+    "END",
+]
+
+
+def generated_source(lines):
+    return "\n".join(SOURCE_LINES[i % len(SOURCE_LINES)] for i in range(lines))
+
+
+def source_of_size(size):
+    """ Generated source trimmed to exactly `size` characters """
+    average = sum(map(len, SOURCE_LINES)) / len(SOURCE_LINES) + 1
+    return generated_source(int(size / average) + len(SOURCE_LINES))[:size]
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def report_throughput(megabytes, repeat):
+    source = source_of_size(int(megabytes * 1_000_000))
+    tokens, full = best_of(lambda: SuperCodeXLexer(source).tokenize(), repeat)
+    arrays, fast = best_of(lambda: SuperCodeXLexer(source).tokenize_fast(), repeat)
+    _, materialise = best_of(arrays.to_tokens, 1)
+
+    shape = [(t.type, t.value, t.line, t.column) for t in tokens]
+    if shape != [(t.type, t.value, t.line, t.column) for t in arrays]:
+        raise AssertionError("tokenize_fast disagrees with tokenize")
+
+    size = len(source) / 1e6
+    print(f"{len(source):,} chars, {len(tokens):,} tokens")
+    print(f"  tokenize       {full * 1e3:>9.1f}ms {size / full:>7.2f} MB/s")
+    print(f"  tokenize_fast  {fast * 1e3:>9.1f}ms {size / fast:>7.2f} MB/s  ({full / fast:.1f}x)")
+    print(f"    + every value materialised as a Token: {materialise * 1e3:.1f}ms")
+
+
+def check_diff_kept(lexer):
+    """ A TokenDiff keeps its line numbers when later edits shift the
+        lines and tokens() renumbers them """
+    diff = lexer.edit(len(lexer.lines), len(lexer.lines), "PRINT memA\n")
+    before = [[(t.type, t.value, t.line) for t in line] for line in diff.added]
+    lexer.edit(0, 0, "ALLOC shifted\n")
+    lexer.tokens()
+    if [[(t.type, t.value, t.line) for t in line] for line in diff.added] != before:
+        raise AssertionError("re-lexing changed the tokens of an earlier TokenDiff")
+
+
+def report_edits(sizes, edits):
+    rng = random.Random(0)
+    print(f"{'lines':>9} {'full re-lex':>12} {'incremental edit':>17}")
+    for size in sizes:
+        source = generated_source(size)
+        start = time.perf_counter()
+        SuperCodeXLexer(source).tokenize()
+        full = time.perf_counter() - start
+
+        lexer = IncrementalLexer(source)
+        positions = [rng.randrange(size) for _ in range(edits)]
+        start = time.perf_counter()
+        for line in positions:
+            # One keystroke: the line gains a character
+            lexer.edit(line, line + 1, lexer.lines[line] + "x\n")
+        per_edit = (time.perf_counter() - start) / edits
+        check_diff_kept(lexer)
+        print(f"{size:>9,} {full * 1e3:>10.2f}ms {per_edit * 1e6:>15.2f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--megabytes", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--lines", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--edits", type=int, default=2_000)
+    opts = parser.parse_args()
+    report_throughput(opts.megabytes, opts.repeat)
+    report_edits(opts.lines, opts.edits)
@@ -0,0 +1,97 @@
+"""
+Scoped buffer liveness benchmark.
+
+Peak slot memory (the high-water mark of the interpreter's slot heap)
+with every variable kept until the program ends and with the FREE
+insertion pass, for every example shipped with the compiler and a
+generated program of stages that each work in a few short-lived
+buffers, some of them inside FUNC bodies run by CALL and PARALLEL. The
+printed output is checked to match, and the pass's time is reported.
+
+    python benchmarks/bench_liveness.py --stages 2000 --buffers 4
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from bench_regalloc import examples  # noqa: E402
+from supercodex_compiler import (  # noqa: E402
+    BytecodeInterpreter,
+    TRACE_OFF,
+    insert_frees,
+    parse_source,
+)
+
+
+def scoped_program(stages, buffers):
+    source = ["ALLOC total"]
+    functions = []
+    for stage in range(stages):
+        names = [f"s{stage}_b{k}" for k in range(buffers)]
+        source += [f"ALLOC {name}" for name in names]
+        source += [f"STORE {name} {stage % 7 + k}" for k, name in enumerate(names)]
+        source += [f"ADD {names[0]} {name}" for name in names[1:]]
+        source.append(f"ADD total {names[0]}")
+        if stage % 10 == 0:
+            # A FUNC with its own buffer, run once
+            function, local = f"stage{stage}", f"stage{stage}_t"
+            functions += [f"FUNC {function}", f"ALLOC {local}", f"ADD {local} total",
+                          f"PRINT {local}", "END"]
+            source.append(f"{'PARALLEL' if stage % 20 else 'CALL'} {function}")
+        if stage % 100 == 0:
+            source.append("PRINT total")
+    source.append("PRINT total")
+    return parse_source("\n".join(source + functions))
+
+
+def run(instructions):
+    interp = BytecodeInterpreter(instructions, trace=TRACE_OFF)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        interp.execute()
+    return output.getvalue(), interp.deferral.errors, interp.store.heap
+
+
+def report(name, instructions):
+    stats = Counter()
+    start = time.perf_counter()
+    freed = insert_frees(instructions, stats)
+    seconds = time.perf_counter() - start
+    try:
+        output, errors, before = run(instructions)
+    except SyntaxError:
+        # Not something the bytecode interpreter runs
+        print(f"{name:<24} skipped")
+        return 0, 0
+    freed_output, freed_errors, after = run(freed)
+    assert freed_output == output and freed_errors == errors, name
+    peak, freed_peak = before.high_water_mark, after.high_water_mark
+    assert freed_peak <= peak, name
+    saved = f"{1 - freed_peak / peak:.0%}" if peak else "-"
+    print(f"{name:<24} {stats['free-insertion']:>5} frees  peak {peak:>8,} B -> "
+          f"{freed_peak:>7,} B  ({saved} less)  reused {after.stats['reused']:>6,}  "
+          f"pass {seconds * 1e3:>7.1f} ms")
+    return peak, freed_peak
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stages", type=int, default=2000)
+    parser.add_argument("--buffers", type=int, default=4)
+    opts = parser.parse_args()
+    total_before = total_after = 0
+    programs = [(name, parse_source(source)) for name, source in examples()]
+    programs.append((f"scoped ({opts.stages:,} stages)",
+                     scoped_program(opts.stages, opts.buffers)))
+    for name, instructions in programs:
+        peak, freed_peak = report(name, instructions)
+        total_before += peak
+        total_after += freed_peak
+    print(f"peak slot memory: {total_before:,} B -> {total_after:,} B")
@@ -0,0 +1,142 @@
+"""
+Instruction optimizer benchmark.
+
+A program made of --blocks copies of the sample_program pattern
+(ALLOC / STORE constants, ADD them, copy the result, PRINT it) followed
+by arithmetic on a copy of a value changed by a CALL, which folding
+cannot see through. The program is interpreted before and after
+optimize_instructions, with the printed output checked to match, and
+compiled to assembly with no optimization, with the peephole optimizer
+only, and with both optimizers. A few small programs whose ALLOCs run
+more than once, or allocate a variable twice, are checked the same way.
+
+    python benchmarks/bench_optimizer.py --blocks 2000
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from supercodex_compiler import (  # noqa: E402
+    BytecodeInterpreter,
+    Instruction,
+    TRACE_OFF,
+    count_instructions,
+    generate_assembly,
+    optimize_instructions,
+    parse_source,
+    peephole_optimize,
+)
+
+
+def constant_program(blocks):
+    program = [
+        Instruction("ALLOC", ["seed"]),
+        Instruction("FUNC", ["reseed"]),
+        Instruction("ADD", ["seed", "7"]),
+        Instruction("END", []),
+    ]
+    for i in range(blocks):
+        x, y, t, u = f"x{i}", f"y{i}", f"t{i}", f"u{i}"
+        program += [
+            Instruction("ALLOC", [x]),
+            Instruction("STORE", [x, "5"]),
+            Instruction("ALLOC", [y]),
+            Instruction("STORE", [y, "3"]),
+            Instruction("ADD", [x, y]),
+            Instruction("ALLOC", [t]),
+            Instruction("ADD", [t, x]),
+            Instruction("PRINT", [t]),
+            # seed is unknown after the CALL; u is a copy of it
+            Instruction("CALL", ["reseed"]),
+            Instruction("ALLOC", [u]),
+            Instruction("ADD", [u, "seed"]),
+            Instruction("SUB", [x, "1"]),
+            Instruction("ADD", [x, u]),
+            Instruction("PRINT", [x]),
+        ]
+    return program
+
+
+# ALLOC of a variable that is already allocated keeps its value, so these
+# print 1, 2 (and 5) however they are optimized
+REENTRANT_PROGRAMS = [
+    "FUNC f\nALLOC c\nADD c 1\nPRINT c\nEND\nCALL f\nCALL f",
+    "FUNC f\nALLOC c\nADD c 1\nPRINT c\nEND\nFUNC g\nCALL f\nEND\nPARALLEL g\nCALL f",
+    "FOR i 0 2\nALLOC c\nADD c 1\nPRINT c\nEND",
+    "ALLOC n\nSTORE n 5\nALLOC n\nPRINT n",
+]
+# FREE gives the memory back but the value stays readable, so these print 1
+FREED_PROGRAMS = [
+    "ALLOC h\nSTORE h 1\nFREE h\nPRINT h",
+    "ALLOC h\nSTORE h 1\nFREE h\nPUSH h\nPOP h\nPRINT h",
+]
+
+
+def check_reentrant():
+    for source in REENTRANT_PROGRAMS + FREED_PROGRAMS:
+        program = parse_source(source)
+        outputs = []
+        for optimize in (False, True):
+            interp = BytecodeInterpreter(program, trace=TRACE_OFF, optimize=optimize)
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                interp.execute()
+            interp.close()
+            outputs.append(output.getvalue())
+        assert outputs[0] == outputs[1], (source, outputs)
+
+
+def interpret(program, optimize, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        interp = BytecodeInterpreter(program, trace=TRACE_OFF, optimize=optimize)
+        loaded = time.perf_counter()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            interp.execute()
+        best = min(best, time.perf_counter() - loaded)
+    assert not interp.deferral.errors, interp.deferral.errors
+    return output.getvalue(), best, loaded - start, len(interp.program.code)
+
+
+def run(blocks, repeat):
+    program = constant_program(blocks)
+    start = time.perf_counter()
+    optimized, stats = optimize_instructions(program)
+    elapsed = time.perf_counter() - start
+    print(f"{len(program):,} instructions -> {len(optimized):,} in {elapsed * 1e3:.0f} ms")
+    for name, count in stats.items():
+        print(f"  {name:<20} {count:>9,} rewrites")
+
+    print("interpreted:")
+    expected, baseline, _, size = interpret(program, False, repeat)
+    output, seconds, load, optimized_size = interpret(program, True, repeat)
+    assert output == expected
+    check_reentrant()
+    print(f"  {'as written':<24} {size:>9,} records {baseline * 1e3:>9.1f} ms")
+    print(f"  {'optimized':<24} {optimized_size:>9,} records {seconds * 1e3:>9.1f} ms  "
+          f"({baseline / seconds:.2f}x, optimizing and loading took {load * 1e3:.0f} ms)")
+
+    print("assembly:")
+    source = "\n".join(map(repr, program))
+    plain, _ = generate_assembly(source)
+    peephole, _ = peephole_optimize([plain])
+    both, _ = generate_assembly(source, optimize=True)
+    baseline = count_instructions([plain])
+    for label, asm in (("as written", [plain]), ("peephole", peephole), ("IR + peephole", [both])):
+        count = count_instructions(asm)
+        print(f"  {label:<24} {count:>9,} instructions  ({count / baseline:.0%})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    opts = parser.parse_args()
+    run(opts.blocks, opts.repeat)
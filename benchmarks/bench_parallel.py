@@ -0,0 +1,90 @@
+"""
+PARALLEL scaling benchmark.
+
+Runs a PARALLEL block of CPU-bound functions, each adding into its own
+variable, with the default thread mode and with the process pool /
+shared-memory store at several worker counts, and checks every run ends
+with the same variable values.
+
+    python benchmarks/bench_parallel.py --functions 8 --body 20000
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from supercodex_compiler import (  # noqa: E402
+    BytecodeInterpreter,
+    Instruction,
+    PARALLEL_PROCESSES,
+    PARALLEL_THREADS,
+    TRACE_OFF,
+    lower_program,
+)
+
+
+def parallel_program(functions, body):
+    """ `functions` FUNC blocks of `body` ADDs each, run by one PARALLEL """
+    program = []
+    names = []
+    for i in range(functions):
+        var = f"v{i}"
+        program.append(Instruction("ALLOC", [var]))
+        program.append(Instruction("STORE", [var, "0"]))
+    for i in range(functions):
+        var = f"v{i}"
+        names.append(f"work{i}")
+        program.append(Instruction("FUNC", [names[-1]]))
+        program.extend(Instruction("ADD", [var, str(i + 1)]) for _ in range(body))
+        program.append(Instruction("END", []))
+    program.append(Instruction("PARALLEL", names))
+    return program
+
+
+def run_mode(program, mode, workers):
+    """ Time the PARALLEL run only; pool start-up happens in a warm-up pass """
+    with BytecodeInterpreter(program, trace=TRACE_OFF, parallel=mode, workers=workers) as interp:
+        if mode == PARALLEL_PROCESSES:
+            interp.process_pool().submit(int).result()
+        start = time.perf_counter()
+        interp.execute()
+        elapsed = time.perf_counter() - start
+        return elapsed, interp.variables()
+
+
+def run(functions, body, worker_counts, repeat):
+    program = lower_program(parallel_program(functions, body))
+    expected = {f"v{i}": (i + 1) * body for i in range(functions)}
+    total = functions * body
+    print(f"{functions} functions x {body} ADDs, {os.cpu_count()} CPU(s) available")
+    if (os.cpu_count() or 1) < max(worker_counts):
+        print("  (fewer cores than workers: process numbers cannot show scaling here)")
+    runs = [("threads", PARALLEL_THREADS, None)]
+    runs += [(f"processes x{n}", PARALLEL_PROCESSES, n) for n in worker_counts]
+    baseline = None
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = []
+        for label, mode, workers in runs:
+            best = float("inf")
+            for _ in range(repeat):
+                elapsed, variables = run_mode(program, mode, workers)
+                assert variables == expected, (label, variables)
+                best = min(best, elapsed)
+            results.append((label, best))
+    for label, seconds in results:
+        baseline = baseline or seconds
+        print(f"  {label:<14} {seconds * 1e3:>9.1f} ms  {total / seconds:>12,.0f} instr/s  "
+              f"({baseline / seconds:.2f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--functions", type=int, default=8)
+    parser.add_argument("--body", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    opts = parser.parse_args()
+    run(opts.functions, opts.body, opts.workers, opts.repeat)
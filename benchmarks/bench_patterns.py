@@ -0,0 +1,134 @@
+"""
+Wildcard subscription benchmark.
+
+Registers --subscriptions wildcard patterns over a site.rack.metric
+namespace and matches --events event names against them. Three matchers
+are compared: a linear scan of precompiled per-pattern regexes (timed
+on a sample and extrapolated), the PatternIndex trie on random names
+(every lookup walks the trie), and the trie on a hot set of names
+(served from the match cache). Results are checked against the scan.
+
+    python benchmarks/bench_patterns.py --subscriptions 100000 --events 1000000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from supercodex_compiler import PatternIndex  # noqa: E402
+
+SITES = 1000
+RACKS = 100
+METRICS = ["temp", "humidity", "power", "fan", "door", "smoke", "voltage", "load"]
+
+
+def subscription_patterns(count, rng):
+    """ Unique patterns from a few shapes, most of them with wildcards """
+    shapes = [
+        lambda: f"site{rng.randrange(SITES)}.rack{rng.randrange(RACKS)}.*",
+        lambda: f"site{rng.randrange(SITES)}.*.{rng.choice(METRICS)}",
+        lambda: f"*.rack{rng.randrange(RACKS)}.{rng.choice(METRICS)}",
+        lambda: f"site{rng.randrange(SITES)}.**",
+        lambda: f"site{rng.randrange(SITES)}.rack{rng.randrange(RACKS)}.{rng.choice(METRICS)}",
+        lambda: f"site{rng.randrange(SITES)}.rack{rng.randrange(10)}*.*",
+        lambda: f"site{rng.randrange(SITES)}.*.{rng.choice(METRICS)[:2]}*",
+    ]
+    patterns = set()
+    while len(patterns) < count:
+        patterns.add(rng.choice(shapes)())
+    return sorted(patterns)
+
+
+def event_name(rng):
+    return f"site{rng.randrange(SITES)}.rack{rng.randrange(RACKS)}.{rng.choice(METRICS)}"
+
+
+def pattern_regex(pattern):
+    """ Regex over "." + name, one separator-prefixed piece per segment """
+    parts = []
+    for segment in pattern.split("."):
+        if segment == "**":
+            parts.append(r"(?:\.[^.]+)*")
+        elif segment == "*":
+            parts.append(r"\.[^.]+")
+        else:
+            parts.append(r"\." + "[^.]*".join(map(re.escape, segment.split("*"))))
+    return re.compile("".join(parts) + r"\Z")
+
+
+def scan(compiled, name):
+    name = "." + name
+    return tuple(pattern for pattern, regex in compiled if regex.match(name))
+
+
+def check_segment_prefix():
+    """ "temp*" is a wildcard within one segment, not the literal name """
+    index = PatternIndex()
+    index.add("sensor.temp*", "temp*")
+    index.add("sensor.*", "*")
+    assert index.match("sensor.temp") == ("temp*", "*")
+    assert index.match("sensor.tempHigh") == ("temp*", "*")
+    assert index.match("sensor.humidity") == ("*",)
+    assert index.match("sensor.temp.high") == ()
+
+
+def run(subscriptions, events, sample, hot):
+    rng = random.Random(16)
+    patterns = subscription_patterns(subscriptions, rng)
+    start = time.perf_counter()
+    index = PatternIndex()
+    for pattern in patterns:
+        index.add(pattern, pattern)
+    build = time.perf_counter() - start
+    print(f"{len(index):,} subscriptions indexed in {build * 1e3:.0f} ms")
+    check_segment_prefix()
+
+    compiled = [(pattern, pattern_regex(pattern)) for pattern in patterns]
+    names = [event_name(rng) for _ in range(sample)]
+    start = time.perf_counter()
+    expected = [scan(compiled, name) for name in names]
+    scan_per_event = (time.perf_counter() - start) / sample
+    for name, want in zip(names, expected):
+        assert index.walk(name.split(".")) == want, name
+    matches = sum(map(len, expected)) / sample
+
+    names = [event_name(rng) for _ in range(events)]
+    match = index.match
+    start = time.perf_counter()
+    for name in names:
+        match(name)
+    trie_time = time.perf_counter() - start
+
+    hot_names = [event_name(rng) for _ in range(hot)]
+    names = [rng.choice(hot_names) for _ in range(events)]
+    index.cache.clear()
+    start = time.perf_counter()
+    for name in names:
+        match(name)
+    cached_time = time.perf_counter() - start
+
+    print(f"{events:,} events, {matches:.1f} matching subscriptions per event on average")
+    rows = [
+        (f"linear regex scan (from {sample} events)", scan_per_event * events),
+        ("trie, random names", trie_time),
+        (f"trie, {hot:,} hot names (cached)", cached_time),
+    ]
+    baseline = rows[0][1]
+    for label, seconds in rows:
+        print(f"  {label:<36} {seconds:>9.2f} s  {events / seconds:>12,.0f} events/s  "
+              f"({baseline / seconds:,.0f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--subscriptions", type=int, default=100_000)
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--sample", type=int, default=50,
+                        help="events timed with the linear scan")
+    parser.add_argument("--hot", type=int, default=10_000)
+    opts = parser.parse_args()
+    run(opts.subscriptions, opts.events, opts.sample, opts.hot)
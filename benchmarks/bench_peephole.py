@@ -0,0 +1,72 @@
+"""
+Peephole optimizer report.
+
+Instruction counts before and after PeepholeOptimizer for every code
+block in Examples.txt, test.scdx and an IRTranslator function with an
+empty body, with how often each rule fired, then the optimizer's
+throughput on a large generated listing.
+
+    python benchmarks/bench_peephole.py --lines 100000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from IrTranslator import IRTranslator  # noqa: E402
+from supercodex_compiler import (  # noqa: E402
+    PeepholeOptimizer,
+    count_instructions,
+    generate_assembly,
+)
+
+
+def example_listings():
+    """ (name, asm lines) for each example the compiler can be pointed at """
+    with open(os.path.join(ROOT, "Examples.txt")) as file:
+        blocks = re.findall(r"```(\w*)\n(.*?)```", file.read(), re.S)
+    for number, (language, body) in enumerate(blocks, 1):
+        if language in ("plaintext", "assembly"):
+            yield f"Examples.txt #{number}", generate_assembly(body)[0].split("\n")
+    with open(os.path.join(ROOT, "test.scdx")) as file:
+        yield "test.scdx", generate_assembly(file.read())[0].split("\n")
+    empty_function = [("DEFINE", "handler", [], [("NOP",)]), ("EXIT",)]
+    yield "IRTranslator empty body", IRTranslator().translate(empty_function).split("\n")
+
+
+def report_examples():
+    total = Counter()
+    print(f"{'example':<26} {'before':>6} {'after':>6}  rules")
+    for name, asm in example_listings():
+        optimizer = PeepholeOptimizer()
+        optimized = optimizer.optimize(asm)
+        total.update(optimizer.stats)
+        fired = ", ".join(f"{rule} x{count}" for rule, count in sorted(optimizer.stats.items()))
+        print(f"{name:<26} {count_instructions(asm):>6} {count_instructions(optimized):>6}  {fired or '-'}")
+    print("rule totals: " + ", ".join(f"{rule} x{count}" for rule, count in total.most_common()))
+
+
+def report_throughput(lines):
+    source = "\n".join(["PRINT x", "ADD a", "SUB b", "MUL c"][i % 4] for i in range(lines))
+    asm = generate_assembly(source)[0].split("\n")
+    start = time.perf_counter()
+    optimizer = PeepholeOptimizer()
+    optimized = optimizer.optimize(asm)
+    seconds = time.perf_counter() - start
+    print(f"{len(asm):,} asm lines optimized in {seconds * 1e3:.1f}ms "
+          f"({len(asm) / seconds:,.0f} lines/s), "
+          f"{count_instructions(asm):,} -> {count_instructions(optimized):,} instructions")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100_000,
+                        help="source lines for the throughput run")
+    opts = parser.parse_args()
+    report_examples()
+    report_throughput(opts.lines)
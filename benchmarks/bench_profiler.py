@@ -0,0 +1,146 @@
+"""
+Profiler overhead benchmark.
+
+Runs a FOR loop, recursive fib and a PARALLEL block on the bytecode
+interpreter, and a straight-line program on SuperCodeXEmulator, with no
+profiler, with the exact profiler (every handler wrapped) and with the
+sampling one, and reports each mode's overhead. Results are checked to
+be the same in every mode, fib's CALL count against the recursion, and
+the exact profile's opcode time against its call stack time. The last
+exact fib report and collapsed stacks are written to --out if given.
+
+    python benchmarks/bench_profiler.py --iterations 200000 --fib 20
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_control import fib, fib_program, for_program  # noqa: E402
+from bench_parallel import parallel_program  # noqa: E402
+from supercodex_compiler import (  # noqa: E402
+    BytecodeInterpreter,
+    PROFILE_EXACT,
+    PROFILE_ROOT,
+    PROFILE_SAMPLING,
+    Profiler,
+    SuperCodeXEmulator,
+    TRACE_OFF,
+    lower_program,
+)
+
+MODES = (None, PROFILE_EXACT, PROFILE_SAMPLING)
+
+
+def emulator_program(length):
+    program = [{"op": "ALLOC", "args": ["x"]}, {"op": "STORE", "args": ["x", "3"]},
+               {"op": "ALLOC", "args": ["y"]}, {"op": "STORE", "args": ["y", "4"]}]
+    for i in range(length):
+        program.append({"op": "ADD", "args": ["x", "y"]})
+        if i % 8 == 0:
+            program.append({"op": "IF", "args": ["x", "<", "y"]})
+            program.append({"op": "PRINT", "args": ["x"]})
+    return program
+
+
+def run_interpreter(compact, profiler):
+    interp = BytecodeInterpreter(compact, trace=TRACE_OFF, profile=profiler)
+    start = time.perf_counter()
+    interp.execute()
+    seconds = time.perf_counter() - start
+    interp.close()
+    assert not interp.deferral.errors, interp.deferral.errors
+    return seconds, interp.variables()
+
+
+def run_emulator(program, profiler):
+    emulator = SuperCodeXEmulator(profile=profiler)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        emulator.execute(program)
+        seconds = time.perf_counter() - start
+    return seconds, emulator.memory
+
+
+def measure(name, run, program, repeat, interval, expected=None, check=None):
+    """ Best time per mode, the modes taking turns so load on the machine
+        hits them alike; returns the last exact Profiler """
+    best = dict.fromkeys(MODES, float("inf"))
+    profilers = {}
+    result = None
+    for _ in range(repeat):
+        for mode in MODES:
+            profiler = profilers[mode] = None if mode is None else Profiler(mode, interval)
+            seconds, values = run(program, profiler)
+            best[mode] = min(best[mode], seconds)
+            assert result is None or values == result, (name, mode)
+            assert all(values[key] == value for key, value in (expected or {}).items()), name
+            result = values
+    exact, sampling = profilers[PROFILE_EXACT], profilers[PROFILE_SAMPLING]
+    if check is not None:
+        check(exact.report())
+    baseline = best[None]
+    print(f"  {name:<22} {baseline * 1e3:>9.1f} ms  exact {best[PROFILE_EXACT] / baseline:>5.2f}x"
+          f"  sampling {best[PROFILE_SAMPLING] / baseline:>5.2f}x "
+          f"({sampling.report()['samples']} samples)")
+    return exact
+
+
+def check_fib(n):
+    def check(report):
+        assert report["functions"]["fib"]["calls"] == 2 * fib(n + 1) - 1, report["functions"]
+        opcode_seconds = sum(entry["seconds"] for entry in report["opcodes"].values())
+        # Both cover the whole run; they differ by the time spent between
+        # execute() starting and the first dispatch
+        assert abs(opcode_seconds - report["seconds"]) <= 0.05 * report["seconds"] + 1e-3
+    return check
+
+
+def check_parallel(functions):
+    def check(report):
+        (site,) = report["parallel"]
+        assert len(site["threads"]) == functions, site
+        assert all(name in report["functions"] for name in site["threads"])
+        assert all(stack.startswith(PROFILE_ROOT) for stack in report["stacks"])
+    return check
+
+
+def run(iterations, n, functions, body, length, repeat, interval, out):
+    print(f"profiler overhead (best of {repeat}; sampling every {interval * 1e3:g} ms):")
+    program, expected = for_program(iterations)
+    measure(f"FOR x {iterations:,}", run_interpreter, lower_program(program), repeat, interval,
+            expected)
+    program, expected = fib_program(n)
+    profiler = measure(f"fib({n})", run_interpreter, lower_program(program), repeat, interval,
+                       expected, check_fib(n))
+    program = parallel_program(functions, body)
+    expected = {f"v{i}": (i + 1) * body for i in range(functions)}
+    measure(f"PARALLEL x {functions}", run_interpreter, lower_program(program), repeat,
+            interval, expected, check_parallel(functions))
+    measure(f"emulator x {length:,}", run_emulator, emulator_program(length), repeat, interval)
+    if out:
+        os.makedirs(out, exist_ok=True)
+        profiler.write_json(os.path.join(out, "profile.json"))
+        profiler.write_collapsed(os.path.join(out, "profile.folded"))
+        with open(os.path.join(out, "profile.json")) as file:
+            json.load(file)
+        print(f"fib profile written to {out}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--fib", type=int, default=20)
+    parser.add_argument("--functions", type=int, default=4)
+    parser.add_argument("--body", type=int, default=20_000)
+    parser.add_argument("--length", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--interval", type=float, default=0.005)
+    parser.add_argument("--out", help="directory for the fib profile's JSON and collapsed stacks")
+    opts = parser.parse_args()
+    run(opts.iterations, opts.fib, opts.functions, opts.body, opts.length, opts.repeat,
+        opts.interval, opts.out)
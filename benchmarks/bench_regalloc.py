@@ -0,0 +1,141 @@
+"""
+Register allocation report.
+
+Memory loads and stores in the x64 backend's output with every variable
+in a memory cell (operands through rax / rbx, as the templates do) and
+with the linear-scan allocator, for every example shipped with the
+compiler (Examples.txt, test.scdx, the sample_program listing) and a
+few loop kernels, then the allocator's compile time on a large
+generated program.
+
+    python benchmarks/bench_regalloc.py --variables 40 --lines 20000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from supercodex_compiler import generate_x64, parse_source  # noqa: E402
+
+SAMPLE_PROGRAM = """
+ALLOC x
+STORE x 5
+ALLOC y
+STORE y 3
+ADD x y
+PRINT x
+FUNC greet
+PRINT y
+END
+CALL greet
+"""
+
+KERNELS = {
+    "sum loop": """
+ALLOC total
+FOR i 0 1000
+ADD total i
+END
+PRINT total
+""",
+    "countdown, IF / ELSE": """
+ALLOC n
+STORE n 1000
+ALLOC odd
+ALLOC parity
+WHILE n > 0
+IF parity == 0
+ADD odd 1
+ADD parity 1
+ELSE
+SUB parity 1
+END
+SUB n 1
+END
+PRINT odd
+""",
+    "16 accumulators": "\n".join(
+        [f"ALLOC a{i}" for i in range(16)] + ["FOR i 0 100"] +
+        [f"ADD a{i} i\nADD a{(i + 1) % 16} a{i}" for i in range(16)] + ["END"] +
+        [f"PRINT a{i}" for i in range(16)]),
+}
+
+
+def examples():
+    with open(os.path.join(ROOT, "Examples.txt")) as file:
+        blocks = re.findall(r"```(\w*)\n(.*?)```", file.read(), re.S)
+    for number, (language, body) in enumerate(blocks, 1):
+        if language in ("plaintext", "assembly"):
+            yield f"Examples.txt #{number}", body
+    with open(os.path.join(ROOT, "test.scdx")) as file:
+        yield "test.scdx", file.read()
+    yield "sample_program", SAMPLE_PROGRAM
+    yield from KERNELS.items()
+
+
+def report_examples():
+    print(f"{'example':<24} {'vars':>4} {'regs':>4} {'spill':>5}  "
+          f"{'loads':>11} {'stores':>11}  eliminated")
+    total_before = total_after = 0
+    for name, source in examples():
+        instructions = parse_source(source)
+        _, memory = generate_x64(instructions, allocate=False)
+        _, allocated = generate_x64(instructions)
+        before = memory["loads"] + memory["stores"]
+        after = allocated["loads"] + allocated["stores"]
+        total_before += before
+        total_after += after
+        eliminated = f"{1 - after / before:.0%}" if before else "-"
+        print(f"{name:<24} {allocated['variables']:>4} {allocated['registers']:>4} "
+              f"{allocated['spilled']:>5}  {memory['loads']:>4} -> {allocated['loads']:<4} "
+              f"{memory['stores']:>4} -> {allocated['stores']:<4}  {eliminated}")
+    print(f"memory accesses: {total_before} -> {total_after} "
+          f"({total_before - total_after} eliminated)")
+
+
+def generated_program(variables, lines, seed=20):
+    rng = random.Random(seed)
+    names = [f"v{i}" for i in range(variables)]
+    source = [f"ALLOC {name}" for name in names]
+    depth = 0
+    for _ in range(lines):
+        roll = rng.random()
+        if roll < 0.05 and depth < 3:
+            source.append(f"FOR i{depth} 0 {rng.randrange(2, 10)}")
+            depth += 1
+        elif roll < 0.1 and depth:
+            source.append("END")
+            depth -= 1
+        elif roll < 0.15:
+            source.append(f"PRINT {rng.choice(names)}")
+        else:
+            source.append(f"{rng.choice(('ADD', 'SUB'))} {rng.choice(names)} "
+                          f"{rng.choice(names + ['1', '7'])}")
+    source += ["END"] * depth
+    return parse_source("\n".join(source))
+
+
+def report_compile_time(variables, lines):
+    instructions = generated_program(variables, lines)
+    print(f"generated program: {lines:,} lines, {variables} variables")
+    for label, allocate in (("memory cells", False), ("linear scan", True)):
+        start = time.perf_counter()
+        asm, stats = generate_x64(instructions, allocate)
+        seconds = time.perf_counter() - start
+        print(f"  {label:<14} {seconds * 1e3:>8.1f} ms  {len(asm):>7,} lines  "
+              f"loads {stats['loads']:>6,}  stores {stats['stores']:>6,}  "
+              f"registers {stats['registers']}  spilled {stats['spilled']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--variables", type=int, default=40)
+    parser.add_argument("--lines", type=int, default=20_000)
+    opts = parser.parse_args()
+    report_examples()
+    report_compile_time(opts.variables, opts.lines)
@@ -0,0 +1,75 @@
+"""
+.scxbin load-time benchmark.
+
+Compares loading the v1 JSON container with mapping the v2 binary
+container, both up to "ready to execute" and for a full pass over every
+instruction.
+
+    python benchmarks/bench_scxbin.py --sizes 10000 100000 1000000 10000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from supercodex_compiler import load_scxbin, save_scxbin  # noqa: E402
+
+
+def generated_bytecode(size, variables=64):
+    """ ALLOC/STORE/ADD/PRINT stream over a bounded set of variable names """
+    body = []
+    for i in range(variables):
+        name = f"v{i}"
+        body.append({"op": "ALLOC", "args": [name]})
+        body.append({"op": "STORE", "args": [name, i]})
+        body.append({"op": "ADD", "args": [name, f"v{(i + 1) % variables}"]})
+        body.append({"op": "PRINT", "args": [name]})
+    for n in range(size):
+        yield body[n % len(body)]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(sizes, v1_limit):
+    print(f"{'instructions':>12} {'format':>6} {'file':>10} {'open':>10} {'full pass':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            v2_path = os.path.join(tmp, f"p{size}.v2.scxbin")
+            save_scxbin(generated_bytecode(size), v2_path)
+
+            program, open_time = timed(lambda: load_scxbin(v2_path))
+            _, raw_time = timed(lambda: sum(1 for _ in program.iter_raw()))
+            _, decode_time = timed(lambda: sum(1 for _ in program.ops()))
+            program.close()
+            print(f"{size:>12,} {'v2':>6} {os.path.getsize(v2_path) / 1e6:>8.2f}MB "
+                  f"{open_time * 1e3:>8.2f}ms {raw_time * 1e3:>8.1f}ms  "
+                  f"(decoded: {decode_time * 1e3:.1f}ms)")
+
+            if size > v1_limit:
+                print(f"{size:>12,} {'v1':>6}  skipped (> --v1-limit)")
+                continue
+            v1_path = os.path.join(tmp, f"p{size}.v1.scxbin")
+            save_scxbin(generated_bytecode(size), v1_path, version=1)
+            # v1 has to decode everything before the first instruction can run
+            data, open_time = timed(lambda: load_scxbin(v1_path))
+            _, pass_time = timed(lambda: sum(1 for _ in data))
+            print(f"{size:>12,} {'v1':>6} {os.path.getsize(v1_path) / 1e6:>8.2f}MB "
+                  f"{open_time * 1e3:>8.2f}ms {(open_time + pass_time) * 1e3:>8.1f}ms")
+            del data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--v1-limit", type=int, default=1_000_000,
+                        help="largest program to also load as v1 JSON")
+    opts = parser.parse_args()
+    run(opts.sizes, opts.v1_limit)
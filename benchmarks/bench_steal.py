@@ -0,0 +1,144 @@
+"""
+Work-stealing pool benchmark.
+
+Recursive fan-out: every node splits into --fanout children down to
+--depth, and each leaf does a little arithmetic. The work-stealing pool
+runs it as written, with tasks spawning and joining their children. A
+ThreadPoolExecutor deadlocks on that once blocked parents fill every
+worker, so the current executor gets the same tree expanded one level
+at a time from the driver. A flat batch of tiny tasks shows the per-task
+submit cost on its own. Last, a task still queued when the pool shuts
+down is checked to wake the thread joining it.
+
+    python benchmarks/bench_steal.py --depth 12 --fanout 2 --workers 4
+"""
+import argparse
+import concurrent.futures
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ParallelismandTaskScheduling import WorkStealingPool  # noqa: E402
+
+LEAF_WORK = 50
+
+
+def leaf():
+    return sum(range(LEAF_WORK)) and 1
+
+
+def serial_fanout(depth, fanout):
+    if depth == 0:
+        return leaf()
+    return sum(serial_fanout(depth - 1, fanout) for _ in range(fanout))
+
+
+def stealing_fanout(pool, depth, fanout):
+    if depth == 0:
+        return leaf()
+    children = [pool.spawn(stealing_fanout, pool, depth - 1, fanout) for _ in range(fanout)]
+    return sum(pool.join(child) for child in children)
+
+
+def executor_fanout(executor, depth, fanout):
+    """ Level by level from the driver: the only deadlock-free way to fan
+        out on a shared-queue pool """
+    level = [None]
+    for _ in range(depth):
+        futures = [executor.submit(lambda: None) for _ in range(len(level) * fanout)]
+        concurrent.futures.wait(futures)
+        level = futures
+    leaves = [executor.submit(leaf) for _ in level]
+    return sum(future.result() for future in leaves)
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def report(label, tasks, seconds, baseline):
+    print(f"  {label:<26} {seconds * 1e3:>9.1f} ms  {tasks / seconds:>12,.0f} tasks/s  "
+          f"({baseline / seconds:.2f}x)")
+
+
+def run(depth, fanout, workers, flat, repeat):
+    tasks = sum(fanout ** level for level in range(depth + 1))
+    expected = fanout ** depth
+    print(f"fan-out {fanout}^{depth}: {tasks:,} tasks, {workers} workers, "
+          f"{os.cpu_count()} CPU(s)")
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor, \
+            WorkStealingPool(workers) as pool:
+        total, serial_time = best_of(lambda: serial_fanout(depth, fanout), repeat)
+        assert total == expected
+        total, executor_time = best_of(lambda: executor_fanout(executor, depth, fanout), repeat)
+        assert total == expected
+        steals = pool.steals
+        total, stealing_time = best_of(
+            lambda: pool.join(pool.spawn(stealing_fanout, pool, depth, fanout)), repeat)
+        assert total == expected
+        steals = (pool.steals - steals) // repeat
+        report("serial recursion", tasks, serial_time, executor_time)
+        report("ThreadPoolExecutor", tasks, executor_time, executor_time)
+        report("work-stealing pool", tasks, stealing_time, executor_time)
+        print(f"  (about {steals:,} steals per run)")
+
+        print(f"flat batch: {flat:,} tiny tasks")
+
+        def thread_pool_batch():
+            futures = [executor.submit(leaf) for _ in range(flat)]
+            concurrent.futures.wait(futures)
+            return sum(future.result() for future in futures)
+
+        total, executor_time = best_of(thread_pool_batch, repeat)
+        assert total == flat
+        total, stealing_time = best_of(lambda: sum(pool.spawn_parallel([leaf] * flat)), repeat)
+        assert total == flat
+        report("ThreadPoolExecutor", flat, executor_time, executor_time)
+        report("work-stealing pool", flat, stealing_time, executor_time)
+
+
+def check_shutdown_wakes_joiners():
+    pool = WorkStealingPool(1)
+    gate = threading.Event()
+    pool.spawn(gate.wait)
+    queued = pool.spawn(leaf)
+    outcome = []
+
+    def joiner():
+        try:
+            outcome.append(pool.join(queued))
+        except concurrent.futures.CancelledError as error:
+            outcome.append(error)
+    waiting = threading.Thread(target=joiner, daemon=True)
+    waiting.start()
+    stopping = threading.Thread(target=pool.shutdown)
+    stopping.start()
+    while pool.running:
+        time.sleep(0.001)
+    # The worker sees the pool stopping as soon as it is free, and leaves `queued` behind
+    gate.set()
+    stopping.join()
+    waiting.join(5)
+    assert not waiting.is_alive(), "join() still waiting after shutdown"
+    assert isinstance(outcome[0], concurrent.futures.CancelledError), outcome
+    print("shutdown: a joiner of a queued task is woken with CancelledError")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--depth", type=int, default=12)
+    parser.add_argument("--fanout", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--flat", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    opts = parser.parse_args()
+    run(opts.depth, opts.fanout, opts.workers, opts.flat, opts.repeat)
+    check_shutdown_wakes_joiners()
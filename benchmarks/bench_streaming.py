@@ -0,0 +1,133 @@
+"""
+Streaming execution benchmark.
+
+Runs generated loop-heavy programs through StreamingEmulator from a pipe and
+reports throughput and peak Python memory, next to the peak memory of
+loading the same program whole (v1 JSON).
+
+    python benchmarks/bench_streaming.py --sizes 100000 1000000
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from supercodex_compiler import (  # noqa: E402
+    StreamingEmulator,
+    SuperCodeXEmulator,
+    load_scxbin,
+    save_scxbin,
+    write_scxbin_stream,
+)
+
+
+def looping_program(size, iterations=8):
+    """ Blocks of straight-line work, each closed by a short backward loop """
+    yield {"op": "ALLOC", "args": ["i"]}
+    yield {"op": "ALLOC", "args": ["acc"]}
+    emitted, block = 2, 0
+    while emitted < size:
+        label = f"loop{block}"
+        body = [
+            {"op": "STORE", "args": ["i", 0]},
+            {"op": "LABEL", "args": [label]},
+            {"op": "ADD", "args": ["acc", "i"]},
+            {"op": "STORE", "args": ["acc", "rax"]},
+            {"op": "ADD", "args": ["i", 1]},
+            {"op": "STORE", "args": ["i", "rax"]},
+            {"op": "CMP", "args": ["i", iterations]},
+            {"op": "JL", "args": [label]},
+        ]
+        body += [{"op": "ADD", "args": ["acc", 1]}] * 24
+        for instruction in body:
+            yield instruction
+        emitted += len(body)
+        block += 1
+
+
+# Streamed and loaded whole, these print the same
+SHARED_PROGRAMS = [
+    [("ALLOC", ["x"]), ("STORE", ["x", 5]), ("ADD", ["x", 3]), ("PRINT", ["y"])],
+    [("ALLOC", ["h"]), ("STORE", ["h", 1]), ("FREE", ["h"]), ("PRINT", ["h"])],
+    [("ALLOC", ["i"]), ("LABEL", ["top"]), ("ADD", ["i", 1]), ("STORE", ["i", "rax"]),
+     ("PRINT", ["i"]), ("CMP", ["i", 3]), ("JL", ["top"]), ("IF", ["i", "==", "i"]),
+     ("PRINT", ["i"]), ("SUB", ["i", 1]), ("PRINT", ["rax"])],
+]
+
+
+def check_matches_execute():
+    for program in SHARED_PROGRAMS:
+        bytecode = [{"op": op, "args": args} for op, args in program]
+        outputs = []
+        for streamed in (False, True):
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                if streamed:
+                    stream = io.BytesIO()
+                    write_scxbin_stream(bytecode, stream, chunk_size=2)
+                    stream.seek(0)
+                    StreamingEmulator(window=8).execute_stream(stream)
+                else:
+                    SuperCodeXEmulator().execute(bytecode)
+            outputs.append(output.getvalue())
+        assert outputs[0] == outputs[1], (program, outputs)
+
+
+def stream_through_pipe(size, window, chunk_size):
+    read_fd, write_fd = os.pipe()
+
+    def produce():
+        with os.fdopen(write_fd, "wb") as pipe:
+            write_scxbin_stream(looping_program(size), pipe, chunk_size)
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    emulator = StreamingEmulator(window=window)
+    with os.fdopen(read_fd, "rb") as pipe:
+        emulator.execute_stream(pipe)
+    producer.join()
+
+
+def run(sizes, window, chunk_size):
+    check_matches_execute()
+    print(f"window={window} chunk={chunk_size}")
+    print(f"{'instructions':>12} {'stream instr/s':>15} {'stream peak':>12} {'v1 load peak':>13}")
+    with tempfile.TemporaryDirectory() as tmp, \
+            open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for size in sizes:
+            start = time.perf_counter()
+            stream_through_pipe(size, window, chunk_size)
+            seconds = time.perf_counter() - start
+
+            tracemalloc.start()
+            stream_through_pipe(size, window, chunk_size)
+            stream_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            path = os.path.join(tmp, "program.scxbin")
+            save_scxbin(looping_program(size), path, version=1)
+            tracemalloc.start()
+            data = load_scxbin(path)
+            load_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            del data
+
+            with contextlib.redirect_stdout(sys.__stdout__):
+                print(f"{size:>12,} {size / seconds:>15,.0f} "
+                      f"{stream_peak / 1e6:>10.2f}MB {load_peak / 1e6:>11.2f}MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--window", type=int, default=4096)
+    parser.add_argument("--chunk-size", type=int, default=4096)
+    opts = parser.parse_args()
+    run(opts.sizes, opts.window, opts.chunk_size)
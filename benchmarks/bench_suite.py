@@ -0,0 +1,317 @@
+"""
+Pipeline benchmark suite.
+
+One workload per stage, each run on generated programs of every --sizes
+(statements, or DEFINE blocks for Parser.py): SuperCodeXLexer.tokenize,
+Lexer.tokenize (Lexer.py), the Parser in Parser.py, parse_source,
+BytecodeGenerator.generate, compile_supercodex writing assembly only
+(as written, and with --optimize --regalloc), BytecodeInterpreter.execute
+and SuperCodeXEmulator.execute. Programs come from a seeded generator,
+so the same options give the same inputs on every run.
+
+Each workload is run --repeat times after a warm-up run. The report has
+latency percentiles, throughput at the median and the peak memory
+allocated during one more run under tracemalloc. Results are written as
+JSON to --output; with --compare, the medians are checked against an
+earlier results file and any workload slower by more than --threshold is
+reported as a regression (exit status 1).
+
+    python benchmarks/bench_suite.py --sizes 100 1000 10000 --repeat 10
+    python benchmarks/bench_suite.py --output new.json --compare old.json
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from Lexer import Lexer  # noqa: E402
+from Parser import Parser  # noqa: E402
+from supercodex_compiler import (  # noqa: E402
+    BytecodeGenerator,
+    BytecodeInterpreter,
+    PROFILE_EXACT,
+    Profiler,
+    SuperCodeXEmulator,
+    SuperCodeXLexer,
+    TRACE_OFF,
+    compile_supercodex,
+    lower_program,
+    parse_source,
+)
+
+PERCENTILES = (50, 90, 99)
+
+
+def scdx_source(size, seed):
+    """ `size` statements of SuperCodeX: arithmetic on a pool of variables,
+        short FOR loops and IF blocks, and FUNCs called from the top level.
+        Right-hand operands are constants or variables that are only ever
+        STOREd, so values grow linearly however long the program is. """
+    rng = random.Random(seed)
+    names = [f"v{i}" for i in range(max(4, size // 50))]
+    constants = [f"c{i}" for i in range(4)]
+    lines = ["# generated SuperCodeX source"] + [f"ALLOC {name}" for name in names + constants]
+    functions = []
+    depth = 0
+    while len(lines) + len(functions) < size:
+        roll = rng.random()
+        if roll < 0.05 and depth < 2:
+            lines.append(f"FOR i{depth} 0 {rng.randrange(2, 6)}")
+            depth += 1
+        elif roll < 0.08 and depth < 2:
+            lines.append(f"IF {rng.choice(names)} > {rng.randrange(100)}")
+            depth += 1
+        elif roll < 0.14 and depth:
+            lines.append("END")
+            depth -= 1
+        elif roll < 0.16 and not depth:
+            name = f"f{len(functions)}"
+            target = rng.choice(names)
+            functions += [f"FUNC {name}", f"    ADD {target} {rng.randrange(1, 10)}",
+                          f"    PRINT {target}", "END"]
+            lines.append(f"CALL {name}")
+        elif roll < 0.22:
+            lines.append(f"PRINT {rng.choice(names)}")
+        elif roll < 0.26:
+            lines.append(f"STORE {rng.choice(names + constants)} {rng.randrange(100)}")
+        else:
+            lines.append(f"{rng.choice(('ADD', 'SUB'))} {rng.choice(names)} "
+                         f"{rng.choice(constants + ['1', '7'])}")
+    lines += ["END"] * depth
+    return "\n".join(lines + functions) + "\n"
+
+
+def c_like_source(size, seed):
+    """ `size` lines of the C-like syntax Lexer.py tokenizes """
+    rng = random.Random(seed)
+    keywords = ("IF", "LOOP", "CALL", "DECLARE", "RETURN")
+    lines = []
+    for i in range(size):
+        roll = rng.random()
+        if roll < 0.1:
+            lines.append(f"DEFINE fn{i}(a, b) {{ // function {i}")
+        elif roll < 0.2:
+            lines.append(f'    CMD_EXEC("echo {i}");')
+        elif roll < 0.3:
+            lines.append("}")
+        else:
+            lines.append(f"    {rng.choice(keywords)} x{i % 40} = y{i % 17} + {rng.randrange(1000)};")
+    return "\n".join(lines) + "\n"
+
+
+def define_source(size):
+    """ `size` DEFINE blocks: the statements the Parser in Parser.py knows """
+    return "\n".join(f"DEFINE fn{i}(a, b, c) {{ EXIT EXIT }}" for i in range(size)) + "\n"
+
+
+def emulator_program(size, seed):
+    """ `size` emulator instructions of {"op", "args"} dicts """
+    rng = random.Random(seed)
+    names = [f"m{i}" for i in range(16)]
+    program = []
+    for name in names:
+        program.append({"op": "ALLOC", "args": [name]})
+        program.append({"op": "STORE", "args": [name, str(rng.randrange(100))]})
+    while len(program) < size:
+        roll = rng.random()
+        if roll < 0.1:
+            program.append({"op": "IF", "args": [rng.choice(names), "<", rng.choice(names)]})
+            program.append({"op": "PRINT", "args": [rng.choice(names)]})
+        elif roll < 0.15:
+            program.append({"op": "COMPARE", "args": [rng.choice(names), "==", rng.choice(names)]})
+        elif roll < 0.25:
+            program.append({"op": "STORE", "args": [rng.choice(names), str(rng.randrange(100))]})
+        else:
+            program.append({"op": "ADD", "args": [rng.choice(names), rng.choice(names)]})
+    return program
+
+
+# A workload takes (size, seed, directory) and returns (setup, run, items,
+# unit): setup() makes fresh state for one run outside the timing, run(state)
+# is what is timed, and items / unit give the throughput.
+def superlexer_workload(size, seed, directory):
+    source = scdx_source(size, seed)
+    return lambda: SuperCodeXLexer(source), lambda lexer: lexer.tokenize(), len(source), "B"
+
+
+def lexer_workload(size, seed, directory):
+    # Lexer tokenizes as it is constructed
+    source = c_like_source(size, seed)
+    return lambda: source, Lexer, len(source), "B"
+
+
+def parser_workload(size, seed, directory):
+    source = define_source(size)
+    return (lambda: Lexer(source), lambda lexer: Parser(lexer).parse(), size, "DEFINE")
+
+
+def parse_source_workload(size, seed, directory):
+    source = scdx_source(size, seed)
+    return lambda: source, parse_source, size, "line"
+
+
+def bytecode_generator_workload(size, seed, directory):
+    tokens = SuperCodeXLexer(scdx_source(size, seed)).tokenize()
+    return (lambda: BytecodeGenerator(tokens), lambda generator: generator.generate(),
+            len(tokens), "token")
+
+
+def compile_workload(flags):
+    def workload(size, seed, directory):
+        path = os.path.join(directory, f"suite_{size}.scdx")
+        output = os.path.join(directory, f"suite_{size}.asm")
+        with open(path, "w") as file:
+            file.write(scdx_source(size, seed))
+
+        def setup():
+            # An unchanged output is not rewritten; start from nothing
+            if os.path.exists(output):
+                os.remove(output)
+
+        def run(_):
+            compile_supercodex(path, output, flags, cache=None, assemble=False)
+        return setup, run, size, "line"
+    return workload
+
+
+def interpreter_workload(size, seed, directory):
+    program = lower_program(parse_source(scdx_source(size, seed)))
+    # Throughput is in instructions executed, counted once by the profiler
+    profiler = Profiler(PROFILE_EXACT)
+    BytecodeInterpreter(program, trace=TRACE_OFF, profile=profiler).execute()
+    executed = sum(entry["count"] for entry in profiler.report()["opcodes"].values())
+    return (lambda: BytecodeInterpreter(program, trace=TRACE_OFF),
+            lambda interp: interp.execute(), executed, "instr")
+
+
+def emulator_workload(size, seed, directory):
+    program = emulator_program(size, seed)
+    return SuperCodeXEmulator, lambda emulator: emulator.execute(program), len(program), "instr"
+
+
+WORKLOADS = {
+    "SuperCodeXLexer.tokenize": superlexer_workload,
+    "Lexer.tokenize": lexer_workload,
+    "Parser.parse": parser_workload,
+    "parse_source": parse_source_workload,
+    "BytecodeGenerator.generate": bytecode_generator_workload,
+    "compile_supercodex": compile_workload(()),
+    "compile_supercodex --optimize --regalloc": compile_workload(("--optimize", "--regalloc")),
+    "BytecodeInterpreter.execute": interpreter_workload,
+    "SuperCodeXEmulator.execute": emulator_workload,
+}
+
+
+def percentile(ordered, p):
+    """ Nearest-rank percentile of an ascending list """
+    return ordered[max(0, -(-p * len(ordered) // 100) - 1)]
+
+
+def measure(name, size, seed, repeat, directory):
+    latencies = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        setup, run, items, unit = WORKLOADS[name](size, seed, directory)
+        run(setup())    # warm-up
+        for _ in range(repeat):
+            state = setup()
+            start = time.perf_counter()
+            run(state)
+            latencies.append(time.perf_counter() - start)
+        state = setup()
+        tracemalloc.start()
+        try:
+            run(state)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    ordered = sorted(latencies)
+    seconds = {"min": ordered[0], "mean": sum(ordered) / len(ordered)}
+    seconds.update((f"p{p}", percentile(ordered, p)) for p in PERCENTILES)
+    return {"workload": name, "size": size, "items": items, "unit": unit, "runs": repeat,
+            "seconds": seconds, "throughput": items / seconds["p50"], "peak_bytes": peak}
+
+
+def environment(seed, repeat):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "seed": seed,
+        "repeat": repeat,
+    }
+
+
+def run_suite(names, sizes, seed, repeat):
+    results = []
+    print(f"{'workload':<42} {'size':>6} {'p50':>10} {'p90':>10} {'p99':>10}  "
+          f"{'throughput':>16}  {'peak':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name in names:
+            for size in sizes:
+                result = measure(name, size, seed, repeat, directory)
+                results.append(result)
+                seconds = result["seconds"]
+                print(f"{name:<42} {size:>6,} {seconds['p50'] * 1e3:>8.2f}ms "
+                      f"{seconds['p90'] * 1e3:>8.2f}ms {seconds['p99'] * 1e3:>8.2f}ms  "
+                      f"{result['throughput']:>11,.0f} {result['unit']}/s  "
+                      f"{result['peak_bytes'] / 1024:>8,.0f}KB")
+    return results
+
+
+def compare(results, baseline_path, threshold):
+    """ Print median changes against an earlier results file; returns the
+        number of regressions """
+    with open(baseline_path) as file:
+        baseline = {(r["workload"], r["size"]): r for r in json.load(file)["results"]}
+    regressions = 0
+    print(f"against {baseline_path} (regression: median more than {threshold:.0%} slower):")
+    for result in results:
+        before = baseline.get((result["workload"], result["size"]))
+        if before is None:
+            continue
+        change = result["seconds"]["p50"] / before["seconds"]["p50"] - 1
+        memory = result["peak_bytes"] / before["peak_bytes"] - 1 if before["peak_bytes"] else 0.0
+        regressed = change > threshold
+        regressions += regressed
+        print(f"  {result['workload']:<42} {result['size']:>6,} {change:>+8.1%} time "
+              f"{memory:>+8.1%} memory{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10_000])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=25)
+    parser.add_argument("--only", nargs="+", choices=list(WORKLOADS), metavar="WORKLOAD",
+                        help=f"run only these: {', '.join(WORKLOADS)}")
+    parser.add_argument("--output", default="bench_suite.json", help="results file to write")
+    parser.add_argument("--compare", help="earlier results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    opts = parser.parse_args()
+    results = run_suite(opts.only or list(WORKLOADS), opts.sizes, opts.seed, opts.repeat)
+    with open(opts.output, "w") as file:
+        json.dump({"environment": environment(opts.seed, opts.repeat), "results": results},
+                  file, indent=2)
+    print(f"results written to {opts.output}")
+    if opts.compare and compare(results, opts.compare, opts.threshold):
+        sys.exit(1)
@@ -154,19 +154,21 @@ class SymbolTable:
         return self.table.get(name)
 
 # === MEMORY ALLOCATOR ===
+from MemoryManager import HeapAllocator
+
 class MemoryAllocator:
     def __init__(self):
         self.heap = {}
-        self.ptr = 0x2000
+        self.allocator = HeapAllocator(0x2000)
 
     def allocate(self, var, size=8):
-        self.heap[var] = {'addr': self.ptr, 'size': size}
-        self.ptr += size
+        if var not in self.heap:
+            self.heap[var] = {'addr': self.allocator.allocate(size), 'size': size}
         return self.heap[var]['addr']
 
     def free(self, var):
         if var in self.heap:
-            del self.heap[var]
+            self.allocator.free(self.heap.pop(var)['addr'])
 
 # === ERROR DEFERRAL ===
 class ErrorDeferral:
@@ -203,12 +205,22 @@ class ParallelBlockManager:
 class EdgeHookEngine:
     def __init__(self):
         self.hooks = {}
+        self.patterns = PatternIndex()
 
     def register(self, event, code):
-        self.hooks[event] = code
+        # Wildcard events ("sensor.*.temp") go to the pattern index
+        if is_pattern(event):
+            self.patterns.add(event, code)
+        else:
+            self.hooks[event] = code
 
     def trigger(self, event):
-        return self.hooks.get(event, [])
+        """ Code registered for the exact event, else the code of every
+            matching pattern concatenated """
+        code = self.hooks.get(event)
+        if code is not None or not self.patterns.count:
+            return code or []
+        return [line for block in self.patterns.match(event) for line in block]
 
 # === SUPER CODEX TO ASM BASE OPS ===
 SCDX_TO_ASM = {
@@ -346,10 +358,13 @@ class TokenType(Enum):
 # Token Class
 # -----------------------------------------
 class Token:
-    def __init__(self, type_, value, line):
+    __slots__ = ("type", "value", "line", "column")
+
+    def __init__(self, type_, value, line, column=None):
         self.type = type_
         self.value = value
         self.line = line
+        self.column = column
 
     def __repr__(self):
         return f"{self.type.name}({self.value})"
@@ -371,31 +386,263 @@ class SuperCodeXLexer:
     def tokenize(self):
         lines = self.source.splitlines()
         for line in lines:
-            line = line.strip()
-
-            if not line or line.startswith("#"):
-                self.tokens.append(Token(TokenType.COMMENT, line, self.line_num))
-                self.line_num += 1
-                continue
-
-            parts = re.findall(r'\".*?\"|\w+|[^\s\w]', line)
-            for part in parts:
-                if part.upper() in self.keywords:
-                    self.tokens.append(Token(TokenType.KEYWORD, part.upper(), self.line_num))
-                elif part.isdigit():
-                    self.tokens.append(Token(TokenType.NUMBER, part, self.line_num))
-                elif re.match(r'^".*"$', part):
-                    self.tokens.append(Token(TokenType.STRING, part.strip('"'), self.line_num))
-                elif re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', part):
-                    self.tokens.append(Token(TokenType.IDENTIFIER, part, self.line_num))
-                else:
-                    self.tokens.append(Token(TokenType.SYMBOL, part, self.line_num))
-            self.tokens.append(Token(TokenType.NEWLINE, "\\n", self.line_num))
+            self.tokens.extend(self.tokenize_line(line, self.line_num))
             self.line_num += 1
 
         self.tokens.append(Token(TokenType.EOF, "EOF", self.line_num))
         return self.tokens
 
+    def tokenize_fast(self):
+        """ Same token stream as tokenize, from one findall of MASTER_PATTERN
+            over the whole buffer. Each distinct match is classified once;
+            offsets, types and line boundaries are built without a per-token
+            Python loop and values are left in the source until asked for. """
+        source = self.source
+        buffer = source
+        if source and source[-1] not in LINE_SEPARATORS:
+            # The last line gets a separator like every other line, so it
+            # ends in a NEWLINE or is matched as a comment line
+            buffer += "\n"
+
+        matches = MASTER_PATTERN.findall(buffer)
+        codes = {match: self.classify_match(match).value for match in set(matches)}
+        types = bytearray(map(codes.__getitem__, matches))
+        offsets = array("q", list(accumulate(map(len, matches), initial=0)))
+        if len(buffer) != len(source):
+            offsets[-1] = len(source)
+
+        # A separator right after another line end is an empty or
+        # whitespace-only line, which tokenize reports as a COMMENT
+        newline = TokenType.NEWLINE.value
+        if types[:1] == bytes([newline]):
+            types[0] = TokenType.COMMENT.value
+        for previous in (newline, TokenType.COMMENT.value):
+            pair = bytes([previous, newline])
+            index = types.find(pair)
+            while index != -1:
+                types[index + 1] = TokenType.COMMENT.value
+                index = types.find(pair, index + 1)
+
+        types.append(TokenType.EOF.value)
+        offsets.append(len(source))
+        return TokenArrays(source, types, offsets, self.line_num)
+
+    def classify_match(self, match):
+        body = match.lstrip()
+        if match[-1] in LINE_SEPARATORS:
+            return TokenType.COMMENT if body.startswith("#") else TokenType.NEWLINE
+        if body[0] == '"' and len(body) > 1:
+            return TokenType.STRING
+        if WORD_PATTERN.match(body):
+            return self.classify_word(body)
+        return TokenType.SYMBOL
+
+    def classify_word(self, word):
+        if word.upper() in self.keywords:
+            return TokenType.KEYWORD
+        if word.isdigit():
+            return TokenType.NUMBER
+        if IDENTIFIER_PATTERN.match(word):
+            return TokenType.IDENTIFIER
+        return TokenType.SYMBOL
+
+    def tokenize_line(self, line, line_num):
+        """ Tokens for a single source line. No token spans lines, so every
+            line can be lexed on its own. """
+        indent = len(line) - len(line.lstrip())
+        line = line.strip()
+
+        if not line or line.startswith("#"):
+            return [Token(TokenType.COMMENT, line, line_num, indent)]
+
+        tokens = []
+        for match in re.finditer(r'\".*?\"|\w+|[^\s\w]', line):
+            part = match.group()
+            column = indent + match.start()
+            if part.upper() in self.keywords:
+                tokens.append(Token(TokenType.KEYWORD, part.upper(), line_num, column))
+            elif part.isdigit():
+                tokens.append(Token(TokenType.NUMBER, part, line_num, column))
+            elif re.match(r'^".*"$', part):
+                tokens.append(Token(TokenType.STRING, part.strip('"'), line_num, column))
+            elif re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', part):
+                tokens.append(Token(TokenType.IDENTIFIER, part, line_num, column))
+            else:
+                tokens.append(Token(TokenType.SYMBOL, part, line_num, column))
+        tokens.append(Token(TokenType.NEWLINE, "\\n", line_num, indent + len(line)))
+        return tokens
+
+# -----------------------------------------
+# Single-pass Lexing
+# -----------------------------------------
+from array import array
+from bisect import bisect_left
+from itertools import accumulate, compress
+
+# Line boundaries as str.splitlines sees them, and whitespace that is not one
+LINE_SEPARATORS = "\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029"
+_SEP = f"(?:\r\n|[{LINE_SEPARATORS}])"
+_SPACE = f"[^\\S{LINE_SEPARATORS}]"
+
+# One match per token with the whitespace in front of it, so matches tile the
+# buffer and offsets are running sums of match lengths. A line whose first
+# token is "#" matches whole, separator included; any other "#" is a symbol.
+# On a code line the separator is the NEWLINE.
+MASTER_PATTERN = re.compile(
+    f'{_SPACE}*(?:\\w+|"[^"{LINE_SEPARATORS}]*"|{_SEP}|[^\\s\\w#])'
+    f"|(?:(?<=[{LINE_SEPARATORS}])|\\A){_SPACE}*#[^{LINE_SEPARATORS}]*{_SEP}"
+    f"|{_SPACE}*#"
+)
+WORD_PATTERN = re.compile(r"\w")
+IDENTIFIER_PATTERN = re.compile(r"[a-zA-Z_][a-zA-Z0-9_]*\Z")
+TOKEN_TYPES = {token_type.value: token_type for token_type in TokenType}
+LINE_END_CODES = bytes(token_type in (TokenType.NEWLINE, TokenType.COMMENT)
+                       for token_type in map(TOKEN_TYPES.get, range(256)))
+
+class TokenArrays:
+    """ Tokens of one buffer as parallel arrays: a type code per token and
+        offsets where token i (with the whitespace before it) spans
+        offsets[i]:offsets[i + 1]. Values, columns and line numbers are worked
+        out from the source when a token is looked at; indexing gives a
+        regular Token. """
+
+    def __init__(self, source, types, offsets, first_line=1):
+        self.source = source
+        self.types = types
+        self.offsets = offsets
+        self.first_line = first_line
+        # Indexes of the NEWLINE / COMMENT tokens that close each line
+        self.line_ends = array("q", compress(range(len(types)), types.translate(LINE_END_CODES)))
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.types)
+        return Token(TOKEN_TYPES[self.types[index]], self.value(index),
+                     self.line(index), self.column(index))
+
+    def __iter__(self):
+        # Walks lines in order instead of bisecting for every token
+        source, offsets = self.source, self.offsets
+        line, line_start = self.first_line, 0
+        for index, code in enumerate(self.types):
+            if code == TokenType.NEWLINE.value:
+                yield Token(TokenType.NEWLINE, "\\n", line, offsets[index] - line_start)
+                line += 1
+                line_start = offsets[index + 1]
+                continue
+            if code == TokenType.EOF.value:
+                yield Token(TokenType.EOF, "EOF", line)
+                continue
+            text = source[offsets[index]:offsets[index + 1]]
+            if code == TokenType.COMMENT.value:
+                text = text.rstrip(LINE_SEPARATORS)
+            value = text.lstrip()
+            column = offsets[index] + len(text) - len(value) - line_start
+            if code == TokenType.KEYWORD.value:
+                value = value.upper()
+            elif code == TokenType.STRING.value:
+                value = value[1:-1]
+            elif code == TokenType.COMMENT.value:
+                yield Token(TokenType.COMMENT, value.rstrip(), line, column)
+                line += 1
+                line_start = offsets[index + 1]
+                continue
+            yield Token(TOKEN_TYPES[code], value, line, column)
+
+    def type(self, index):
+        return TOKEN_TYPES[self.types[index]]
+
+    def text(self, index):
+        return self.source[self.offsets[index]:self.offsets[index + 1]]
+
+    def value(self, index):
+        code = self.types[index]
+        if code == TokenType.NEWLINE.value:
+            return "\\n"
+        if code == TokenType.EOF.value:
+            return "EOF"
+        text = self.text(index).strip()
+        if code == TokenType.KEYWORD.value:
+            return text.upper()
+        if code == TokenType.STRING.value:
+            return text[1:-1]
+        return text
+
+    def line(self, index):
+        return self.first_line + bisect_left(self.line_ends, index)
+
+    def column(self, index):
+        code = self.types[index]
+        if code == TokenType.EOF.value:
+            return None
+        closed = bisect_left(self.line_ends, index)
+        line_start = self.offsets[self.line_ends[closed - 1] + 1] if closed else 0
+        if code == TokenType.NEWLINE.value:
+            # tokenize puts NEWLINE right after the last token on the line
+            return self.offsets[index] - line_start
+        text = self.text(index)
+        if code == TokenType.COMMENT.value:
+            text = text.rstrip(LINE_SEPARATORS)
+        return self.offsets[index] + len(text) - len(text.lstrip()) - line_start
+
+    def to_tokens(self):
+        return list(self)
+
+# -----------------------------------------
+# Incremental Lexing
+# -----------------------------------------
+class TokenDiff:
+    """ Result of an edit: lines [start, start + len(removed)) of the old
+        buffer were replaced by lines [start, start + len(added)) """
+
+    def __init__(self, start, removed, added):
+        self.start = start
+        self.removed = removed   # per-line token lists that went away
+        self.added = added       # per-line token lists that replaced them
+
+    def __repr__(self):
+        return f"TokenDiff(start={self.start}, removed={len(self.removed)}, added={len(self.added)})"
+
+class IncrementalLexer:
+    """ Keeps per-line token lists for a buffer and re-lexes only the lines an
+        edit touches, so the cost of an edit does not depend on file size.
+        Line indexes are 0-based; token `line` numbers stay 1-based. """
+
+    def __init__(self, source_code=""):
+        self.lexer = SuperCodeXLexer("")
+        self.lines = source_code.splitlines()
+        self.line_tokens = [self.lexer.tokenize_line(line, number)
+                            for number, line in enumerate(self.lines, 1)]
+
+    def edit(self, start, end, new_text):
+        """ Replace lines [start, end) with `new_text` and return the TokenDiff """
+        if not 0 <= start <= end <= len(self.lines):
+            raise IndexError(f"Edit range [{start}, {end}) outside 0..{len(self.lines)}")
+        new_lines = new_text.splitlines()
+        added = [self.lexer.tokenize_line(line, number)
+                 for number, line in enumerate(new_lines, start + 1)]
+        removed = self.line_tokens[start:end]
+        self.lines[start:end] = new_lines
+        self.line_tokens[start:end] = added
+        return TokenDiff(start, removed, added)
+
+    def tokens(self):
+        """ Flat token list for the whole buffer, as SuperCodeXLexer.tokenize gives """
+        flat = []
+        for index, line_tokens in enumerate(self.line_tokens):
+            number = index + 1
+            if line_tokens[0].line != number:
+                # Lines shifted by earlier edits. The old tokens may be held
+                # by an earlier TokenDiff, so renumber copies, not them
+                line_tokens = self.line_tokens[index] = [
+                    Token(token.type, token.value, number, token.column) for token in line_tokens]
+            flat.extend(line_tokens)
+        flat.append(Token(TokenType.EOF, "EOF", len(self.line_tokens) + 1))
+        return flat
+
 # -----------------------------------------
 # Bytecode Instruction Model
 # -----------------------------------------
@@ -522,44 +769,105 @@ if __name__ == "__main__":
 
 import threading
 import time
-from typing import List
+from collections import deque
+from typing import List, Optional
 
 # === Bytecode Instruction Model ===
 class Instruction:
-    def __init__(self, op: str, args: List[str]):
+    def __init__(self, op: str, args: List[str], line: Optional[int] = None):
         self.op = op.upper()
         self.args = args
+        self.line = line  # source line, when parsed from source
 
     def __repr__(self):
         return f"{self.op} {' '.join(self.args)}"
 
+# === Trace Sink ===
+# Levels for interpreter / runtime diagnostics:
+#   off      - no events; the interpreter builds its dispatch table without
+#              any trace hooks, so tracing costs nothing on the hot path
+#   buffered - events go to a fixed-size ring buffer, flushed on demand or
+#              when execution fails
+#   verbose  - every event is printed as it happens (the original output)
+TRACE_OFF = "off"
+TRACE_BUFFERED = "buffered"
+TRACE_VERBOSE = "verbose"
+
+class TraceSink:
+    def __init__(self, level=TRACE_VERBOSE, capacity=4096, stream=None):
+        if level not in (TRACE_OFF, TRACE_BUFFERED, TRACE_VERBOSE):
+            raise ValueError(f"Unknown trace level '{level}'")
+        self.level = level
+        self.events = deque(maxlen=capacity)
+        self.stream = stream
+
+    @property
+    def enabled(self):
+        return self.level != TRACE_OFF
+
+    def emit(self, tag, message):
+        if self.level == TRACE_VERBOSE:
+            print(f"[{tag}] {message}", file=self.stream)
+        elif self.level == TRACE_BUFFERED:
+            self.events.append((tag, message))
+
+    def dump(self):
+        """ Buffered events, oldest first """
+        return list(self.events)
+
+    def flush(self):
+        """ Write out and clear the buffered events """
+        while self.events:
+            tag, message = self.events.popleft()
+            print(f"[{tag}] {message}", file=self.stream)
+
+def as_trace_sink(trace):
+    """ Accept either a TraceSink or a trace level name """
+    return trace if isinstance(trace, TraceSink) else TraceSink(trace)
+
 # === Symbol Table ===
 class SymbolTable:
-    def __init__(self):
+    def __init__(self, trace=TRACE_VERBOSE):
         self.variables = {}
+        self.trace = as_trace_sink(trace)
 
     def set(self, name, value):
-        print(f"[SYMBOL] {name} := {value}")
+        self.trace.emit("SYMBOL", f"{name} := {value}")
         self.variables[name] = value
 
     def get(self, name):
         return self.variables.get(name, 0)
 
 # === Memory Allocator ===
+from MemoryManager import HeapAllocator
+
 class MemoryAllocator:
-    def __init__(self):
+    """ Named memory slots, each at an address from a HeapAllocator so a
+        freed slot's address goes to the next allocation that fits """
+    def __init__(self, trace=TRACE_VERBOSE):
         self.memory = {}
+        self.addresses = {}
+        self.allocator = HeapAllocator()
+        self.trace = as_trace_sink(trace)
 
-    def alloc(self, name):
+    def alloc(self, name, size=8):
         if name in self.memory:
             raise Exception(f"Memory '{name}' already allocated.")
-        print(f"[MEM_ALLOC] Allocating memory slot '{name}'")
+        self.addresses[name] = self.allocator.allocate(size)
+        self.trace.emit("MEM_ALLOC", f"Allocating memory slot '{name}' at {hex(self.addresses[name])}")
         self.memory[name] = 0
 
+    def free(self, name):
+        if name not in self.memory:
+            raise Exception(f"Memory '{name}' not allocated.")
+        self.trace.emit("MEM_FREE", f"Freeing memory slot '{name}'")
+        self.allocator.free(self.addresses.pop(name))
+        del self.memory[name]
+
     def store(self, name, value):
         if name not in self.memory:
             raise Exception(f"Memory '{name}' not allocated.")
-        print(f"[MEM_STORE] {name} := {value}")
+        self.trace.emit("MEM_STORE", f"{name} := {value}")
         self.memory[name] = value
 
     def load(self, name):
@@ -567,115 +875,1673 @@ class MemoryAllocator:
 
 # === Error Deferral Handler ===
 class ErrorDeferralHandler:
-    def __init__(self):
+    def __init__(self, trace=TRACE_VERBOSE):
         self.errors = []
+        self.trace = as_trace_sink(trace)
 
     def handle(self, func, *args, **kwargs):
         try:
             return func(*args, **kwargs)
         except Exception as e:
             self.errors.append(str(e))
-            print(f"[DEFERRED ERROR] {e}")
+            self.trace.emit("DEFERRED ERROR", e)
             return None
 
+# === Compact Bytecode ===
+# Integer opcodes for the lowered instruction stream. Operand variants
+# (variable vs. constant) get their own opcode so that handlers never
+# inspect or parse operands while the program runs.
+OPCODE_NAMES = (
+    "NOP", "PRINT", "PRINT_CONST", "ALLOC", "STORE", "LOAD",
+    "ADD", "ADD_CONST", "SUB", "SUB_CONST",
+    "FUNC", "CALL", "PARALLEL", "WAIT", "LOCK", "UNLOCK",
+    "JUMP", "BRANCH", "BRANCH_CONST", "SET", "PUSH", "POP", "FREE",
+)
+OPCODES = {name: code for code, name in enumerate(OPCODE_NAMES)}
+
+class CompactInstruction:
+    __slots__ = ("opcode", "a", "b")
+
+    def __init__(self, opcode, a=None, b=None):
+        self.opcode = opcode
+        self.a = a
+        self.b = b
+
+    def __repr__(self):
+        operands = [str(x) for x in (self.a, self.b) if x is not None]
+        return f"{OPCODE_NAMES[self.opcode]} {' '.join(operands)}".rstrip()
+
+class CompactProgram:
+    __slots__ = ("code", "slots", "names", "functions", "labels")
+
+    def __init__(self, code=None):
+        self.code = code if code is not None else []
+        self.slots = {}   # name -> slot, for lowering and dumps only
+        self.names = []   # slot -> name
+        self.functions = {}  # name -> (entry, END offset), built at load time
+        self.labels = {}     # LABEL name -> offset
+
+    def __len__(self):
+        return len(self.code)
+
+    def slot(self, name):
+        """ Slot index for a variable name, assigning the next free one if new """
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.names)
+            self.names.append(name)
+        return slot
+
+# === Slot Store ===
+# Slots map onto a fixed set of lock stripes (slot % LOCK_STRIPES), so
+# concurrent updates to different variables rarely share a lock and no
+# single lock covers the whole store
+LOCK_STRIPES = 64
+# Bytes an allocated slot takes on the store's heap
+SLOT_SIZE = 8
+
+class SlotStore:
+    """ Flat variable storage indexed by the slots assigned at load time.
+        An allocated slot also holds an address on `heap`, so FREE hands
+        its memory to the next ALLOC and the heap's high-water mark is the
+        program's peak memory. """
+    __slots__ = ("names", "values", "allocated", "stripes", "mutexes",
+                 "heap", "addresses", "heap_lock")
+
+    def __init__(self, names):
+        self.names = names
+        self.values = [0] * len(names)
+        self.allocated = bytearray(len(names))
+        self.stripes = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self.mutexes = {}
+        self.heap = HeapAllocator()
+        self.addresses = {}   # slot -> address
+        self.heap_lock = threading.Lock()
+
+    def mutex(self, slot):
+        """ Per-variable mutex behind LOCK / UNLOCK, created on first use """
+        mutex = self.mutexes.get(slot)
+        if mutex is None:
+            mutex = self.mutexes.setdefault(slot, threading.RLock())
+        return mutex
+
+    def grow(self):
+        """ Make room for slots assigned after the store was created """
+        missing = len(self.names) - len(self.values)
+        if missing > 0:
+            self.values.extend([0] * missing)
+            self.allocated.extend(bytes(missing))
+
+    def dump(self):
+        return {name: self.values[slot] for slot, name in enumerate(self.names)}
+
+# === Shared Slot Store ===
+import multiprocessing
+from multiprocessing import shared_memory
+
+class SharedSlotStore:
+    """ SlotStore kept in a multiprocessing.shared_memory block so worker
+        processes see the same variables. Fixed layout: one int64 value per
+        slot, then one allocated flag byte per slot. Values must fit in 64
+        bits and the block cannot grow past `capacity` slots. Locks are
+        process-shared and striped for LOCK / UNLOCK too, so two variables
+        on the same stripe also share a mutex. The heap that gives slots
+        their addresses is per process. """
+    __slots__ = ("names", "capacity", "shm", "values", "allocated", "owner",
+                 "stripes", "mutex_stripes", "heap", "addresses", "heap_lock")
+
+    def __init__(self, names, capacity=None, name=None, locks=None):
+        self.names = names
+        self.capacity = max(capacity or len(names), 1)
+        self.owner = name is None
+        if locks is None:
+            locks = ([multiprocessing.Lock() for _ in range(LOCK_STRIPES)],
+                     [multiprocessing.RLock() for _ in range(LOCK_STRIPES)])
+        self.stripes, self.mutex_stripes = locks
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.capacity * 9)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.values = self.shm.buf[:self.capacity * 8].cast("q")
+        self.allocated = self.shm.buf[self.capacity * 8:self.capacity * 9]
+        if self.owner:
+            self.allocated[:] = bytes(self.capacity)
+        self.heap = HeapAllocator()
+        self.addresses = {}
+        self.heap_lock = threading.Lock()
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def locks(self):
+        """ Lock stripes to hand to worker processes at start-up """
+        return self.stripes, self.mutex_stripes
+
+    def mutex(self, slot):
+        return self.mutex_stripes[slot % LOCK_STRIPES]
+
+    def grow(self):
+        if len(self.names) > self.capacity:
+            raise MemoryError(f"Shared store holds {self.capacity} slots, "
+                              f"program needs {len(self.names)}")
+
+    def dump(self):
+        return {name: self.values[slot] for slot, name in enumerate(self.names)}
+
+    def close(self):
+        """ Detach; the creating process also frees the block """
+        self.values.release()
+        self.allocated.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def _lower_print(args, program):
+    if args[0].isdigit():
+        return CompactInstruction(OPCODES["PRINT_CONST"], int(args[0]))
+    return CompactInstruction(OPCODES["PRINT"], program.slot(args[0]))
+
+def _lower_binary(op):
+    var_code, const_code = OPCODES[op], OPCODES[op + "_CONST"]
+
+    def lower(args, program):
+        if args[0].isdigit():
+            # The result would be bound to a numeric name nothing can read back
+            return CompactInstruction(OPCODES["NOP"])
+        if args[1].isdigit():
+            return CompactInstruction(const_code, program.slot(args[0]), int(args[1]))
+        return CompactInstruction(var_code, program.slot(args[0]), program.slot(args[1]))
+    return lower
+
+def _lower_var(op):
+    code = OPCODES[op]
+    return lambda args, program: CompactInstruction(code, program.slot(args[0]))
+
+# Per-op lowering rules; ops without a rule lower to NOP as the old
+# if/elif chain silently ignored them. FUNC's END offset is filled in
+# by lower_program.
+LOWERING_RULES = {
+    "PRINT": _lower_print,
+    "ALLOC": _lower_var("ALLOC"),
+    "FREE": _lower_var("FREE"),
+    "STORE": lambda args, program: CompactInstruction(
+        OPCODES["STORE"], program.slot(args[0]), int(args[1])),
+    "LOAD": _lower_var("LOAD"),
+    "ADD": _lower_binary("ADD"),
+    "SUB": _lower_binary("SUB"),
+    "FUNC": lambda args, program: CompactInstruction(OPCODES["FUNC"], args[0]),
+    "CALL": lambda args, program: CompactInstruction(OPCODES["CALL"], args[0]),
+    "PARALLEL": lambda args, program: CompactInstruction(OPCODES["PARALLEL"], tuple(args)),
+    "WAIT": lambda args, program: CompactInstruction(OPCODES["WAIT"], int(args[0])),
+    "LOCK": _lower_var("LOCK"),
+    "UNLOCK": _lower_var("UNLOCK"),
+    "PUSH": _lower_var("PUSH"),
+    "POP": _lower_var("POP"),
+}
+
+def lower_instruction(instr: Instruction, program: CompactProgram) -> CompactInstruction:
+    """ Lower one Instruction to its compact form with operands pre-parsed
+        and variable names replaced by slots of `program` """
+    rule = LOWERING_RULES.get(instr.op)
+    if rule is None:
+        return CompactInstruction(OPCODES["NOP"])
+    return rule(instr.args, program)
+
+# Shared NOP standing in for END so block ends can be found by identity
+END_MARKER = CompactInstruction(OPCODES["NOP"])
+
+def find_block_end(code, start, end_pc=None):
+    """ Offset of the first END after `start` (FUNC bodies do not nest) """
+    end_pc = len(code) if end_pc is None else end_pc
+    for pc in range(start + 1, end_pc):
+        if code[pc] is END_MARKER:
+            return pc
+    return end_pc
+
+# === Control Flow Lowering ===
+# IF / ELSE / WHILE / FOR / LABEL / JMP lower to JUMP and BRANCH records
+# whose targets are resolved to code offsets while the program loads, so
+# a loop is a plain backwards jump in the flat instruction loop. Branch
+# and jump records hold `target - 1` in `a`: the interpreter loop steps
+# the instruction pointer after every handler.
+#   IF a op b ... [ELSE ...] END     WHILE a op b ... END
+#   FOR var start stop [step] ... END (var runs from start while < stop,
+#                                       or > stop for a negative step)
+import operator
+
+# A condition branches past its block when it fails, so the branch tests
+# the negation
+NEGATED_TESTS = {
+    "==": operator.ne, "!=": operator.eq,
+    "<": operator.ge, ">": operator.le,
+    "<=": operator.gt, ">=": operator.lt,
+}
+MIRRORED_TESTS = {"==": "==", "!=": "!=", "<": ">", ">": "<", "<=": ">=", ">=": "<="}
+
+def _lower_condition(left, op, right, program):
+    """ Branch taken when `left op right` is false; target patched later """
+    if op not in NEGATED_TESTS:
+        raise SyntaxError(f"Unknown comparison '{op}'")
+    if left.isdigit() and not right.isdigit():
+        left, op, right = right, MIRRORED_TESTS[op], left
+    if left.isdigit():
+        # Constant condition: always or never branch
+        taken = NEGATED_TESTS[op](int(left), int(right))
+        return CompactInstruction(OPCODES["JUMP" if taken else "NOP"])
+    test = NEGATED_TESTS[op]
+    if right.isdigit():
+        return CompactInstruction(OPCODES["BRANCH_CONST"], None,
+                                  (test, program.slot(left), int(right)))
+    return CompactInstruction(OPCODES["BRANCH"], None,
+                              (test, program.slot(left), program.slot(right)))
+
+def _jump_to(ins, target):
+    ins.a = target - 1
+
+def _open_if(args, program, blocks, jumps):
+    branch = _lower_condition(*args[:3], program)
+    program.code.append(branch)
+    blocks.append(("IF", branch))
+
+def _open_else(args, program, blocks, jumps):
+    if not blocks or blocks[-1][0] != "IF":
+        raise SyntaxError("ELSE without IF")
+    _, branch = blocks.pop()
+    skip = CompactInstruction(OPCODES["JUMP"])
+    program.code.append(skip)
+    _jump_to(branch, len(program.code))
+    blocks.append(("ELSE", skip))
+
+def _open_while(args, program, blocks, jumps):
+    test = len(program.code)
+    branch = _lower_condition(*args[:3], program)
+    program.code.append(branch)
+    blocks.append(("WHILE", branch, test))
+
+def _open_for(args, program, blocks, jumps):
+    var, start, stop = args[:3]
+    step = int(args[3]) if len(args) > 3 else 1
+    if step == 0:
+        raise SyntaxError("FOR step must not be 0")
+    code = program.code
+    slot = program.slot(var)
+    if start.isdigit():
+        code.append(CompactInstruction(OPCODES["SET"], slot, int(start)))
+    else:
+        code.append(CompactInstruction(OPCODES["SET"], slot, 0))
+        code.append(CompactInstruction(OPCODES["ADD"], slot, program.slot(start)))
+    test = len(code)
+    branch = _lower_condition(var, "<" if step > 0 else ">", stop, program)
+    code.append(branch)
+    blocks.append(("FOR", branch, test, slot, step))
+
+def _close_block(args, program, blocks, jumps):
+    code = program.code
+    if not blocks:
+        # Stray END: kept as the marker it always was
+        code.append(END_MARKER)
+        return
+    block = blocks.pop()
+    kind = block[0]
+    if kind == "FUNC":
+        block[1].b = len(code)
+        code.append(END_MARKER)
+        return
+    if kind == "FOR":
+        _, branch, test, slot, step = block
+        code.append(CompactInstruction(
+            OPCODES["ADD_CONST" if step > 0 else "SUB_CONST"], slot, abs(step)))
+    if kind in ("WHILE", "FOR"):
+        back = CompactInstruction(OPCODES["JUMP"])
+        _jump_to(back, block[2])
+        code.append(back)
+    _jump_to(block[1], len(code))
+
+def _lower_label(args, program, blocks, jumps):
+    program.labels[args[0]] = len(program.code)
+
+def _lower_jmp(args, program, blocks, jumps):
+    jump = CompactInstruction(OPCODES["JUMP"])
+    program.code.append(jump)
+    jumps.append((jump, args[0]))
+
+# Operands a control op cannot be lowered without
+CONTROL_OPERANDS = {"IF": 3, "WHILE": 3, "FOR": 3, "LABEL": 1, "JMP": 1}
+
+def _source_error(message, line):
+    return SyntaxError(f"line {line}: {message}" if line is not None else message)
+
+CONTROL_RULES = {
+    "IF": _open_if,
+    "ELSE": _open_else,
+    "WHILE": _open_while,
+    "FOR": _open_for,
+    "END": _close_block,
+    "LABEL": _lower_label,
+    "JMP": _lower_jmp,
+}
+
+def lower_program(instructions) -> CompactProgram:
+    """ Lower a list of Instructions to a CompactProgram, resolving FUNC
+        extents, block structure and jump targets and assigning every
+        variable a fixed slot """
+    # Identical instructions share one record; FUNC and control flow
+    # records are patched during lowering, so those are never shared.
+    program = CompactProgram()
+    code = program.code
+    interned = {}
+    blocks = []
+    jumps = []   # (JUMP record, label name) resolved once all labels are known
+    jump_lines = []
+    for instr in instructions:
+        control = CONTROL_RULES.get(instr.op)
+        if control is not None:
+            line = getattr(instr, "line", None)
+            needed = CONTROL_OPERANDS.get(instr.op, 0)
+            if len(instr.args) < needed:
+                raise _source_error(f"{instr.op} needs {needed} operand"
+                                    f"{'s' if needed > 1 else ''}, got {len(instr.args)}", line)
+            try:
+                control(instr.args, program, blocks, jumps)
+            except (SyntaxError, ValueError) as e:
+                raise _source_error(e.msg if isinstance(e, SyntaxError) else e, line) from None
+            if instr.op == "JMP":
+                jump_lines.append(line)
+            continue
+        if instr.op == "FUNC":
+            ins = lower_instruction(instr, program)
+            blocks.append(("FUNC", ins, len(code)))
+            code.append(ins)
+            continue
+        key = (instr.op, *instr.args) if instr.args else instr.op
+        ins = interned.get(key)
+        if ins is None:
+            ins = interned[key] = lower_instruction(instr, program)
+        code.append(ins)
+    for block in reversed(blocks):
+        if block[0] != "FUNC":
+            raise SyntaxError(f"{block[0]} without END")
+        # An unterminated FUNC runs to the end of the program
+        block[1].b = len(code)
+    for (jump, label), line in zip(jumps, jump_lines):
+        if label not in program.labels:
+            raise _source_error(f"JMP to unknown label '{label}'", line)
+        _jump_to(jump, program.labels[label])
+    for pc, ins in enumerate(code):
+        if ins.opcode == OPCODES["FUNC"]:
+            # The first definition is the one execution reaches first
+            program.functions.setdefault(ins.a, (pc + 1, ins.b))
+    return program
+
+# === Instruction Optimizer ===
+# Passes over Instruction / BytecodeInstruction lists, run before lowering
+# or assembly. Knowledge about values is only kept through straight-line
+# code: anything that can jump, call, wait or lock is a barrier. The
+# passes preserve what a program prints. A variable that nothing ever
+# reads may disappear, and a program is assumed not to rely on the
+# deferred errors of STORE. An ALLOC is only taken to zero its variable
+# when it is the variable's only ALLOC and cannot run twice: run again,
+# it would keep the value it finds.
+from collections import Counter
+
+ARITHMETIC = {"ADD": operator.add, "SUB": operator.sub}
+# Ops whose only effect is on their first argument (and, for ADD / SUB,
+# reading the second); every other op is a barrier
+STRAIGHT_LINE_OPS = {"ALLOC", "STORE", "ADD", "SUB", "PRINT", "PUSH", "POP", "LOAD", "FREE"}
+BLOCK_OPENERS = {"IF", "WHILE", "FOR", "FUNC"}
+
+def _is_name(arg):
+    return isinstance(arg, str) and not arg.isdigit()
+
+def _as_operand(value):
+    """ Constant operand text for `value`; only non-negative numbers are
+        read back as constants """
+    return str(value) if value >= 0 else None
+
+def _rewrite(instr, op, args):
+    return type(instr)(op, args)
+
+def _runs_at_most_once(instructions):
+    """ Per instruction, whether it can only run once: it is outside any
+        WHILE / FOR, in the top level or in a FUNC that one CALL or
+        PARALLEL which itself runs at most once names, and its scope has
+        no LABEL / JMP """
+    n = len(instructions)
+    scope_of = [None] * n       # FUNC name, None for the top level
+    looping = [False] * n
+    sites = {}                  # FUNC name -> [(scope, in a loop)] of the calls naming it
+    unstructured = set()
+    frames = [(None, [])]       # (scope, ops of its open blocks)
+    for i, instr in enumerate(instructions):
+        scope, open_blocks = frames[-1]
+        scope_of[i] = scope
+        looping[i] = "WHILE" in open_blocks or "FOR" in open_blocks
+        op = instr.op
+        if op == "FUNC" and instr.args:
+            frames.append((instr.args[0], []))
+        elif op in BLOCK_OPENERS:
+            open_blocks.append(op)
+        elif op == "END":
+            if open_blocks:
+                open_blocks.pop()
+            elif len(frames) > 1:
+                frames.pop()
+        elif op in ("LABEL", "JMP"):
+            unstructured.add(scope)
+        elif op in ("CALL", "PARALLEL"):
+            for name in instr.args:
+                sites.setdefault(name, []).append((scope, looping[i]))
+    once = {None} - unstructured
+    changed = True
+    while changed:
+        changed = False
+        for name, calls in sites.items():
+            if name in once or name in unstructured or len(calls) != 1:
+                continue
+            scope, in_loop = calls[0]
+            if scope in once and not in_loop:
+                once.add(name)
+                changed = True
+    return [scope_of[i] in once and not looping[i] for i in range(n)]
+
+def _fresh_allocs(instructions):
+    """ Indexes of the ALLOCs that always find their variable unallocated,
+        so leave it at 0: its only ALLOC, run at most once """
+    once = _runs_at_most_once(instructions)
+    allocs = Counter(instr.args[0] for instr in instructions if instr.op == "ALLOC" and instr.args)
+    return {i for i, instr in enumerate(instructions)
+            if instr.op == "ALLOC" and instr.args and allocs[instr.args[0]] == 1 and once[i]}
+
+def fold_constants(instructions, stats):
+    """ Constant folding and propagation: ADD / SUB of known values become
+        STOREs, known operands become constants, and STOREs of the value a
+        variable already holds are dropped """
+    result = []
+    known = {}
+    fresh = _fresh_allocs(instructions)
+    for i, instr in enumerate(instructions):
+        op, args = instr.op, instr.args
+        if op not in STRAIGHT_LINE_OPS:
+            if op == "IF" and len(args) >= 3:
+                # Evaluated once, here: known operands can be substituted
+                operands = [_as_operand(known[arg]) if _is_name(arg) and arg in known else None
+                            for arg in (args[0], args[2])]
+                if any(operands):
+                    stats["constant-folding"] += 1
+                    instr = _rewrite(instr, op, [operands[0] or args[0], args[1],
+                                                 operands[1] or args[2], *args[3:]])
+            known.clear()
+            result.append(instr)
+            continue
+        target = args[0] if args else None
+        if op == "ALLOC":
+            if i in fresh:
+                known[target] = 0
+            else:
+                known.pop(target, None)
+        elif op == "STORE":
+            try:
+                value = int(args[1])
+            except (IndexError, ValueError):
+                known.pop(target, None)
+            else:
+                if known.get(target) == value:
+                    stats["constant-folding"] += 1
+                    continue
+                known[target] = value
+        elif op in ARITHMETIC and len(args) == 2 and _is_name(target):
+            source = args[1]
+            value = int(source) if source.isdigit() else known.get(source)
+            if value is not None and target in known:
+                known[target] = ARITHMETIC[op](known[target], value)
+                instr = _rewrite(instr, "STORE", [target, str(known[target])])
+                stats["constant-folding"] += 1
+            elif value == 0:
+                stats["constant-folding"] += 1
+                continue
+            else:
+                known.pop(target, None)
+                if value is not None and not source.isdigit():
+                    # A known negative addend flips ADD and SUB
+                    if value < 0:
+                        op, value = ("SUB" if op == "ADD" else "ADD"), -value
+                    instr = _rewrite(instr, op, [target, str(value)])
+                    stats["constant-folding"] += 1
+        elif op == "PRINT" and target in known and _is_name(target) and known[target] >= 0:
+            instr = _rewrite(instr, op, [str(known[target])])
+            stats["constant-folding"] += 1
+        elif op in ("POP", "FREE"):
+            known.pop(target, None)
+        result.append(instr)
+    return result
+
+def propagate_copies(instructions, stats):
+    """ A fresh variable that only had another added to it is a copy of
+        it; reads of the copy read the original until either changes """
+    result = []
+    copies = {}    # copy -> original
+    zeroed = set()  # allocated and not changed since
+    fresh = _fresh_allocs(instructions)
+    for i, instr in enumerate(instructions):
+        op, args = instr.op, instr.args
+        if op not in STRAIGHT_LINE_OPS:
+            if op == "IF" and len(args) >= 3 and (args[0] in copies or args[2] in copies):
+                stats["copy-propagation"] += 1
+                instr = _rewrite(instr, op, [copies.get(args[0], args[0]), args[1],
+                                             copies.get(args[2], args[2]), *args[3:]])
+            copies.clear()
+            zeroed.clear()
+            result.append(instr)
+            continue
+        if not args:
+            result.append(instr)
+            continue
+        target = args[0]
+        if op in ARITHMETIC and len(args) == 2 and args[1] in copies:
+            instr = _rewrite(instr, op, [target, copies[args[1]]])
+            stats["copy-propagation"] += 1
+        elif op in ("PRINT", "PUSH") and target in copies:
+            instr = _rewrite(instr, op, [copies[target]])
+            stats["copy-propagation"] += 1
+            result.append(instr)
+            continue
+        elif op in ("PRINT", "PUSH", "LOAD"):
+            result.append(instr)
+            continue
+        # Everything below writes `target`
+        source = instr.args[1] if len(instr.args) > 1 else None
+        copied = op == "ADD" and target in zeroed and _is_name(source) and source != target
+        copies.pop(target, None)
+        for copy in [copy for copy, original in copies.items() if original == target]:
+            del copies[copy]
+        zeroed.discard(target)
+        if (op == "ALLOC" and i in fresh) or (op == "STORE" and source == "0"):
+            zeroed.add(target)
+        elif copied:
+            copies[target] = source
+        result.append(instr)
+    return result
+
+def eliminate_dead_stores(instructions, stats):
+    """ Drops STOREs overwritten before anything reads them, and ADD / SUB
+        into such variables. Walks each straight-line run backwards; at the
+        end of the top level nothing is read any more. """
+    depth = 0
+    for instr in instructions:
+        if instr.op in BLOCK_OPENERS:
+            depth += 1
+        elif instr.op == "END" and depth:
+            depth -= 1
+    live, dead = set(), set()
+    rest_dead = depth == 0
+    result = []
+    for instr in reversed(instructions):
+        op, args = instr.op, instr.args
+        if op not in STRAIGHT_LINE_OPS:
+            live.clear()
+            dead.clear()
+            rest_dead = False
+            result.append(instr)
+            continue
+        target = args[0] if args else None
+        is_dead = target in dead or (rest_dead and target not in live)
+        if op == "STORE" or (op in ARITHMETIC and _is_name(target)):
+            if is_dead:
+                stats["dead-stores"] += 1
+                continue
+            if op == "STORE":
+                dead.add(target)
+                live.discard(target)
+            else:
+                live.update(arg for arg in args if _is_name(arg))
+                dead.difference_update(args)
+        elif op not in ("ALLOC", "FREE"):
+            # ALLOC and FREE neither read nor overwrite the value (a freed
+            # variable still prints what was last stored in it). PRINT /
+            # PUSH / LOAD read their variable, and POP is treated
+            # the same: on an empty stack it leaves the old value in place
+            live.update(args)
+            dead.difference_update(args)
+        result.append(instr)
+    result.reverse()
+    return result
+
+def eliminate_unused_variables(instructions, stats):
+    """ Drops ALLOC, STORE, ADD, SUB and FREE of variables nothing ever
+        reads """
+    read = set()
+    for instr in instructions:
+        op, args = instr.op, instr.args
+        if op in ARITHMETIC:
+            read.update(args[1:])
+        elif op not in ("ALLOC", "STORE", "POP", "FREE"):
+            read.update(args)
+    result = []
+    for instr in instructions:
+        if (instr.op in ("ALLOC", "STORE", "FREE", *ARITHMETIC) and instr.args
+                and _is_name(instr.args[0]) and instr.args[0] not in read):
+            stats["unused-variables"] += 1
+            continue
+        result.append(instr)
+    return result
+
+# Ops whose arguments are not variables of the scope they appear in
+NON_VARIABLE_OPS = {"FUNC", "CALL", "PARALLEL", "WAIT", "LABEL", "JMP"}
+
+def _variable_refs(instr):
+    if instr.op in NON_VARIABLE_OPS:
+        return ()
+    return [arg for arg in instr.args if _is_name(arg) and '"' not in arg]
+
+def insert_frees(instructions, stats):
+    """ FREE after the last use of a variable ALLOCed once, outside any
+        block, in the program or in a FUNC body that runs at most once (a
+        FUNC run again would find its variable gone instead of holding its
+        last value). A use inside IF / WHILE / FOR counts at the block's
+        END, and a CALL or PARALLEL uses what the functions it runs use,
+        transitively. A FUNC's own variable is only freed when nothing
+        outside its body names it. Scopes with LABEL / JMP, and variables
+        freed by hand, are left alone. """
+    n = len(instructions)
+    scope_of = [None] * n       # FUNC name, None for the top level
+    refs = [()] * n
+    statement = list(range(n))  # start of the enclosing top statement
+    statement_end = list(range(n))
+    direct, callees, unstructured = {None: set()}, {None: set()}, set()
+    frames = [(None, [])]       # (scope, starts of its open blocks)
+    for i, instr in enumerate(instructions):
+        scope, open_blocks = frames[-1]
+        scope_of[i] = scope
+        if open_blocks:
+            statement[i] = open_blocks[0]
+        op = instr.op
+        if op == "FUNC" and instr.args:
+            open_blocks.append(i)
+            name = instr.args[0]
+            direct.setdefault(name, set())
+            callees.setdefault(name, set())
+            frames.append((name, []))
+            continue
+        if op in BLOCK_OPENERS:
+            open_blocks.append(i)
+        elif op == "END":
+            if not open_blocks and len(frames) > 1:
+                # Closes a FUNC body: the END belongs to the outer scope
+                frames.pop()
+                scope, open_blocks = frames[-1]
+                scope_of[i] = scope
+            if open_blocks:
+                start = open_blocks.pop()
+                if not open_blocks:
+                    statement_end[start] = i
+        elif op in ("LABEL", "JMP"):
+            unstructured.add(scope)
+        elif op in ("CALL", "PARALLEL"):
+            callees[scope].update(instr.args)
+        refs[i] = _variable_refs(instr)
+        direct[scope].update(refs[i])
+    for _, open_blocks in frames:
+        if open_blocks:
+            statement_end[open_blocks[0]] = n - 1
+
+    # What each function uses, through the functions it calls
+    uses = {name: set(names) for name, names in direct.items()}
+    changed = True
+    while changed:
+        changed = False
+        for name, called in callees.items():
+            for callee in called:
+                if callee in uses and not uses[callee] <= uses[name]:
+                    uses[name] |= uses[callee]
+                    changed = True
+
+    scopes_naming = Counter(name for names in direct.values() for name in names)
+    once = _runs_at_most_once(instructions)
+    allocs, freed = Counter(), set()
+    for instr in instructions:
+        if instr.op == "ALLOC" and instr.args:
+            allocs[instr.args[0]] += 1
+        elif instr.op == "FREE":
+            freed.update(instr.args)
+    last_use = {}   # (scope, variable) -> index of the statement ending its use
+    candidates = []
+    for i, instr in enumerate(instructions):
+        scope = scope_of[i]
+        if scope in unstructured:
+            continue
+        if instr.op in ("CALL", "PARALLEL"):
+            names = set().union(*(uses.get(callee, ()) for callee in instr.args))
+        else:
+            names = refs[i]
+        for name in names:
+            if (scope, name) in last_use:
+                last_use[scope, name] = max(last_use[scope, name], statement_end[statement[i]])
+        if instr.op == "ALLOC" and instr.args and statement[i] == i:
+            name = instr.args[0]
+            if allocs[name] == 1 and name not in freed and _is_name(name) and once[i]:
+                if scope is None or scopes_naming[name] == 1:
+                    last_use[scope, name] = i
+                    candidates.append((scope, name))
+    after = {}
+    for key in candidates:
+        after.setdefault(last_use[key], []).append(key[1])
+    if not after:
+        return list(instructions)
+    result = []
+    for i, instr in enumerate(instructions):
+        result.append(instr)
+        for name in after.get(i, ()):
+            result.append(_rewrite(instr, "FREE", [name]))
+            stats["free-insertion"] += 1
+    return result
+
+OPTIMIZER_PASSES = [
+    ("constant-folding", fold_constants),
+    ("copy-propagation", propagate_copies),
+    ("dead-stores", eliminate_dead_stores),
+    ("unused-variables", eliminate_unused_variables),
+]
+# Run once, after the fixed point
+FINISHING_PASSES = [
+    ("free-insertion", insert_frees),
+]
+
+class InstructionOptimizer:
+    """ Runs OPTIMIZER_PASSES to a fixed point, then FINISHING_PASSES once.
+        `stats` counts rewrites per pass; with `dump` set to a stream the
+        IR is written there after every pass. """
+
+    def __init__(self, passes=OPTIMIZER_PASSES, max_rounds=10, dump=None,
+                 finishing=FINISHING_PASSES):
+        self.passes = passes
+        self.finishing = finishing
+        self.max_rounds = max_rounds
+        self.dump = dump
+        self.stats = Counter()
+
+    def optimize(self, instructions):
+        instructions = list(instructions)
+        self.write_ir("input", instructions)
+        for round_ in range(1, self.max_rounds + 1):
+            fired = sum(self.stats.values())
+            for name, run in self.passes:
+                instructions = run(instructions, self.stats)
+                self.write_ir(f"{name}, round {round_}", instructions)
+            if sum(self.stats.values()) == fired:
+                break
+        for name, run in self.finishing:
+            instructions = run(instructions, self.stats)
+            self.write_ir(name, instructions)
+        return instructions
+
+    def write_ir(self, title, instructions):
+        if self.dump is None:
+            return
+        print(f"; --- {title}: {len(instructions)} instructions", file=self.dump)
+        for instr in instructions:
+            print(f"    {instr!r}", file=self.dump)
+
+def optimize_instructions(instructions, passes=OPTIMIZER_PASSES, dump=None,
+                          finishing=FINISHING_PASSES):
+    """ Optimized copy of `instructions` and the per-pass counts """
+    optimizer = InstructionOptimizer(passes, dump=dump, finishing=finishing)
+    return optimizer.optimize(instructions), optimizer.stats
+
+def _trace_symbol(interp, ins):
+    return "SYMBOL", f"{interp.program.names[ins.a]} := {interp.values[ins.a]}"
+
+# Trace event emitted after an opcode completes without deferring an error.
+# Only consulted when tracing is enabled.
+TRACE_EVENTS = {
+    "ALLOC": lambda interp, ins: (
+        "MEM_ALLOC", f"Allocating memory slot '{interp.program.names[ins.a]}'"),
+    "FREE": lambda interp, ins: (
+        "MEM_FREE", f"Freeing memory slot '{interp.program.names[ins.a]}'"),
+    "STORE": lambda interp, ins: (
+        "MEM_STORE", f"{interp.program.names[ins.a]} := {ins.b}"),
+    "LOAD": _trace_symbol,
+    "ADD": _trace_symbol,
+    "ADD_CONST": _trace_symbol,
+    "SUB": _trace_symbol,
+    "SUB_CONST": _trace_symbol,
+    "LOCK": lambda interp, ins: ("LOCK", f"'{interp.program.names[ins.a]}' locked"),
+    "UNLOCK": lambda interp, ins: ("LOCK", f"'{interp.program.names[ins.a]}' unlocked"),
+    "SET": _trace_symbol,
+    "POP": _trace_symbol,
+}
+
+# Handlers swapped in when other threads or processes may be running the
+# same store: ADD / SUB hold the destination's lock stripe for the
+# read-modify-write. An interpreter that runs alone skips the locking.
+ATOMIC_HANDLERS = {
+    "ADD": "op_add_atomic",
+    "ADD_CONST": "op_add_const_atomic",
+    "SUB": "op_sub_atomic",
+    "SUB_CONST": "op_sub_const_atomic",
+}
+
+# === Profiler ===
+import json
+
+# Modes for a Profiler attached to an interpreter or emulator:
+#   exact    - every opcode handler is wrapped (as tracing wraps them) to
+#              count and time it and charge the time to the FUNC call stack
+#              it ran under
+#   sampling - only CALL and PARALLEL are wrapped: a background thread looks
+#              at each running interpreter every `interval` seconds and
+#              charges the time since its last look to the opcode and call
+#              stack it finds there, cheap enough to leave on
+# CALL counts and PARALLEL timings are exact in both modes.
+PROFILE_EXACT = "exact"
+PROFILE_SAMPLING = "sampling"
+# Bottom frame of every call stack: code outside any FUNC
+PROFILE_ROOT = "<main>"
+
+class ProfileSession:
+    """ What one interpreter, or the sub-interpreter of one PARALLEL
+        thread, recorded. With `opcode_names` opcodes are numbers counted
+        in lists and named when merged, otherwise they are keyed by name;
+        stacks are tuples of FUNC names starting at PROFILE_ROOT. """
+
+    def __init__(self, profiler, owner=None, opcode_names=None, prefix=(PROFILE_ROOT,)):
+        self.profiler = profiler
+        self.owner = owner
+        self.opcode_names = opcode_names
+        self.prefix = prefix
+        if opcode_names is None:
+            self.counts = Counter()     # opcode -> executions (samples when sampling)
+            self.seconds = Counter()    # opcode -> seconds
+        else:
+            self.counts = [0] * len(opcode_names)
+            self.seconds = [0.0] * len(opcode_names)
+        self.stacks = Counter()     # call stack -> seconds
+        self.calls = Counter()      # FUNC name -> calls (and PARALLEL runs)
+        self.parallel = {}          # PARALLEL site -> [runs, seconds]
+        self.threads = {}           # (site, FUNC name) -> [runs, seconds, longest]
+        self.samples = 0
+        # Exact mode: the opcode running and when it started; an opcode's
+        # time runs until the next one is dispatched
+        self.current = [None, 0.0]
+        self.depth = -1             # call depth `stack` was worked out at
+        self.stack = prefix
+        self.stack_at = []          # stack at each call depth up to `depth`
+        self.since = 0.0            # when the time charged to `stack` began
+        self.running = 0
+        self.last_sample = None
+
+    def dispatching(self, opcode):
+        """ Exact mode: `opcode` starts now, ending the one before it """
+        now = self.profiler.clock()
+        self.finish_opcode(now)
+        self.current[0], self.current[1] = opcode, now
+        self.counts[opcode] += 1
+
+    def finish_opcode(self, now):
+        current = self.current
+        if current[0] is not None:
+            self.seconds[current[0]] += now - current[1]
+            current[0] = None
+
+    def charge(self, now):
+        """ Exact mode: the time since the last charge goes to `stack` """
+        self.stacks[self.stack] += now - self.since
+        self.since = now
+
+    def resume(self):
+        self.running += 1
+        if self.running == 1:
+            self.since = self.last_sample = self.profiler.clock()
+            self.profiler.activate(self)
+
+    def pause(self):
+        self.running -= 1
+        if self.running == 0:
+            self.profiler.deactivate(self)
+            if self.profiler.exact:
+                now = self.profiler.clock()
+                self.finish_opcode(now)
+                self.charge(now)
+
+    def sample(self, now):
+        """ Charge the time since the last sample to where the owner is now """
+        opcode, stack = self.owner.profile_position()
+        elapsed = now - self.last_sample
+        self.last_sample = now
+        if opcode is None:
+            return
+        self.samples += 1
+        self.counts[opcode] += 1
+        self.seconds[opcode] += elapsed
+        if stack is not None:
+            self.stacks[stack] += elapsed
+
+    def opcode_totals(self):
+        """ (name, count, seconds) for every opcode that ran """
+        if self.opcode_names is None:
+            counts = dict(self.counts)
+            return [(name, count, self.seconds[name]) for name, count in counts.items()]
+        return [(self.opcode_names[opcode], count, self.seconds[opcode])
+                for opcode, count in enumerate(self.counts) if count]
+
+    def record_parallel(self, site, seconds):
+        with self.profiler.lock:
+            entry = self.parallel.setdefault(site, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def record_thread(self, site, fname, seconds, stack=None):
+        """ Called from the thread that ran `fname`, or for the worker
+            process with the `stack` to charge its time to """
+        with self.profiler.lock:
+            entry = self.threads.setdefault((site, fname), [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            self.calls[fname] += 1
+            if stack is not None:
+                self.stacks[stack] += seconds
+
+    def absorb(self, other):
+        """ Add another session's tables into this one, naming its opcodes """
+        for name, count, seconds in other.opcode_totals():
+            self.counts[name] += count
+            self.seconds[name] += seconds
+        self.stacks.update(dict(other.stacks))
+        self.calls.update(dict(other.calls))
+        for site, (runs, seconds) in list(other.parallel.items()):
+            entry = self.parallel.setdefault(site, [0, 0.0])
+            entry[0] += runs
+            entry[1] += seconds
+        for key, (runs, seconds, longest) in list(other.threads.items()):
+            entry = self.threads.setdefault(key, [0, 0.0, 0.0])
+            entry[0] += runs
+            entry[1] += seconds
+            entry[2] = max(entry[2], longest)
+        self.samples += other.samples
+
+class Profiler:
+    """ Where SuperCodeX programs spend their time: per-opcode counts and
+        time, per-FUNC inclusive / exclusive time and calls, PARALLEL
+        thread timings, and collapsed call stacks for flame graphs. One
+        Profiler can be shared by several interpreters; PARALLEL threads
+        report into the interpreter's. """
+
+    def __init__(self, mode=PROFILE_EXACT, interval=0.005, clock=time.perf_counter):
+        if mode not in (PROFILE_EXACT, PROFILE_SAMPLING):
+            raise ValueError(f"Unknown profile mode '{mode}'")
+        self.mode = mode
+        self.interval = interval
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.totals = ProfileSession(self)
+        self.sessions = []          # open sessions, not yet merged
+        self.active = set()         # sessions executing right now
+        self.sampler = None
+        self.owner_maps = {}        # id(program) -> (program, FUNC owning each offset)
+
+    @property
+    def exact(self):
+        return self.mode == PROFILE_EXACT
+
+    def session(self, owner, opcode_names=None, prefix=(PROFILE_ROOT,)):
+        session = ProfileSession(self, owner, opcode_names, prefix)
+        with self.lock:
+            self.sessions.append(session)
+        return session
+
+    def merge(self, session):
+        """ Fold a finished session into the totals """
+        with self.lock:
+            if session in self.sessions:
+                self.sessions.remove(session)
+                self.active.discard(session)
+                self.totals.absorb(session)
+
+    def owners(self, program):
+        """ For each code offset, the FUNC whose body it is in (None outside) """
+        key = id(program)
+        entry = self.owner_maps.get(key)
+        if entry is None or entry[0] is not program or len(entry[1]) != len(program.code):
+            owners = [None] * len(program.code)
+            for name, (entry_pc, end) in program.functions.items():
+                owners[entry_pc:end] = [name] * (end - entry_pc)
+            entry = self.owner_maps[key] = (program, owners)
+        return entry[1]
+
+    # --- sampling ---
+    def activate(self, session):
+        with self.lock:
+            self.active.add(session)
+            if not self.exact and self.sampler is None:
+                self.sampler = threading.Thread(target=self.sample_loop, daemon=True,
+                                                name="scdx-profiler")
+                self.sampler.start()
+
+    def deactivate(self, session):
+        with self.lock:
+            self.active.discard(session)
+
+    def sample_loop(self):
+        """ Runs while any session is executing, then exits """
+        while True:
+            time.sleep(self.interval)
+            with self.lock:
+                if not self.active:
+                    self.sampler = None
+                    return
+                sessions = list(self.active)
+            now = self.clock()
+            for session in sessions:
+                session.sample(now)
+
+    # --- reports ---
+    def combined(self):
+        """ The totals plus every session still open """
+        combined = ProfileSession(self, opcode_names=None)
+        with self.lock:
+            sessions = list(self.sessions)
+            combined.absorb(self.totals)
+        for session in sessions:
+            combined.absorb(session)
+        return combined
+
+    def report(self):
+        """ The profile as a JSON-ready dict. Function time comes from the
+            call stacks: exclusive is time with the FUNC on top, inclusive
+            is time with it anywhere on the stack (once under recursion). """
+        data = self.combined()
+        inclusive, exclusive = Counter(), Counter()
+        for stack, seconds in data.stacks.items():
+            exclusive[stack[-1]] += seconds
+            for name in set(stack):
+                inclusive[name] += seconds
+        functions = {
+            name: {"calls": data.calls[name], "inclusive": inclusive[name],
+                   "exclusive": exclusive[name]}
+            for name in sorted((set(inclusive) | set(data.calls)) - {PROFILE_ROOT},
+                               key=lambda name: -inclusive[name])
+        }
+        opcodes = {
+            name: {"count": data.counts[name], "seconds": data.seconds[name]}
+            for name in sorted(data.counts, key=lambda name: -data.seconds[name])
+        }
+        parallel = []
+        for site, (runs, seconds) in sorted(data.parallel.items()):
+            threads = {fname: {"runs": t[0], "seconds": t[1], "longest": t[2]}
+                       for (where, fname), t in data.threads.items() if where == site}
+            parallel.append({"site": site, "runs": runs, "seconds": seconds, "threads": threads})
+        return {
+            "mode": self.mode,
+            "interval": self.interval if not self.exact else None,
+            "samples": data.samples,
+            "seconds": inclusive[PROFILE_ROOT],
+            "opcodes": opcodes,
+            "functions": functions,
+            "parallel": parallel,
+            "stacks": {";".join(stack): seconds for stack, seconds in
+                       sorted(data.stacks.items(), key=lambda item: -item[1])},
+        }
+
+    def write_json(self, path):
+        with open(path, "w") as file:
+            json.dump(self.report(), file, indent=2)
+
+    def collapsed_stacks(self):
+        """ "main;f;g <microseconds>" lines, the input flamegraph.pl and
+            speedscope take """
+        stacks = self.combined().stacks
+        return [f"{';'.join(stack)} {round(seconds * 1e6)}"
+                for stack, seconds in sorted(stacks.items()) if round(seconds * 1e6)]
+
+    def write_collapsed(self, path):
+        with open(path, "w") as file:
+            file.writelines(line + "\n" for line in self.collapsed_stacks())
+
+def as_profiler(profile):
+    """ Accept a Profiler, a profile mode name, or None for no profiling """
+    if profile is None or isinstance(profile, Profiler):
+        return profile
+    return Profiler(profile)
+
 # === Bytecode Interpreter / Emulator ===
+# Deepest CALL nesting before a call is refused; frames live in a list, so
+# this bounds memory rather than the Python stack
+MAX_CALL_DEPTH = 100_000
+
+# How PARALLEL runs its functions: threads in this process sharing the slot
+# store (the default), or a persistent pool of worker processes sharing a
+# SharedSlotStore, which lets CPU-bound functions use more than one core
+PARALLEL_THREADS = "threads"
+PARALLEL_PROCESSES = "processes"
+
 class BytecodeInterpreter:
-    def __init__(self, instructions, symbol_table=None, memory=None):
-        self.instructions = instructions
-        self.symbol_table = symbol_table or SymbolTable()
-        self.memory = memory or MemoryAllocator()
-        self.functions = {}
-        self.deferral = ErrorDeferralHandler()
+    def __init__(self, instructions, symbol_table=None, memory=None, store=None,
+                 trace=TRACE_VERBOSE, deferral=None, parallel=PARALLEL_THREADS,
+                 workers=None, capacity=None, concurrent=False, optimize=False,
+                 profile=None):
+        self.optimizations = Counter()
+        if isinstance(instructions, CompactProgram):
+            self.instructions = None
+            self.program = instructions
+        else:
+            if optimize:
+                instructions, self.optimizations = optimize_instructions(instructions)
+            self.instructions = instructions
+            self.program = lower_program(instructions)
+        if parallel not in (PARALLEL_THREADS, PARALLEL_PROCESSES):
+            raise ValueError(f"Unknown parallel mode '{parallel}'")
+        self.parallel = parallel
+        self.workers = workers
+        self.pool = None
+        self.parent = None
+        self.owns_store = store is None
+        if store is None:
+            if parallel == PARALLEL_PROCESSES:
+                store = SharedSlotStore(self.program.names, capacity)
+            else:
+                store = SlotStore(self.program.names)
+            self.seed(store, symbol_table, memory)
+        self.store = store
+        self.values = store.values
+        self.stripes = store.stripes
+        self.concurrent = concurrent
+        self.held = []
+        # Call frames: (return address, caller's end, lock scope mark)
+        self.frames = []
+        self.stack = []   # PUSH / POP values
+        self.functions = dict(self.program.functions)
+        self.trace = as_trace_sink(trace)
+        self.deferral = deferral or ErrorDeferralHandler(self.trace)
+        self.profiler = as_profiler(profile)
+        self.profile_session = (None if self.profiler is None else
+                                self.profiler.session(self, OPCODE_NAMES))
         self.instruction_pointer = 0
+        self.end = len(self.program.code)
+        self.dispatch = self.build_dispatch()
+
+    def build_dispatch(self):
+        """ Dispatch table indexed by opcode; trace and profile hooks are
+            only wrapped in when the sink is enabled / a profiler attached """
+        dispatch = [getattr(self, f"op_{name.lower()}") for name in OPCODE_NAMES]
+        if self.concurrent:
+            for name, handler in ATOMIC_HANDLERS.items():
+                dispatch[OPCODES[name]] = getattr(self, handler)
+        if self.trace.enabled:
+            for code, name in enumerate(OPCODE_NAMES):
+                if name in TRACE_EVENTS:
+                    dispatch[code] = self.traced(dispatch[code], TRACE_EVENTS[name])
+        if self.profile_session is not None:
+            dispatch = self.profiled(dispatch)
+        return dispatch
+
+    def traced(self, handler, event):
+        emit = self.trace.emit
+        errors = self.deferral.errors
+
+        def run(ins):
+            failures = len(errors)
+            handler(ins)
+            if len(errors) == failures:
+                emit(*event(self, ins))
+        return run
+
+    # --- profiling ---
+    def profiled(self, dispatch):
+        """ Count CALLs and time PARALLEL blocks; in exact mode also count
+            and time every handler """
+        call, parallel = OPCODES["CALL"], OPCODES["PARALLEL"]
+        dispatch[call] = self.counted_call(dispatch[call])
+        dispatch[parallel] = self.timed_parallel(dispatch[parallel])
+        if self.profiler.exact:
+            dispatch = [self.timed(handler, code) for code, handler in enumerate(dispatch)]
+        return dispatch
+
+    def timed(self, handler, code):
+        """ Count the opcode and start its clock, which the next dispatch
+            stops; one clock read per instruction """
+        session = self.profile_session
+        clock = self.profiler.clock
+        counts, seconds, current = session.counts, session.seconds, session.current
+        frames = self.frames
+
+        def run(ins):
+            now = clock()
+            if current[0] is not None:
+                seconds[current[0]] += now - current[1]
+            current[0] = code
+            current[1] = now
+            counts[code] += 1
+            if len(frames) != session.depth:
+                # A CALL or return since the last instruction
+                self.restack(now)
+            handler(ins)
+        return run
+
+    def restack(self, now):
+        """ Charge the time since the last CALL / return to the stack it ran
+            under and move to the current one. Stacks are kept per depth:
+            a CALL extends the caller's, a return goes back to one. """
+        session = self.profile_session
+        session.charge(now)
+        depth = len(self.frames)
+        known = session.stack_at
+        if depth < len(known) and known[depth] is not None:
+            del known[depth + 1:]
+        elif depth == len(known) and depth and known[-1] is not None:
+            owners = self.profiler.owners(self.program)
+            pc = self.instruction_pointer
+            name = owners[pc] if pc < len(owners) else None
+            known.append(known[-1] if name is None else known[-1] + (name,))
+        else:
+            del known[depth:]
+            known += [None] * (depth - len(known))
+            known.append(self.call_stack())
+        session.depth = depth
+        session.stack = known[depth]
+
+    def counted_call(self, handler):
+        calls, frames = self.profile_session.calls, self.frames
+
+        def run(ins):
+            depth = len(frames)
+            handler(ins)
+            if len(frames) > depth:
+                calls[ins.a] += 1
+        return run
+
+    def timed_parallel(self, handler):
+        session, clock = self.profile_session, self.profiler.clock
+        exact = self.profiler.exact
+
+        def run(ins):
+            start = clock()
+            if exact:
+                session.charge(start)
+            handler(ins)
+            end = clock()
+            if exact:
+                # The wait is the threads' time, charged to their own stacks
+                session.since = end
+            session.record_parallel(self.instruction_pointer, end - start)
+        return run
+
+    def call_stack(self):
+        """ FUNC names from PROFILE_ROOT in to the instruction about to
+            run: the FUNC around each CALL site on the frame stack, then
+            the one around the instruction pointer """
+        owners = self.profiler.owners(self.program)
+        stack = list(self.profile_session.prefix)
+        sites = [return_address - 1 for return_address, _, _ in list(self.frames)]
+        for pc in sites + [self.instruction_pointer]:
+            name = owners[pc] if 0 <= pc < len(owners) else None
+            if name is not None:
+                stack.append(name)
+        return tuple(stack)
+
+    def profile_position(self):
+        """ The opcode about to run and its call stack, for the sampling
+            thread; no stack for a PARALLEL, whose threads are sampled """
+        pc, code = self.instruction_pointer, self.program.code
+        if pc >= min(self.end, len(code)):
+            return None, None
+        opcode = code[pc].opcode
+        if opcode == OPCODES["PARALLEL"]:
+            return opcode, None
+        return opcode, self.call_stack()
+
+    def seed(self, store, symbol_table, memory):
+        """ Copy initial values from a SymbolTable / MemoryAllocator into slots """
+        sources = []
+        if symbol_table is not None:
+            sources.append((symbol_table.variables, False))
+        if memory is not None:
+            sources.append((memory.memory, True))
+        for variables, allocated in sources:
+            for name in variables:
+                self.program.slot(name)
+            store.grow()
+            for name, value in variables.items():
+                slot = self.program.slots[name]
+                store.values[slot] = value
+                if allocated and not store.allocated[slot]:
+                    store.allocated[slot] = 1
+                    store.addresses[slot] = store.heap.allocate(SLOT_SIZE)
+
+    def execute(self, floor=0):
+        """ Run until the current span ends with no more than `floor`
+            call frames outstanding. CALL and return only move the
+            instruction pointer and span end, so deep and recursive call
+            chains never grow the Python stack. """
+        code = self.program.code
+        dispatch = self.dispatch
+        frames = self.frames
+        session = self.profile_session
+        if session is not None:
+            session.resume()
+        try:
+            while True:
+                while self.instruction_pointer < self.end:
+                    ins = code[self.instruction_pointer]
+                    dispatch[ins.opcode](ins)
+                    self.instruction_pointer += 1
+                if len(frames) <= floor:
+                    break
+                self.instruction_pointer, self.end, mark = frames.pop()
+                if len(self.held) > mark:
+                    self.release_held(mark)
+        except Exception:
+            # Surface the buffered trace leading up to the failure
+            self.trace.flush()
+            raise
+        finally:
+            if session is not None:
+                session.pause()
 
-    def execute(self):
-        while self.instruction_pointer < len(self.instructions):
-            instr = self.instructions[self.instruction_pointer]
-            self.run_instruction(instr)
+    def run_instruction(self, instr: Instruction):
+        ins = lower_instruction(instr, self.program)
+        self.store.grow()
+        if ins.opcode == OPCODES["FUNC"]:
+            ins.b = find_block_end(self.program.code, self.instruction_pointer, self.end)
+        depth = len(self.frames)
+        pc, end = self.instruction_pointer, self.end
+        self.dispatch[ins.opcode](ins)
+        if len(self.frames) > depth:
+            # A CALL: run the body to completion, returning into an empty
+            # span so execution stops there
+            self.frames[depth] = (pc + 1, pc + 1, self.frames[depth][2])
             self.instruction_pointer += 1
+            self.execute(depth)
+            self.instruction_pointer, self.end = pc, end
 
-    def run_instruction(self, instr: Instruction):
-        op = instr.op
-        args = instr.args
+    def variables(self):
+        """ Current values by variable name (debugging / dumps) """
+        return self.store.dump()
+
+    # --- opcode handlers ---
+    def op_nop(self, ins):
+        pass
 
-        if op == "PRINT":
-            val = self.resolve(args[0])
-            print(f"[OUTPUT]: {val}")
+    def op_print(self, ins):
+        print(f"[OUTPUT]: {self.values[ins.a]}")
 
-        elif op == "ALLOC":
-            self.deferral.handle(self.memory.alloc, args[0])
+    def op_print_const(self, ins):
+        print(f"[OUTPUT]: {ins.a}")
 
-        elif op == "STORE":
-            self.deferral.handle(self.memory.store, args[0], int(args[1]))
-
-        elif op == "LOAD":
-            value = self.memory.load(args[0])
-            self.symbol_table.set(args[0], value)
-
-        elif op == "ADD":
-            a = self.resolve(args[0])
-            b = self.resolve(args[1])
-            result = a + b
-            self.symbol_table.set(args[0], result)
-
-        elif op == "SUB":
-            a = self.resolve(args[0])
-            b = self.resolve(args[1])
-            result = a - b
-            self.symbol_table.set(args[0], result)
-
-        elif op == "FUNC":
-            fname = args[0]
-            self.functions[fname] = self.collect_block("END")
-
-        elif op == "CALL":
-            fname = args[0]
+    def op_alloc(self, ins):
+        self.deferral.handle(self.alloc_slot, ins.a)
+
+    def op_free(self, ins):
+        self.deferral.handle(self.free_slot, ins.a)
+
+    def op_store(self, ins):
+        self.deferral.handle(self.store_slot, ins.a, ins.b)
+
+    def op_load(self, ins):
+        # Variables and memory slots share one store, so LOAD has nothing to copy
+        pass
+
+    def op_add(self, ins):
+        values = self.values
+        values[ins.a] += values[ins.b]
+
+    def op_add_const(self, ins):
+        self.values[ins.a] += ins.b
+
+    def op_sub(self, ins):
+        values = self.values
+        values[ins.a] -= values[ins.b]
+
+    def op_sub_const(self, ins):
+        self.values[ins.a] -= ins.b
+
+    def op_add_atomic(self, ins):
+        values = self.values
+        with self.stripes[ins.a % LOCK_STRIPES]:
+            values[ins.a] += values[ins.b]
+
+    def op_add_const_atomic(self, ins):
+        with self.stripes[ins.a % LOCK_STRIPES]:
+            self.values[ins.a] += ins.b
+
+    def op_sub_atomic(self, ins):
+        values = self.values
+        with self.stripes[ins.a % LOCK_STRIPES]:
+            values[ins.a] -= values[ins.b]
+
+    def op_sub_const_atomic(self, ins):
+        with self.stripes[ins.a % LOCK_STRIPES]:
+            self.values[ins.a] -= ins.b
+
+    def op_lock(self, ins):
+        self.store.mutex(ins.a).acquire()
+        self.held.append(ins.a)
+
+    def op_unlock(self, ins):
+        self.deferral.handle(self.unlock_slot, ins.a)
+
+    def op_func(self, ins):
+        self.functions[ins.a] = (self.instruction_pointer + 1, ins.b)
+        self.instruction_pointer = ins.b
+
+    def op_call(self, ins):
+        span = self.functions.get(ins.a)
+        if span is None:
+            print(f"[ERROR] Function '{ins.a}' not found.")
+        elif len(self.frames) >= MAX_CALL_DEPTH:
+            self.deferral.handle(self.call_overflow, ins.a)
+        else:
+            self.frames.append((self.instruction_pointer + 1, self.end, len(self.held)))
+            self.instruction_pointer = span[0] - 1
+            self.end = span[1]
+
+    def call_overflow(self, fname):
+        raise Exception(f"Call depth {MAX_CALL_DEPTH} exceeded calling '{fname}'.")
+
+    def op_parallel(self, ins):
+        if self.parallel == PARALLEL_PROCESSES:
+            self.run_in_processes(ins.a)
+            return
+        threads = []
+        for fname in ins.a:
             if fname in self.functions:
-                fn_instrs = self.functions[fname]
-                sub = BytecodeInterpreter(fn_instrs, self.symbol_table, self.memory)
-                sub.execute()
-            else:
-                print(f"[ERROR] Function '{fname}' not found.")
-
-        elif op == "PARALLEL":
-            fnames = args
-            threads = []
-            for fname in fnames:
-                if fname in self.functions:
-                    t = threading.Thread(target=self.run_function, args=(fname,))
-                    t.start()
-                    threads.append(t)
-            for t in threads:
-                t.join()
-
-        elif op == "WAIT":
-            seconds = int(args[0])
-            print(f"[WAIT] Pausing {seconds} sec...")
-            time.sleep(seconds)
-
-    def collect_block(self, end_op):
-        block = []
-        self.instruction_pointer += 1
-        while self.instruction_pointer < len(self.instructions):
-            instr = self.instructions[self.instruction_pointer]
-            if instr.op == end_op:
-                break
-            block.append(instr)
-            self.instruction_pointer += 1
-        return block
+                t = threading.Thread(target=self.run_function, args=(fname,))
+                t.start()
+                threads.append(t)
+        for t in threads:
+            t.join()
+
+    def op_jump(self, ins):
+        self.instruction_pointer = ins.a
+
+    def op_branch(self, ins):
+        test, left, right = ins.b
+        values = self.values
+        if test(values[left], values[right]):
+            self.instruction_pointer = ins.a
+
+    def op_branch_const(self, ins):
+        test, left, right = ins.b
+        if test(self.values[left], right):
+            self.instruction_pointer = ins.a
+
+    def op_set(self, ins):
+        self.values[ins.a] = ins.b
+
+    def op_push(self, ins):
+        self.stack.append(self.values[ins.a])
+
+    def op_pop(self, ins):
+        self.deferral.handle(self.pop_slot, ins.a)
+
+    def pop_slot(self, slot):
+        if not self.stack:
+            raise Exception(f"POP '{self.program.names[slot]}' from an empty stack.")
+        self.values[slot] = self.stack.pop()
+
+    def op_wait(self, ins):
+        self.trace.emit("WAIT", f"Pausing {ins.a} sec...")
+        time.sleep(ins.a)
+
+    def run_span(self, start, end, concurrent=None):
+        """ Run code[start:end] of the shared program in a sub-interpreter;
+            locks the span takes and does not release end with it """
+        sub = type(self)(self.program, store=self.store,
+                         trace=self.trace, deferral=self.deferral,
+                         parallel=self.parallel,
+                         concurrent=self.concurrent if concurrent is None else concurrent,
+                         profile=self.profiler)
+        sub.parent = self
+        sub.functions = self.functions
+        sub.instruction_pointer = start
+        sub.end = end
+        if sub.profile_session is not None:
+            sub.profile_session.prefix = sub.profile_session.stack = self.call_stack()
+        try:
+            sub.execute()
+        finally:
+            sub.release_held()
+            if sub.profile_session is not None:
+                self.profiler.merge(sub.profile_session)
 
     def run_function(self, fname):
-        fn_instrs = self.functions[fname]
-        print(f"[THREAD] Executing '{fname}'")
-        sub = BytecodeInterpreter(fn_instrs, self.symbol_table, self.memory)
-        sub.execute()
+        self.trace.emit("THREAD", f"Executing '{fname}'")
+        if self.profile_session is None:
+            self.run_span(*self.functions[fname], concurrent=True)
+            return
+        site, start = self.instruction_pointer, self.profiler.clock()
+        self.run_span(*self.functions[fname], concurrent=True)
+        self.profile_session.record_thread(site, fname, self.profiler.clock() - start)
+
+    def unlock_slot(self, slot):
+        if slot not in self.held:
+            raise Exception(f"Lock '{self.program.names[slot]}' not held.")
+        self.held.remove(slot)
+        self.store.mutex(slot).release()
+
+    def release_held(self, mark=0):
+        """ Release locks taken since the scope that began at `mark` """
+        while len(self.held) > mark:
+            slot = self.held.pop()
+            self.trace.emit("LOCK", f"'{self.program.names[slot]}' released at end of scope")
+            self.store.mutex(slot).release()
+
+    def process_pool(self):
+        """ Worker pool for PARALLEL_PROCESSES, started on first use and
+            shared with every sub-interpreter """
+        if self.parent is not None:
+            return self.parent.process_pool()
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(
+                self.workers, initializer=_start_parallel_worker,
+                initargs=(self.program, self.store.name, self.store.capacity,
+                          self.store.locks, self.trace.level))
+        return self.pool
+
+    def run_in_processes(self, names):
+        pool = self.process_pool()
+        pending = []
+        session = self.profile_session
+        clock = time.perf_counter if session is None else self.profiler.clock
+        for fname in names:
+            if fname in self.functions:
+                self.trace.emit("PROCESS", f"Executing '{fname}'")
+                start, end = self.functions[fname]
+                submitted = clock()
+                pending.append((fname, submitted,
+                                pool.submit(_run_parallel_span, start, end, self.functions)))
+        for fname, submitted, future in pending:
+            errors, events = future.result()
+            if session is not None:
+                # Workers are not profiled: the round trip stands in for them
+                session.record_thread(self.instruction_pointer, fname,
+                                      clock() - submitted,
+                                      self.call_stack() + (fname,))
+            for error in errors:
+                # Already emitted by the worker's own sink
+                self.deferral.errors.append(error)
+            self.trace.events.extend(events)
+
+    def close(self):
+        """ Stop the worker pool and free a shared store this interpreter made """
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        if self.owns_store and isinstance(self.store, SharedSlotStore):
+            self.values = None
+            self.store.close()
+        if self.profile_session is not None:
+            self.profiler.merge(self.profile_session)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def alloc_slot(self, slot):
+        store = self.store
+        if store.allocated[slot]:
+            raise Exception(f"Memory '{self.program.names[slot]}' already allocated.")
+        store.allocated[slot] = 1
+        self.values[slot] = 0
+        with store.heap_lock:
+            store.addresses[slot] = store.heap.allocate(SLOT_SIZE)
+
+    def free_slot(self, slot):
+        # The value stays readable for dumps; only the memory goes back
+        store = self.store
+        if not store.allocated[slot]:
+            raise Exception(f"Memory '{self.program.names[slot]}' not allocated.")
+        store.allocated[slot] = 0
+        with store.heap_lock:
+            address = store.addresses.pop(slot, None)
+            if address is not None:
+                store.heap.free(address)
+
+    def store_slot(self, slot, value):
+        if not self.store.allocated[slot]:
+            raise Exception(f"Memory '{self.program.names[slot]}' not allocated.")
+        self.values[slot] = value
+
+    def lookup(self, name):
+        slot = self.program.slots.get(name)
+        return 0 if slot is None else self.values[slot]
 
     def resolve(self, arg):
         if arg.isdigit():
             return int(arg)
-        if arg in self.memory.memory:
-            return self.memory.load(arg)
-        return self.symbol_table.get(arg)
+        return self.lookup(arg)
+
+# --- PARALLEL_PROCESSES workers ---
+from concurrent.futures import ProcessPoolExecutor
+
+_worker_program = None
+_worker_store = None
+_worker_trace = TRACE_OFF
+
+def _start_parallel_worker(program, store_name, capacity, locks, trace_level):
+    # Each worker unpickles the program once and attaches to the store
+    global _worker_program, _worker_store, _worker_trace
+    _worker_program = program
+    _worker_store = SharedSlotStore(program.names, capacity, name=store_name, locks=locks)
+    _worker_trace = trace_level
+
+def _run_parallel_span(start, end, functions):
+    """ Run one PARALLEL function in a worker; the deferred errors and any
+        buffered trace events go back to the parent """
+    sink = TraceSink(_worker_trace)
+    interpreter = BytecodeInterpreter(_worker_program, store=_worker_store, trace=sink,
+                                      concurrent=True)
+    interpreter.functions = functions
+    interpreter.instruction_pointer = start
+    interpreter.end = end
+    try:
+        interpreter.execute()
+    finally:
+        interpreter.release_held()
+    return interpreter.deferral.errors, sink.dump()
 
 # === Sample Program ===
 def sample_program():
@@ -703,7 +2569,203 @@ if __name__ == "__main__":
     sample_program()
 
 import json
+import mmap
+import os
 import struct
+from array import array
+
+# === .scxbin Container ===
+# v1: native u32 byte length followed by a JSON list of {"op", "args"} dicts.
+# v2: little-endian binary container, each section 8-byte aligned:
+#   header        magic "SCXB", u16 version, u16 flags, then u32 counts of
+#                 instructions, operands, constants, strings and string bytes
+#   instructions  3 x u32 per instruction: op (string index), argc, index of
+#                 the first operand
+#   operands      u32 per operand: constant pool index with the top bit set,
+#                 otherwise a string table index
+#   constants     i64 per pooled integer
+#   strings       u32 offsets (count + 1) followed by the UTF-8 blob
+SCXBIN_MAGIC = b"SCXB"
+SCXBIN_VERSION = 2
+SCXBIN_HEADER = struct.Struct("<4sHHIIIII")
+SCXBIN_INSTRUCTION = struct.Struct("<III")
+SCXBIN_CONST_FLAG = 0x80000000
+
+def _align8(n):
+    return (n + 7) & ~7
+
+def _le_bytes(values):
+    """ Little-endian bytes of an array, padded to an 8-byte boundary """
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    data = values.tobytes()
+    return data + bytes(_align8(len(data)) - len(data))
+
+def _le_view(view, typecode):
+    """ Cast a little-endian section in place (copied only on big-endian hosts) """
+    if sys.byteorder == "little":
+        return view.cast(typecode)
+    values = array(typecode, view.tobytes())
+    values.byteswap()
+    return values
+
+def save_scxbin(bytecode, file_path, version=SCXBIN_VERSION):
+    """ Serialize an iterable of {"op", "args"} dicts to a .scxbin file """
+    if version == 1:
+        bytecode_bytes = json.dumps(list(bytecode)).encode('utf-8')
+        with open(file_path, 'wb') as f:
+            f.write(struct.pack('I', len(bytecode_bytes)))
+            f.write(bytecode_bytes)
+        return
+    if version != SCXBIN_VERSION:
+        raise ValueError(f"Unsupported .scxbin version {version}")
+    with open(file_path, 'wb') as f:
+        for part in encode_scxbin(bytecode):
+            f.write(part)
+
+def encode_scxbin(bytecode):
+    """ v2 image of an iterable of {"op", "args"} dicts, as a list of byte strings """
+    strings, constants = {}, {}
+    instructions, operands = array('I'), array('I')
+    for instruction in bytecode:
+        args = instruction['args']
+        instructions.append(strings.setdefault(instruction['op'], len(strings)))
+        instructions.append(len(args))
+        instructions.append(len(operands))
+        for arg in args:
+            if isinstance(arg, str):
+                operands.append(strings.setdefault(arg, len(strings)))
+            elif isinstance(arg, int) and not isinstance(arg, bool):
+                operands.append(SCXBIN_CONST_FLAG | constants.setdefault(arg, len(constants)))
+            else:
+                raise TypeError(f"Cannot store {type(arg).__name__} operand in .scxbin v2; "
+                                f"save with version=1")
+
+    encoded = [text.encode('utf-8') for text in strings]
+    offsets = array('I', [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    blob = b"".join(encoded)
+
+    header = SCXBIN_HEADER.pack(SCXBIN_MAGIC, SCXBIN_VERSION, 0, len(instructions) // 3,
+                                len(operands), len(constants), len(strings), len(blob))
+    return [header + bytes(_align8(len(header)) - len(header)),
+            _le_bytes(instructions), _le_bytes(operands),
+            _le_bytes(array('q', constants)), _le_bytes(offsets), blob]
+
+class ScxBinProgram:
+    """ Read-only view over a v2 .scxbin image, either a memory-mapped file
+        or an in-memory buffer. Sections are used in place and instructions
+        are decoded only when accessed. """
+
+    def __init__(self, source):
+        if isinstance(source, (str, os.PathLike)):
+            file_path = source
+            with open(file_path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(self._mmap)
+        else:
+            file_path = "<buffer>"
+            self._mmap = None
+            view = memoryview(source)
+        if len(view) < SCXBIN_HEADER.size:
+            raise ValueError(f"{file_path}: truncated .scxbin header")
+        (magic, version, _flags, count, n_operands,
+         n_constants, n_strings, n_bytes) = SCXBIN_HEADER.unpack_from(view)
+        if magic != SCXBIN_MAGIC:
+            raise ValueError(f"{file_path}: not a .scxbin v2 file")
+        if version != SCXBIN_VERSION:
+            raise ValueError(f"{file_path}: unsupported .scxbin version {version}")
+
+        sections = []
+        offset = _align8(SCXBIN_HEADER.size)
+        for size in (count * SCXBIN_INSTRUCTION.size, n_operands * 4,
+                     n_constants * 8, (n_strings + 1) * 4, n_bytes):
+            sections.append(view[offset:offset + size])
+            offset += _align8(size)
+        if offset - _align8(n_bytes) + n_bytes > len(view):
+            raise ValueError(f"{file_path}: truncated .scxbin body")
+
+        self.version = version
+        self._view = view
+        self._raw = sections[0]
+        self._records = _le_view(sections[0], 'I')
+        self._operands = _le_view(sections[1], 'I')
+        self._constants = _le_view(sections[2], 'q')
+        self._offsets = _le_view(sections[3], 'I')
+        self._blob = sections[4]
+        self._strings = [None] * n_strings
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def string(self, index):
+        text = self._strings[index]
+        if text is None:
+            text = self._strings[index] = str(
+                self._blob[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+        return text
+
+    def operand(self, ref):
+        if ref & SCXBIN_CONST_FLAG:
+            return self._constants[ref & ~SCXBIN_CONST_FLAG]
+        return self.string(ref)
+
+    def decode(self, op_index, argc, first):
+        operand = self.operand
+        return self.string(op_index), [operand(ref) for ref in
+                                       self._operands[first:first + argc]]
+
+    def iter_raw(self):
+        """ (op string index, argc, first operand index) tuples, undecoded """
+        return struct.iter_unpack(SCXBIN_INSTRUCTION.format, self._raw)
+
+    def ops(self):
+        """ (op, args) pairs decoded one at a time """
+        decode = self.decode
+        records = self._records
+        for base in range(0, self._count * 3, 3):
+            yield decode(records[base], records[base + 1], records[base + 2])
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("instruction index out of range")
+        base = index * 3
+        op, args = self.decode(*self._records[base:base + 3])
+        return {'op': op, 'args': args}
+
+    def __iter__(self):
+        for op, args in self.ops():
+            yield {'op': op, 'args': args}
+
+    def close(self):
+        for name in ("_raw", "_records", "_operands", "_constants", "_offsets", "_blob", "_view"):
+            section = getattr(self, name)
+            if isinstance(section, memoryview):
+                section.release()
+        if self._mmap is not None:
+            self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def load_scxbin(file_path):
+    """ Load a .scxbin file: v2 files are mapped lazily as a ScxBinProgram,
+        v1 files are decoded to a list of dicts """
+    with open(file_path, 'rb') as f:
+        head = f.read(4)
+        if head == SCXBIN_MAGIC:
+            return ScxBinProgram(file_path)
+        size = struct.unpack('I', head)[0]
+        bytecode = f.read(size)
+    return json.loads(bytecode.decode('utf-8'))
 
 class SuperCodeXEmulator:
     def __init__(self):
@@ -711,11 +2773,7 @@ class SuperCodeXEmulator:
         self.registers = {'rax': 0, 'rbx': 0, 'rcx': 0, 'rdx': 0}  # Simplified registers
 
     def load_bytecode(self, file_path):
-        with open(file_path, 'rb') as f:
-            size = struct.unpack('I', f.read(4))[0]
-            bytecode = f.read(size)
-        instructions_data = json.loads(bytecode.decode('utf-8'))
-        return instructions_data
+        return load_scxbin(file_path)
 
     def execute(self, instructions_data):
         for instruction in instructions_data:
@@ -748,25 +2806,163 @@ class SuperCodeXEmulator:
                 print(f"Unknown instruction: {op}")
 
 # Usage example
-emulator = SuperCodeXEmulator()
-bytecode = emulator.load_bytecode("/mnt/data/sample.scxbin")
-emulator.execute(bytecode)
+if __name__ == "__main__":
+    emulator = SuperCodeXEmulator()
+    bytecode = emulator.load_bytecode("/mnt/data/sample.scxbin")
+    emulator.execute(bytecode)
+
+# === Event Pattern Index ===
+# Hook names are dot-separated ("sensor.rack4.temp"). In a subscription,
+# "*" matches exactly one segment and "**" matches any number of segments,
+# including none. A "*" inside a segment matches any run of characters in
+# that one segment: "temp*" matches "temp" and "tempHigh". Wildcard
+# patterns live in a segment trie, so matching an event walks at most a few
+# branches per segment no matter how many patterns are registered; results
+# are memoized per event name.
+PATTERN_SEPARATOR = "."
+WILDCARD_ONE = "*"
+WILDCARD_ANY = "**"
+MATCH_CACHE_SIZE = 65536
+
+def is_pattern(name):
+    return WILDCARD_ONE in name
+
+def segment_matcher(segment):
+    """ Match function for a segment with "*" among other characters """
+    parts = segment.split(WILDCARD_ONE)
+    return re.compile(".*".join(map(re.escape, parts)), re.DOTALL).fullmatch
+
+class PatternNode:
+    __slots__ = ("children", "globs", "values")
+
+    def __init__(self):
+        self.children = {}
+        self.globs = []    # (match, child) for children like "temp*"
+        self.values = []   # (sequence, value) for patterns ending here
+
+class PatternIndex:
+    def __init__(self):
+        self.root = PatternNode()
+        self.sequence = 0
+        self.count = 0
+        self.cache = {}
+
+    def __len__(self):
+        return self.count
+
+    def add(self, pattern, value):
+        node = self.root
+        for segment in pattern.split(PATTERN_SEPARATOR):
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = PatternNode()
+                if WILDCARD_ONE in segment and segment not in (WILDCARD_ONE, WILDCARD_ANY):
+                    node.globs.append((segment_matcher(segment), child))
+            node = child
+        node.values.append((self.sequence, value))
+        self.sequence += 1
+        self.count += 1
+        self.cache.clear()
+
+    def remove(self, pattern, value):
+        node = self.root
+        for segment in pattern.split(PATTERN_SEPARATOR):
+            node = node.children.get(segment)
+            if node is None:
+                return False
+        for index, (_, existing) in enumerate(node.values):
+            if existing == value:
+                del node.values[index]
+                self.count -= 1
+                self.cache.clear()
+                return True
+        return False
+
+    def match(self, name):
+        """ Values of every pattern matching `name`, in registration order """
+        found = self.cache.get(name)
+        if found is None:
+            found = self.walk(name.split(PATTERN_SEPARATOR))
+            if len(self.cache) >= MATCH_CACHE_SIZE:
+                self.cache.clear()
+            self.cache[name] = found
+        return found
+
+    def walk(self, segments):
+        last = len(segments)
+        matched = []
+        seen = None
+        stack = [(self.root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            children = node.children
+            if seen is not None:
+                # "**" lets several paths reach the same (node, depth)
+                key = (id(node), depth)
+                if key in seen:
+                    continue
+                seen.add(key)
+            if WILDCARD_ANY in children:
+                if seen is None:
+                    seen = set()
+                globstar = children[WILDCARD_ANY]
+                stack.extend((globstar, rest) for rest in range(depth, last + 1))
+            if depth == last:
+                matched.extend(node.values)
+                continue
+            child = children.get(segments[depth])
+            if child is not None:
+                stack.append((child, depth + 1))
+            star = children.get(WILDCARD_ONE)
+            if star is not None:
+                stack.append((star, depth + 1))
+            for match, glob in node.globs:
+                if match(segments[depth]):
+                    stack.append((glob, depth + 1))
+        if len(matched) > 1:
+            matched.sort()
+        return tuple(value for _, value in matched)
 
 class StreamSplicerEngine:
     def __init__(self):
         self.hooks = {}
+        self.patterns = PatternIndex()
+        self.version = 0
 
     def add_hook(self, event, callback):
-        """ Attach a callback function to a specific event """
-        if event not in self.hooks:
-            self.hooks[event] = []
-        self.hooks[event].append(callback)
+        """ Attach a callback function to a specific event, or to every
+            event matching a wildcard pattern such as "sensor.*.temp" """
+        if is_pattern(event):
+            self.patterns.add(event, callback)
+        else:
+            if event not in self.hooks:
+                self.hooks[event] = []
+            self.hooks[event].append(callback)
+        self.version += 1
+
+    def remove_hook(self, event, callback):
+        if is_pattern(event):
+            removed = self.patterns.remove(event, callback)
+        else:
+            callbacks = self.hooks.get(event, [])
+            removed = callback in callbacks
+            if removed:
+                callbacks.remove(callback)
+        self.version += 1
+        return removed
+
+    def hooks_for(self, event):
+        """ Exact-name hooks first, then pattern hooks in registration order """
+        exact = self.hooks.get(event, ())
+        if not self.patterns.count:
+            return exact
+        matched = self.patterns.match(event)
+        return [*exact, *matched] if exact else matched
 
     def trigger_hook(self, event):
         """ Trigger all hooks for a specific event """
-        if event in self.hooks:
-            for callback in self.hooks[event]:
-                callback()
+        for callback in self.hooks_for(event):
+            callback()
 
 # Example: Defining some hooks and their triggers
 def check_temp():
@@ -775,16 +2971,264 @@ def check_temp():
 def throttle_network():
     print("Network traffic peak! Throttling bandwidth...")
 
-# Setup Stream Splicer
-splicer = StreamSplicerEngine()
+if __name__ == "__main__":
+    # Setup Stream Splicer
+    splicer = StreamSplicerEngine()
+
+    # Add hooks for events
+    splicer.add_hook("tempThresholdReached", check_temp)
+    splicer.add_hook("networkTrafficHigh", throttle_network)
 
-# Add hooks for events
-splicer.add_hook("tempThresholdReached", check_temp)
-splicer.add_hook("networkTrafficHigh", throttle_network)
+    # Simulate event triggers
+    splicer.trigger_hook("tempThresholdReached")
+    splicer.trigger_hook("networkTrafficHigh")
 
-# Simulate event triggers
-splicer.trigger_hook("tempThresholdReached")
-splicer.trigger_hook("networkTrafficHigh")
+# === Async Event Bus ===
+import asyncio
+import inspect
+
+# What publish does when an event's queue is full
+OVERFLOW_BLOCK = "block"              # wait for the dispatcher to make room
+OVERFLOW_DROP_OLDEST = "drop_oldest"  # discard the oldest pending trigger
+OVERFLOW_COALESCE = "coalesce"        # the new trigger replaces the newest pending one
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_COALESCE)
+
+LATENCY_SAMPLES = 4096
+
+class EventMetrics:
+    __slots__ = ("published", "delivered", "dropped", "coalesced", "max_depth",
+                 "latencies", "max_latency")
+
+    def __init__(self):
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)  # most recent, in seconds
+        self.max_latency = 0.0
+
+    def percentile(self, fraction):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class EventChannel:
+    """ Bounded queue of pending triggers for one event plus its dispatcher """
+    __slots__ = ("event", "pending", "maxsize", "policy", "ready", "space",
+                 "idle", "dispatcher", "metrics")
+
+    def __init__(self, event, maxsize, policy):
+        self.event = event
+        self.pending = deque()  # (enqueued_at, args)
+        self.maxsize = maxsize
+        self.policy = policy
+        self.ready = asyncio.Event()
+        self.space = asyncio.Event()
+        self.space.set()
+        self.idle = asyncio.Event()  # set once everything queued was delivered
+        self.idle.set()
+        self.dispatcher = None
+        self.metrics = EventMetrics()
+
+    def rebind(self):
+        """ Fresh events for a new loop; asyncio.Event belongs to the loop
+            that first waited on it """
+        self.ready, self.space, self.idle = asyncio.Event(), asyncio.Event(), asyncio.Event()
+        self.space.set()
+        if self.pending:
+            self.ready.set()
+        else:
+            self.idle.set()
+
+class AsyncEventBus:
+    """ asyncio front end for a StreamSplicerEngine. Triggers are queued
+        per event and a dispatcher task per event fans each one out to all
+        of the engine's hooks for it, so publishers never wait on a slow
+        hook. Coroutine hooks run concurrently with each other, each seeing
+        triggers in order; plain hooks run inline unless subscribed with
+        blocking=True, which moves them to the loop's default executor. """
+    def __init__(self, engine=None, maxsize=1024, policy=OVERFLOW_BLOCK,
+                 trace=TRACE_VERBOSE):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{policy}'")
+        self.engine = engine if engine is not None else StreamSplicerEngine()
+        self.maxsize = maxsize
+        self.policy = policy
+        self.policies = {}
+        self.channels = {}
+        self.plans = {}
+        self.blocking = set()
+        self.deferral = ErrorDeferralHandler(trace)
+
+    def subscribe(self, event, callback, blocking=False):
+        self.engine.add_hook(event, callback)
+        if blocking:
+            self.blocking.add(callback)
+
+    def set_policy(self, event, policy, maxsize=None):
+        """ Override the bus-wide overflow policy / queue size for one event """
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{policy}'")
+        self.policies[event] = (policy, maxsize or self.maxsize)
+
+    def channel(self, event):
+        channel = self.channels.get(event)
+        if channel is None:
+            policy, maxsize = self.policies.get(event, (self.policy, self.maxsize))
+            channel = self.channels[event] = EventChannel(event, maxsize, policy)
+        dispatcher = channel.dispatcher
+        loop = asyncio.get_running_loop()
+        if dispatcher is None or dispatcher.done() or dispatcher.get_loop() is not loop:
+            # A dispatcher that died, or was left on an earlier loop, is replaced
+            if dispatcher is not None and dispatcher.get_loop() is not loop:
+                channel.rebind()
+            channel.dispatcher = loop.create_task(self.dispatch(channel))
+        return channel
+
+    async def publish(self, event, *args):
+        """ Queue a trigger; under OVERFLOW_BLOCK waits while the queue is full """
+        channel = self.channel(event)
+        while channel.policy == OVERFLOW_BLOCK and len(channel.pending) >= channel.maxsize:
+            channel.space.clear()
+            await channel.space.wait()
+        self.enqueue(channel, args)
+
+    def publish_nowait(self, event, *args):
+        """ Queue a trigger from code running on the loop; raises
+            asyncio.QueueFull instead of blocking """
+        channel = self.channel(event)
+        if channel.policy == OVERFLOW_BLOCK and len(channel.pending) >= channel.maxsize:
+            raise asyncio.QueueFull(f"Event '{event}' queue is full")
+        self.enqueue(channel, args)
+
+    def publish_threadsafe(self, loop, event, *args):
+        """ Queue a trigger from another thread """
+        loop.call_soon_threadsafe(self.publish_nowait, event, *args)
+
+    def enqueue(self, channel, args):
+        pending = channel.pending
+        metrics = channel.metrics
+        metrics.published += 1
+        if len(pending) >= channel.maxsize:
+            if channel.policy == OVERFLOW_COALESCE:
+                enqueued_at, _ = pending[-1]
+                pending[-1] = (enqueued_at, args)
+                metrics.coalesced += 1
+                return
+            pending.popleft()
+            metrics.dropped += 1
+        pending.append((time.perf_counter(), args))
+        if len(pending) > metrics.max_depth:
+            metrics.max_depth = len(pending)
+        channel.idle.clear()
+        channel.ready.set()
+
+    async def dispatch(self, channel):
+        pending = channel.pending
+        metrics = channel.metrics
+        while True:
+            if not pending:
+                channel.idle.set()
+                channel.ready.clear()
+                await channel.ready.wait()
+            # Everything queued goes out as one batch: each coroutine hook
+            # gets a single task that walks the batch in order, so task
+            # overhead is paid per batch rather than per trigger
+            batch = list(pending)
+            pending.clear()
+            channel.space.set()
+            try:
+                await self.fan_out(self.plan(channel.event), [args for _, args in batch])
+            except Exception as e:
+                # Hooks' own errors are deferred already; this keeps anything
+                # else from killing the dispatcher with triggers still to come
+                self.deferral.errors.append(str(e))
+                self.deferral.trace.emit("DEFERRED ERROR", e)
+            done = time.perf_counter()
+            for enqueued_at, _ in batch:
+                latency = done - enqueued_at
+                metrics.latencies.append(latency)
+                if latency > metrics.max_latency:
+                    metrics.max_latency = latency
+            metrics.delivered += len(batch)
+
+    def plan(self, event):
+        """ The event's hooks split into inline, coroutine and executor
+            hooks; rebuilt when hooks change """
+        plan = self.plans.get(event)
+        if plan is None or plan[0] != self.engine.version:
+            hooks = self.engine.hooks_for(event)
+            inline, coroutines, blocking = [], [], []
+            for callback in hooks:
+                if callback in self.blocking:
+                    blocking.append(callback)
+                elif inspect.iscoroutinefunction(callback):
+                    coroutines.append(callback)
+                else:
+                    inline.append(callback)
+            plan = self.plans[event] = (self.engine.version, inline, coroutines, blocking)
+        return plan
+
+    async def fan_out(self, plan, batch):
+        _, inline, coroutines, blocking = plan
+        waiting = [self.deliver(callback, batch) for callback in coroutines]
+        if blocking:
+            loop = asyncio.get_running_loop()
+            waiting += [loop.run_in_executor(None, self.call_each, callback, batch)
+                        for callback in blocking]
+        for callback in inline:
+            self.call_each(callback, batch)
+        if len(waiting) == 1:
+            await waiting[0]
+        elif waiting:
+            await asyncio.gather(*waiting)
+
+    def call_each(self, callback, batch):
+        handle = self.deferral.handle
+        for args in batch:
+            handle(callback, *args)
+
+    async def deliver(self, callback, batch):
+        for args in batch:
+            try:
+                await callback(*args)
+            except Exception as e:
+                self.deferral.errors.append(str(e))
+                self.deferral.trace.emit("DEFERRED ERROR", e)
+
+    async def drain(self):
+        """ Wait until every queued trigger has been delivered """
+        for channel in list(self.channels.values()):
+            await channel.idle.wait()
+
+    async def close(self):
+        """ Drain and stop the dispatchers; metrics stay readable and the
+            next publish starts a new dispatcher """
+        await self.drain()
+        dispatchers = [c.dispatcher for c in self.channels.values() if c.dispatcher]
+        for channel in self.channels.values():
+            channel.dispatcher = None
+        for task in dispatchers:
+            task.cancel()
+        await asyncio.gather(*dispatchers, return_exceptions=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def metrics(self):
+        return {event: channel.metrics for event, channel in self.channels.items()}
+
+    def report(self):
+        for event, m in self.metrics().items():
+            print(f"[EVENT] {event}: {m.delivered}/{m.published} delivered, "
+                  f"{m.dropped} dropped, {m.coalesced} coalesced, max depth {m.max_depth}, "
+                  f"latency p50 {m.percentile(0.5) * 1e3:.3f}ms "
+                  f"p99 {m.percentile(0.99) * 1e3:.3f}ms max {m.max_latency * 1e3:.3f}ms")
 
 import tkinter as tk
 from tkinter import scrolledtext
@@ -844,10 +3288,11 @@ class SuperCodeXEditor:
         pass
 
 # Initialize GUI
-root = tk.Tk()
-editor = SuperCodeXEditor(root)
-editor.highlight_syntax()
-root.mainloop()
+if __name__ == "__main__":
+    root = tk.Tk()
+    editor = SuperCodeXEditor(root)
+    editor.highlight_syntax()
+    root.mainloop()
 
 import json
 import struct
@@ -858,11 +3303,7 @@ class SuperCodeXEmulator:
         self.registers = {'rax': 0, 'rbx': 0, 'rcx': 0, 'rdx': 0}  # Simplified registers
 
     def load_bytecode(self, file_path):
-        with open(file_path, 'rb') as f:
-            size = struct.unpack('I', f.read(4))[0]
-            bytecode = f.read(size)
-        instructions_data = json.loads(bytecode.decode('utf-8'))
-        return instructions_data
+        return load_scxbin(file_path)
 
     def execute(self, instructions_data):
         for instruction in instructions_data:
@@ -922,17 +3363,40 @@ class SuperCodeXEditor:
         }
 
     def highlight_syntax(self):
-        code = self.text_area.get(1.0, tk.END)
+        """ Lex the whole buffer and highlight every line """
         for keyword in self.syntax_keywords:
-            start_idx = '1.0'
-            while True:
-                start_idx = self.text_area.search(keyword, start_idx, stopindex=tk.END)
-                if not start_idx:
-                    break
-                end_idx = f"{start_idx}+{len(keyword)}c"
-                self.text_area.tag_add(keyword, start_idx, end_idx)
-                self.text_area.tag_configure(keyword, foreground=self.syntax_colors[keyword])
-                start_idx = end_idx
+            self.text_area.tag_configure(keyword, foreground=self.syntax_colors[keyword])
+        self.lexer = IncrementalLexer()
+        # Every Tk line is a whole line, including a trailing empty one
+        self.lexer.edit(0, 0, self.text_area.get("1.0", "end-1c") + "\n")
+        for index in range(len(self.lexer.lines)):
+            self.highlight_line(index)
+        self.text_area.bind("<KeyRelease>", self.on_edit)
+
+    def on_edit(self, event=None):
+        """ Re-lex and re-highlight only the lines touched around the cursor """
+        line_count = int(self.text_area.index("end-1c").split(".")[0])
+        delta = line_count - len(self.lexer.lines)
+        cursor = int(self.text_area.index(tk.INSERT).split(".")[0]) - 1
+        start = cursor - max(delta, 0)
+        end = cursor + 1 - delta
+        if start < 0 or not start <= end <= len(self.lexer.lines):
+            # Edit happened away from the cursor (e.g. a programmatic insert)
+            self.highlight_syntax()
+            return
+        new_text = self.text_area.get(f"{start + 1}.0", f"{cursor + 1}.end") + "\n"
+        diff = self.lexer.edit(start, end, new_text)
+        for offset in range(len(diff.added)):
+            self.highlight_line(start + offset)
+
+    def highlight_line(self, index):
+        line_start, line_end = f"{index + 1}.0", f"{index + 1}.end"
+        for keyword in self.syntax_keywords:
+            self.text_area.tag_remove(keyword, line_start, line_end)
+        for token in self.lexer.line_tokens[index]:
+            if token.type == TokenType.KEYWORD and token.value in self.syntax_colors:
+                start_idx = f"{index + 1}.{token.column}"
+                self.text_area.tag_add(token.value, start_idx, f"{start_idx}+{len(token.value)}c")
 
     def run_code(self):
         code = self.text_area.get(1.0, tk.END)
@@ -961,10 +3425,11 @@ class SuperCodeXEditor:
             emulator.execute([instruction])
 
 # Initialize the Tkinter window and start the editor
-root = tk.Tk()
-editor = SuperCodeXEditor(root)
-editor.highlight_syntax()  # Apply syntax highlighting on startup
-root.mainloop()
+if __name__ == "__main__":
+    root = tk.Tk()
+    editor = SuperCodeXEditor(root)
+    editor.highlight_syntax()  # Apply syntax highlighting on startup
+    root.mainloop()
 
 import struct
 import json
@@ -975,20 +3440,12 @@ class SuperCodeXEmulator:
         self.registers = {'rax': 0, 'rbx': 0, 'rcx': 0, 'rdx': 0}  # Simplified registers
 
     def load_bytecode(self, file_path):
-        """ Deserialize bytecode from .scxbin file """
-        with open(file_path, 'rb') as f:
-            size = struct.unpack('I', f.read(4))[0]  # Read size of bytecode
-            bytecode = f.read(size)
-        instructions_data = json.loads(bytecode.decode('utf-8'))
-        return instructions_data
-
-    def save_bytecode(self, bytecode, file_path):
+        """ Deserialize bytecode from .scxbin file (v1 JSON or mapped v2) """
+        return load_scxbin(file_path)
+
+    def save_bytecode(self, bytecode, file_path, version=SCXBIN_VERSION):
         """ Serialize bytecode to .scxbin file """
-        bytecode_json = json.dumps(bytecode)
-        bytecode_bytes = bytecode_json.encode('utf-8')
-        with open(file_path, 'wb') as f:
-            f.write(struct.pack('I', len(bytecode_bytes)))  # Write size
-            f.write(bytecode_bytes)
+        save_scxbin(bytecode, file_path, version)
 
     def execute(self, instructions_data):
         for instruction in instructions_data:
@@ -1017,13 +3474,14 @@ class SuperCodeXEmulator:
                 print(f"Unknown instruction: {op}")
 
 # Example bytecode for testing
-bytecode = [
-    {"op": "ALLOC", "args": ["x"]},
-    {"op": "STORE", "args": ["x", 10]},
-    {"op": "PRINT", "args": ["x"]}
-]
-emulator = SuperCodeXEmulator()
-emulator.save_bytecode(bytecode, 'test.scxbin')
+if __name__ == "__main__":
+    bytecode = [
+        {"op": "ALLOC", "args": ["x"]},
+        {"op": "STORE", "args": ["x", 10]},
+        {"op": "PRINT", "args": ["x"]}
+    ]
+    emulator = SuperCodeXEmulator()
+    emulator.save_bytecode(bytecode, 'test.scxbin')
 
 class SuperCodeXEmulator:
     def __init__(self):
@@ -1090,13 +3548,19 @@ class SuperCodeXEmulator:
                 print(f"Unknown instruction: {op}")
                 self.program_counter += 1
 
+import itertools
 import time
 
 class SuperCodeXEmulator:
-    def __init__(self):
+    def __init__(self, profile=None):
         self.memory = {}
         self.registers = {'rax': 0, 'rbx': 0, 'rcx': 0, 'rdx': 0}
         self.program_counter = 0
+        self.flags = 0
+        self.code = []
+        self.labels = {}
+        self.profiler = as_profiler(profile)
+        self.profile_session = None if self.profiler is None else self.profiler.session(self)
 
     def execute_with_retry(self, instructions_data, max_retries=3):
         """ Execute bytecode with error handling and retries """
@@ -1117,8 +3581,357 @@ class SuperCodeXEmulator:
                 break
 
     def execute(self, instructions_data):
-        """ Your bytecode execution logic (as before) """
-        pass  # Same as previous execute method
+        """ Execute bytecode instructions with control flow. Nested WHILE
+            bodies are spliced in, IF / WHILE targets resolved and jump
+            labels checked before the first instruction runs, so the loop
+            below only ever moves the program counter. """
+        code = self.code = self.flatten(instructions_data)
+        self.program_counter = 0
+        session = self.profile_session
+        timed = session is not None and self.profiler.exact
+        if session is not None:
+            session.resume()
+        try:
+            while self.program_counter < len(code):
+                op, args = code[self.program_counter]
+                self.program_counter += 1
+                handler = getattr(self, f"run_{op.lower()}", None)
+                if handler is None:
+                    print(f"Unknown instruction: {op}")
+                else:
+                    if timed:
+                        session.dispatching(op)
+                    handler(args)
+        finally:
+            if session is not None:
+                session.pause()
+
+    def profile_position(self):
+        """ The op running now, for the sampling thread; no FUNCs here """
+        pc, code = self.program_counter - 1, self.code
+        if not 0 <= pc < len(code):
+            return None, None
+        return code[pc][0], (PROFILE_ROOT,)
+
+    def flatten(self, instructions_data):
+        code = []
+        labels = self.labels = {}
+        jumps = []
+        # Errors name the instruction by its place in the program as
+        # written, nested WHILE bodies included, counting from 1
+        numbers = itertools.count(1)
+
+        def emit(instructions):
+            guard = None
+            for instruction in instructions:
+                op, args = instruction['op'], instruction['args']
+                number = next(numbers)
+                needed = FLATTENED_OPERANDS.get(op)
+                if needed is not None and len(args) != needed:
+                    raise SyntaxError(f"instruction {number}: {op} takes {needed} "
+                                      f"operand{'s' if needed > 1 else ''}, got {len(args)}")
+                if op == 'WHILE':
+                    var1, operator_, var2, body = args
+                    test = len(code)
+                    branch = ['BRANCH_UNLESS', [var1, operator_, var2, None]]
+                    code.append(branch)
+                    emit(body)
+                    code.append(['JUMP', test])
+                    branch[1][3] = len(code)
+                elif op == 'LABEL':
+                    labels[args[0]] = len(code)
+                    code.append([op, args])
+                else:
+                    if op in EMULATOR_JUMPS:
+                        jumps.append((op, args[0], number))
+                    code.append([op, args])
+                # IF guards exactly the next instruction, however many
+                # flat instructions that became
+                if guard is not None:
+                    guard[1][3] = len(code)
+                    guard = None
+                if op == 'IF':
+                    var1, operator_, var2 = args
+                    guard = code[-1] = ['BRANCH_UNLESS', [var1, operator_, var2, None]]
+            if guard is not None:
+                guard[1][3] = len(code)
+
+        emit(instructions_data)
+        for op, label, number in jumps:
+            if label not in labels:
+                raise SyntaxError(f"instruction {number}: {op} to unknown label '{label}'")
+        return code
+
+    def label_target(self, name):
+        """ Where a jump to `name` lands; flatten has checked it exists """
+        return self.labels[name]
+
+    def operands(self, var1, var2):
+        return self.memory.get(var1, self.registers['rax']), self.memory.get(var2, 0)
+
+    def value(self, arg):
+        """ A STORE / ADD / SUB / CMP operand: a number, a register or a
+            variable (0 when unset) """
+        if isinstance(arg, int):
+            return arg
+        if arg.lstrip('-').isdigit():
+            return int(arg)
+        if arg in self.registers:
+            return self.registers[arg]
+        return self.memory.get(arg, 0)
+
+    def run_alloc(self, args):
+        self.memory[args[0]] = 0
+
+    def run_free(self, args):
+        self.memory.pop(args[0], None)
+
+    def run_store(self, args):
+        var_name, value = args
+        self.memory[var_name] = self.value(value)
+
+    def run_add(self, args):
+        self.registers['rax'] = self.value(args[0]) + self.value(args[1])
+
+    def run_sub(self, args):
+        self.registers['rax'] = self.value(args[0]) - self.value(args[1])
+
+    def run_print(self, args):
+        print(self.memory.get(args[0], self.registers['rax']))
+
+    def run_if(self, args):
+        """ An IF that was not flattened (streamed) skips the next
+            instruction when its condition fails """
+        var1, operator_, var2 = args
+        if not COMPARISONS[operator_](*self.operands(var1, var2)):
+            self.program_counter += 1
+
+    def run_cmp(self, args):
+        val1, val2 = self.value(args[0]), self.value(args[1])
+        self.flags = (val1 > val2) - (val1 < val2)
+
+    def run_jmp(self, args):
+        self.program_counter = self.label_target(args[0])
+
+    def run_je(self, args):
+        if self.flags == 0:
+            self.program_counter = self.label_target(args[0])
+
+    def run_jne(self, args):
+        if self.flags != 0:
+            self.program_counter = self.label_target(args[0])
+
+    def run_jg(self, args):
+        if self.flags > 0:
+            self.program_counter = self.label_target(args[0])
+
+    def run_jl(self, args):
+        if self.flags < 0:
+            self.program_counter = self.label_target(args[0])
+
+    def run_branch_unless(self, args):
+        var1, operator_, var2, target = args
+        if not COMPARISONS[operator_](*self.operands(var1, var2)):
+            self.program_counter = target
+
+    def run_jump(self, target):
+        self.program_counter = target
+
+    def run_label(self, args):
+        pass
+
+    def run_compare(self, args):
+        var1, operator_, var2 = args
+        val1, val2 = self.operands(var1, var2)
+        if operator_ in ('==', '!='):
+            print(f"Comparison Result: {val1} {operator_} {val2}")
+
+import operator
+from collections import deque
+
+# === Streaming Execution ===
+# A stream is a preamble followed by length-prefixed v2 images, one per
+# chunk, so a reader never holds more than one undecoded chunk:
+#   "SCXS", u16 version, u16 flags, then per chunk: u32 length + v2 image
+SCXBIN_STREAM_MAGIC = b"SCXS"
+SCXBIN_STREAM_PREAMBLE = struct.Struct("<4sHH")
+SCXBIN_CHUNK_LENGTH = struct.Struct("<I")
+
+def write_scxbin_stream(bytecode, target, chunk_size=4096):
+    """ Write {"op", "args"} dicts as a chunked stream to a path or binary file """
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, 'wb') as f:
+            write_scxbin_stream(bytecode, f, chunk_size)
+        return
+    target.write(SCXBIN_STREAM_PREAMBLE.pack(SCXBIN_STREAM_MAGIC, SCXBIN_VERSION, 0))
+    chunk = []
+    for instruction in bytecode:
+        chunk.append(instruction)
+        if len(chunk) == chunk_size:
+            _write_stream_chunk(target, chunk)
+            chunk = []
+    if chunk:
+        _write_stream_chunk(target, chunk)
+    target.flush()
+
+def _write_stream_chunk(target, chunk):
+    image = b"".join(encode_scxbin(chunk))
+    target.write(SCXBIN_CHUNK_LENGTH.pack(len(image)))
+    target.write(image)
+
+def _read_exact(stream, size):
+    """ Read `size` bytes, looping over the short reads pipes and sockets give """
+    data = bytearray()
+    while len(data) < size:
+        part = stream.read(size - len(data))
+        if not part:
+            break
+        data += part
+    return bytes(data)
+
+def iter_scxbin_chunks(source, chunk_size=4096):
+    """ Yield lists of (op, args) from a v2 .scxbin file, a stream file, or a
+        binary file object carrying a stream (stdin, pipe, socket makefile).
+        Chunks of a stream keep the size they were written with. """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            if f.read(4) != SCXBIN_MAGIC:
+                f.seek(0)
+                yield from iter_scxbin_chunks(f, chunk_size)
+                return
+        with ScxBinProgram(source) as program:
+            chunk = []
+            for instruction in program.ops():
+                chunk.append(instruction)
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        return
+
+    preamble = _read_exact(source, SCXBIN_STREAM_PREAMBLE.size)
+    if len(preamble) < SCXBIN_STREAM_PREAMBLE.size:
+        raise ValueError("Truncated .scxbin stream preamble")
+    magic, version, _flags = SCXBIN_STREAM_PREAMBLE.unpack(preamble)
+    if magic != SCXBIN_STREAM_MAGIC:
+        raise ValueError("Not a .scxbin stream")
+    if version != SCXBIN_VERSION:
+        raise ValueError(f"Unsupported .scxbin stream version {version}")
+    while True:
+        head = _read_exact(source, SCXBIN_CHUNK_LENGTH.size)
+        if not head:
+            return
+        if len(head) < SCXBIN_CHUNK_LENGTH.size:
+            raise ValueError("Truncated .scxbin stream chunk header")
+        (length,) = SCXBIN_CHUNK_LENGTH.unpack(head)
+        image = _read_exact(source, length)
+        if len(image) < length:
+            raise ValueError("Truncated .scxbin stream chunk")
+        program = ScxBinProgram(image)
+        chunk = list(program.ops())
+        program.close()
+        yield chunk
+
+COMPARISONS = {
+    "==": operator.eq, "!=": operator.ne,
+    "<": operator.lt, ">": operator.gt,
+    "<=": operator.le, ">=": operator.ge,
+}
+# Operand counts of the ops SuperCodeXEmulator.flatten takes apart or
+# checks; a WHILE's fourth operand is its body
+EMULATOR_JUMPS = {"JMP", "JE", "JNE", "JG", "JL"}
+FLATTENED_OPERANDS = {"IF": 3, "WHILE": 4, "LABEL": 1, **dict.fromkeys(EMULATOR_JUMPS, 1)}
+
+class StreamingEmulator(SuperCodeXEmulator):
+    """ Executes instructions as they arrive instead of loading the whole
+        program. At most `window` already-executed instructions are kept
+        (plus the chunks in flight), so memory is bounded by the window,
+        not by program length. Instructions go through the same run_*
+        handlers as SuperCodeXEmulator.execute; only fetching and label
+        resolution are done here. JMP/JE/JNE/JG/JL may go back to any
+        LABEL still inside the window, and forward to any later LABEL.
+        A v2 image cannot carry a WHILE body, so streamed loops are
+        written with LABEL, CMP and the conditional jumps. """
+
+    def __init__(self, window=4096):
+        super().__init__()
+        self.window = window
+
+    def execute_stream(self, source, chunk_size=4096):
+        self._chunks = iter_scxbin_chunks(source, chunk_size)
+        self._held = deque()     # (absolute index of first instruction, chunk)
+        self._received = 0
+        self._labels = {}
+        self.program_counter = 0
+        handlers = {}
+        try:
+            while True:
+                instruction = self.fetch(self.program_counter)
+                if instruction is None:
+                    break
+                op, args = instruction
+                self.program_counter += 1
+                if op not in handlers:
+                    handlers[op] = getattr(self, f"run_{op.lower()}", None)
+                handler = handlers[op]
+                if handler is None:
+                    print(f"Unknown instruction: {op}")
+                else:
+                    handler(args)
+        finally:
+            self._chunks.close()
+
+    # --- chunk window ---
+    def fetch(self, pc):
+        """ Instruction at absolute index `pc`, pulling chunks as needed """
+        for base, chunk in reversed(self._held):
+            if pc >= base:
+                if pc < base + len(chunk):
+                    return chunk[pc - base]
+                break
+        else:
+            if self._held:
+                raise RuntimeError(f"Instruction {pc} has left the {self.window}-instruction "
+                                   f"stream window")
+        while pc >= self._received:
+            if not self.pull(horizon=pc):
+                return None
+        base, chunk = self._held[-1]
+        return chunk[pc - base]
+
+    def pull(self, horizon):
+        """ Receive the next chunk, dropping chunks that fall entirely behind
+            `horizon - window`. Returns False at end of stream. """
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+        base = self._received
+        for offset, (op, args) in enumerate(chunk):
+            if op == 'LABEL':
+                self._labels[args[0]] = base + offset
+        self._held.append((base, chunk))
+        self._received += len(chunk)
+        limit = min(horizon, self._received) - self.window
+        while self._held and self._held[0][0] + len(self._held[0][1]) <= limit:
+            old_base, old_chunk = self._held.popleft()
+            for offset, (op, args) in enumerate(old_chunk):
+                if op == 'LABEL' and self._labels.get(args[0]) == old_base + offset:
+                    del self._labels[args[0]]
+        return True
+
+    def label_target(self, name):
+        target = self._labels.get(name)
+        while target is None:
+            # Forward jump to a label that has not arrived yet
+            if not self.pull(horizon=self._received):
+                raise RuntimeError(f"Jump to label '{name}', which is neither ahead in the "
+                                   f"stream nor inside the {self.window}-instruction window")
+            target = self._labels.get(name)
+        if target < self._held[0][0]:
+            raise RuntimeError(f"Label '{name}' has left the {self.window}-instruction "
+                               f"stream window")
+        return target
 
 import tkinter as tk
 from tkinter import ttk
@@ -1139,19 +3952,1348 @@ class AutocompleteEntry(tk.Entry):
             self.delete(0, tk.END)
             self.insert(0, matches[0])  # Show the first match
 
-# Create root window
-root = tk.Tk()
+if __name__ == "__main__":
+    # Create root window
+    root = tk.Tk()
+
+    # Initialize and set autocomplete list
+    autocomplete_list = ['ALLOC', 'STORE', 'PRINT', 'ADD', 'IF', 'WHILE', 'COMPARE', 'CALL']
+    entry = AutocompleteEntry(root)
+    entry.set_autocomplete_list(autocomplete_list)
+    entry.pack()
+
+    root.mainloop()
+
+
+
+
+# === Compilation Cache ===
+import argparse
+import hashlib
+import json
+import os
+
+COMPILER_VERSION = "0.2"
+CACHE_DIR = os.environ.get("SCDX_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "supercodex"))
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+_fingerprint = None
+
+def compiler_fingerprint():
+    """ Version plus a hash of this file, so editing the compiler invalidates
+        everything it produced before """
+    global _fingerprint
+    if _fingerprint is None:
+        with open(os.path.abspath(__file__), "rb") as file:
+            _fingerprint = f"{COMPILER_VERSION}:{hashlib.sha256(file.read()).hexdigest()}"
+    return _fingerprint
+
+class CompilationCache:
+    """ Content-addressed store of compiler output on disk. An entry is keyed
+        by source bytes + compiler fingerprint + flags; entries are touched on
+        every hit and the least recently used go first once the directory
+        grows past max_bytes. """
+    COUNTERS = ("hits", "misses", "stores", "evictions")
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.usage = None  # bytes on disk, scanned on first store
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, source, flags=()):
+        digest = hashlib.sha256()
+        for part in (compiler_fingerprint(), "\0".join(sorted(flags))):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        digest.update(source)
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, "r") as file:
+                entry = json.load(file)
+            os.utime(path)  # LRU order is modification time
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        # Write aside and rename, so parallel builds never see half an entry
+        path = self.path(key)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "w") as file:
+            json.dump(entry, file)
+        os.replace(temp, path)
+        self.stores += 1
+        if self.usage is None:
+            self.usage = sum(size for _, size, _ in self.entries())
+        else:
+            self.usage += os.path.getsize(path)
+        if self.usage > self.max_bytes:
+            self.evict()
+
+    def entries(self):
+        found = []
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if item.name.endswith(".json") and item.is_file():
+                    stat = item.stat()
+                    found.append((stat.st_mtime, stat.st_size, item.path))
+        return found
+
+    def evict(self):
+        """ Drop least recently used entries down to 90% of max_bytes, so a
+            full cache is rescanned once per batch of stores, not per store """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.evictions += 1
+            total -= size
+        self.usage = total
+
+    def clear(self):
+        for _, _, path in self.entries():
+            os.remove(path)
+        self.usage = 0
+
+    def counters(self):
+        return {name: getattr(self, name) for name in self.COUNTERS}
+
+    def merge(self, counters):
+        """ Add counts kept by another CompilationCache, e.g. a batch worker's """
+        for name in self.COUNTERS:
+            setattr(self, name, getattr(self, name) + counters.get(name, 0))
+
+    def stats(self):
+        entries = self.entries()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"[cache] {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.0%}), {stats['evictions']} evicted, "
+              f"{stats['entries']} entries / {stats['bytes'] / 1e6:.1f}MB in {self.directory}")
+
+# === Peephole Optimizer ===
+import re
+from collections import Counter, deque
+
+REGISTER_32 = {
+    "rax": "eax", "rbx": "ebx", "rcx": "ecx", "rdx": "edx",
+    "rsi": "esi", "rdi": "edi", "rbp": "ebp", "rsp": "esp",
+    **{f"r{n}": f"r{n}d" for n in range(8, 16)},
+}
+# Any general purpose register name -> the 64-bit register it lives in
+REGISTER_FAMILY = {**{r: r for r in REGISTER_32}, **{r32: r for r, r32 in REGISTER_32.items()}}
+CALLER_SAVED = ("rax", "rcx", "rdx", "rsi", "rdi", "r8", "r9", "r10", "r11")
+EXIT_SYSCALLS = (60, 231)   # exit, exit_group
+FLAG_WRITERS = {"add", "sub", "cmp", "test", "and", "or", "xor", "inc", "dec", "neg",
+                "imul", "mul", "shl", "shr", "sal", "sar"}
+ASM_DIRECTIVES = {"section", "segment", "global", "extern", "bits", "default", "align"}
+
+class AsmLine:
+    """ One assembly line split into mnemonic and operands. Labels have op
+        "label"; comments, blanks and directives have kind "other". """
+    __slots__ = ("text", "op", "operands")
+
+    def __init__(self, text):
+        self.text = text
+        code = text.split(";", 1)[0].strip()
+        if not code:
+            self.op, self.operands = None, ()
+        elif code.endswith(":") and " " not in code:
+            self.op, self.operands = "label", (code[:-1],)
+        else:
+            op, _, rest = code.partition(" ")
+            self.op = op.lower()
+            self.operands = tuple(part.strip() for part in rest.split(",")) if rest.strip() else ()
+
+    @property
+    def is_instruction(self):
+        # `name db ...` data lines parse as op `name` with the directive first
+        return self.op not in (None, "label") and self.op not in ASM_DIRECTIVES and \
+            not (self.operands and self.operands[0].split()[:1] in (["db"], ["dw"], ["dd"], ["dq"]))
+
+def immediate(operand):
+    try:
+        return int(operand, 0)
+    except ValueError:
+        return None
+
+def split_asm(asm):
+    """ Flatten asm lists whose entries may hold several newline-separated lines """
+    return [line for entry in asm for line in entry.split("\n") if line.strip()]
+
+def count_instructions(asm):
+    return sum(AsmLine(line).is_instruction for line in split_asm(asm))
+
+def flags_dead_after(following):
+    """ True when none of the `following` lines can observe the flags before
+        something overwrites them. Branches and labels count as observers. """
+    for line in following:
+        if not line.is_instruction:
+            if line.op == "label":
+                return False
+            continue
+        op = line.op
+        if op.startswith(("j", "cmov", "set", "adc", "sbb", "pushf")):
+            return False
+        if op in FLAG_WRITERS or op in ("call", "ret"):
+            return True
+    return True
+
+PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)(?::(\w+))?\}")
+
+class PeepholeRule:
+    """ Replace a window of consecutive lines matching `match` with `replace`.
+        Patterns are assembly text with {name} placeholders; a name must bind
+        the same operand everywhere it appears. {name:reg} only binds a
+        general purpose register and {name:imm} an integer. In `replace`,
+        {name:32} gives the 32-bit form of a bound register. `when` is an
+        optional check on the lines that follow the window. """
+
+    def __init__(self, name, match, replace, when=None):
+        self.name = name
+        self.match = []
+        for pattern in map(AsmLine, match):
+            # Each operand becomes a literal string or a (name, kind) placeholder
+            operands = []
+            for wanted in pattern.operands:
+                placeholder = PLACEHOLDER_PATTERN.fullmatch(wanted)
+                operands.append(placeholder.groups() if placeholder else wanted)
+            self.match.append((pattern.op, operands))
+        self.replace = replace
+        self.when = when
+
+    def bind(self, window, following):
+        bindings = {}
+        for (op, operands), line in zip(self.match, window):
+            if op != line.op or len(operands) != len(line.operands):
+                return None
+            for wanted, operand in zip(operands, line.operands):
+                if operand.lower() in REGISTER_FAMILY:
+                    operand = operand.lower()
+                if isinstance(wanted, str):
+                    if wanted != operand:
+                        return None
+                    continue
+                name, kind = wanted
+                if kind == "reg" and operand not in REGISTER_FAMILY:
+                    return None
+                if kind == "imm" and immediate(operand) is None:
+                    return None
+                if bindings.setdefault(name, operand) != operand:
+                    return None
+        if self.when and not self.when(following):
+            return None
+        return bindings
+
+    def expand(self, bindings):
+        def substitute(found):
+            value = bindings[found.group(1)]
+            return REGISTER_32.get(value, value) if found.group(2) == "32" else value
+        return [AsmLine(PLACEHOLDER_PATTERN.sub(substitute, template)) for template in self.replace]
+
+PEEPHOLE_RULES = [
+    PeepholeRule("self-move", ["mov {a}, {a}"], []),
+    PeepholeRule("move-back", ["mov {a}, {b}", "mov {b}, {a}"], ["mov {a}, {b}"]),
+    PeepholeRule("zero-by-xor", ["mov {r:reg}, 0"], ["xor {r:32}, {r:32}"], when=flags_dead_after),
+    PeepholeRule("push-pop", ["push {a}", "pop {a}"], []),
+    PeepholeRule("jump-to-next", ["jmp {l}", "{l}:"], ["{l}:"]),
+]
+
+class PeepholeOptimizer:
+    """ Rewrites generated assembly to a fixed point: the windowed rules in
+        PEEPHOLE_RULES, then the passes that follow control flow (known
+        register values, unreachable code, jump threading). `stats` counts
+        how often each rule or pass fired. """
+
+    def __init__(self, rules=PEEPHOLE_RULES, max_rounds=10):
+        self.rules = rules
+        self.max_rounds = max_rounds
+        self.stats = Counter()
+        # Rules by the mnemonic their window ends with, tried in table order
+        self.rules_ending = {}
+        for rule in rules:
+            self.rules_ending.setdefault(rule.match[-1][0], []).append(rule)
+
+    def optimize(self, asm):
+        lines = [AsmLine(line) for line in split_asm(asm)]
+        for _ in range(self.max_rounds):
+            fired = sum(self.stats.values())
+            lines = self.apply_rules(lines)
+            lines = self.forward_pass(lines)
+            lines = self.thread_jumps(lines)
+            if sum(self.stats.values()) == fired:
+                break
+        return [line.text for line in lines]
+
+    def apply_rules(self, lines):
+        # Each rule is tried on the window ending at the newest line; a
+        # replacement goes back on the input so it can pair with what
+        # precedes it
+        pending = deque(lines)
+        result = []
+        while pending:
+            line = pending.popleft()
+            result.append(line)
+            for rule in self.rules_ending.get(line.op, ()):
+                size = len(rule.match)
+                if size > len(result):
+                    continue
+                bindings = rule.bind(result[-size:], pending)
+                if bindings is not None:
+                    self.stats[rule.name] += 1
+                    del result[-size:]
+                    pending.extendleft(reversed(rule.expand(bindings)))
+                    break
+        return result
+
+    def forward_pass(self, lines):
+        """ Drop `mov reg, imm` when reg already holds imm, and everything
+            after jmp / ret / an exit syscall up to the next label """
+        known = {}
+        reachable = True
+        result = []
+        for line in lines:
+            if line.op == "label" or (line.op in ASM_DIRECTIVES):
+                known.clear()
+                reachable = True
+                result.append(line)
+                continue
+            if not line.is_instruction:
+                result.append(line)
+                continue
+            if not reachable:
+                self.stats["unreachable"] += 1
+                continue
+
+            op, operands = line.op, line.operands
+            target = REGISTER_FAMILY.get(operands[0].lower()) if operands else None
+            if op == "mov" and target and immediate(operands[1]) is not None:
+                value = immediate(operands[1])
+                if known.get(target) == value and operands[0].lower() == target:
+                    self.stats["known-value"] += 1
+                    continue
+                known[target] = value if operands[0].lower() == target else None
+            elif op == "xor" and target and len(operands) == 2 and \
+                    REGISTER_FAMILY.get(operands[1].lower()) == target and operands[0].lower() == operands[1].lower():
+                known[target] = 0
+            elif op == "syscall":
+                if known.get("rax") in EXIT_SYSCALLS:
+                    reachable = False
+                for register in ("rax", "rcx", "r11"):
+                    known.pop(register, None)
+            elif op == "call":
+                for register in CALLER_SAVED:
+                    known.pop(register, None)
+            elif op in ("jmp", "ret"):
+                reachable = False
+            elif op in ("mul", "imul", "div", "idiv") and len(operands) == 1:
+                known.pop("rax", None)
+                known.pop("rdx", None)
+            elif op.startswith("j") or op in ("cmp", "test", "push", "nop", "pause"):
+                pass  # no register written
+            elif operands and "[" in operands[0] and op not in ("xchg", "cmpxchg", "xadd"):
+                pass  # memory destination
+            elif target and op not in ("xchg", "cmpxchg", "xadd"):
+                known.pop(target, None)
+            else:
+                known.clear()
+            result.append(line)
+        return result
+
+    def thread_jumps(self, lines):
+        """ A jump to a label whose next instruction is `jmp other` goes
+            straight to `other` """
+        follows = {}
+        for index, line in enumerate(lines):
+            if line.op == "label":
+                for after in lines[index + 1:]:
+                    if after.is_instruction:
+                        if after.op == "jmp":
+                            follows[line.operands[0]] = after.operands[0]
+                        break
+        if not follows:
+            return lines
+        for line in lines:
+            if line.is_instruction and line.op.startswith("j") and len(line.operands) == 1:
+                target, seen = line.operands[0], set()
+                while target in follows and target not in seen:
+                    seen.add(target)
+                    target = follows[target]
+                if target != line.operands[0]:
+                    self.stats["jump-threading"] += 1
+                    line.text = f"{line.op} {target}"
+                    line.operands = (target,)
+        return lines
+
+def peephole_optimize(asm, rules=PEEPHOLE_RULES):
+    """ Optimized copy of `asm` and the per-rule counts """
+    optimizer = PeepholeOptimizer(rules)
+    return optimizer.optimize(asm), optimizer.stats
+
+# === x64 Backend ===
+# Instructions lowered to x64 with every variable in a register or a stack
+# slot, chosen by a linear-scan register allocator over live intervals.
+# Output is NASM for Linux (syscalls write = 1, exit = 60). rax is the
+# scratch register and rbp addresses the spill slots, so neither is
+# allocated; PRINT calls a runtime routine whose write syscall clobbers
+# X64_PRINT_CLOBBERS, so a variable live across a PRINT only gets one of
+# the other registers.
+X64_REGISTERS = ("rbx", "rcx", "rdx", "rsi", "rdi", "r8", "r9", "r10", "r11",
+                 "r12", "r13", "r14", "r15")
+SYSCALL_CLOBBERS = ("rax", "rcx", "r11")
+SYSCALL_ARGUMENTS = ("rdi", "rsi", "rdx", "r10", "r8", "r9")
+X64_PRINT_CLOBBERS = frozenset(SYSCALL_CLOBBERS + SYSCALL_ARGUMENTS[:3])
+X64_SCRATCH = "rax"
+X64_JUMPS = {"==": "je", "!=": "jne", "<": "jl", ">": "jg", "<=": "jle", ">=": "jge"}
+NEGATED_CONDITIONS = {"==": "!=", "!=": "==", "<": ">=", ">": "<=", "<=": ">", ">=": "<"}
+# A variable used inside a loop counts this many times more per level of
+# nesting when choosing which interval to spill
+LOOP_WEIGHT = 10
+
+X64_PRINT_ROUTINE = [
+    "print_int:",                 # rax = value; prints it and a newline
+    "sub rsp, 32",
+    "lea rsi, [rsp+31]",
+    "mov byte [rsi], 10",
+    "mov rdi, rax",
+    "mov ecx, 10",
+    "test rax, rax",
+    "jns .digit",
+    "neg rax",
+    ".digit:",
+    "xor edx, edx",
+    "div rcx",
+    "add dl, 48",
+    "dec rsi",
+    "mov [rsi], dl",
+    "test rax, rax",
+    "jnz .digit",
+    "test rdi, rdi",
+    "jns .write",
+    "dec rsi",
+    "mov byte [rsi], 45",
+    ".write:",
+    "lea rdx, [rsp+32]",
+    "sub rdx, rsi",
+    "mov eax, 1",
+    "mov edi, 1",
+    "syscall",
+    "add rsp, 32",
+    "ret",
+]
+
+def _x64_operand(arg):
+    """ Immediate for a number, else the variable name """
+    return int(arg) if arg.lstrip("-").isdigit() else arg
+
+class X64Lowering:
+    """ Instructions to a flat list of ops on variables: ("mov" | "add" |
+        "sub", var, src), ("print", src), ("text", label), ("label", name),
+        ("jmp", name), ("branch", jcc, a, b, label) and ("exit",), where a
+        src is a variable name or an int. `depth` holds the loop nesting
+        of every op. """
 
-# Initialize and set autocomplete list
-autocomplete_list = ['ALLOC', 'STORE', 'PRINT', 'ADD', 'IF', 'WHILE', 'COMPARE', 'CALL']
-entry = AutocompleteEntry(root)
-entry.set_autocomplete_list(autocomplete_list)
-entry.pack()
+    def __init__(self):
+        self.ops = []
+        self.depth = []
+        self.strings = []
+        self.blocks = []
+        self.loops = 0
+        self.labels = 0
+        self.diagnostics = []
+
+    def emit(self, *op):
+        self.ops.append(op)
+        self.depth.append(self.loops)
+
+    def new_label(self):
+        self.labels += 1
+        return f".B{self.labels}"
+
+    def lower(self, instructions):
+        skipping = 0   # nesting inside a FUNC body, which is not compiled
+        for instr in instructions:
+            if skipping:
+                if instr.op in BLOCK_OPENERS:
+                    skipping += 1
+                elif instr.op == "END":
+                    skipping -= 1
+                continue
+            if instr.op == "FUNC":
+                skipping = 1
+            rule = getattr(self, f"lower_{instr.op.lower()}", None)
+            if rule is None:
+                self.diagnostics.append(f"Not supported by the x64 backend: {instr.op}")
+                continue
+            try:
+                rule(*instr.args)
+            except (TypeError, ValueError):
+                self.diagnostics.append(f"Malformed instruction: {instr!r}")
+        if self.blocks:
+            raise SyntaxError(f"{self.blocks[-1][0]} without END")
+        labels = {op[1] for op in self.ops if op[0] == "label"}
+        for op in self.ops:
+            if op[0] == "jmp" and op[1] not in labels:
+                raise SyntaxError(f"JMP to unknown label '{op[1][3:]}'")
+        return self.ops
+
+    def lower_alloc(self, var):
+        self.emit("mov", var, 0)
+
+    def lower_store(self, var, value):
+        self.emit("mov", var, int(value))
+
+    def lower_add(self, var, src):
+        if not var.isdigit():
+            self.emit("add", var, _x64_operand(src))
+
+    def lower_sub(self, var, src):
+        if not var.isdigit():
+            self.emit("sub", var, _x64_operand(src))
+
+    def lower_print(self, *args):
+        text = " ".join(args)
+        if text.startswith('"'):
+            self.strings.append(text.strip('"'))
+            self.emit("text", f"str{len(self.strings)}")
+        else:
+            self.emit("print", _x64_operand(args[0]))
 
-root.mainloop()
+    def lower_load(self, *args):
+        pass
 
+    def lower_free(self, var):
+        # Live intervals already end at the last use
+        pass
 
+    def lower_nop(self, *args):
+        pass
 
+    def lower_exit(self, *args):
+        self.emit("exit")
+
+    def lower_label(self, name):
+        self.emit("label", f".L_{name}")
+
+    def lower_jmp(self, name):
+        self.emit("jmp", f".L_{name}")
+
+    def branch_unless(self, left, test, right, label):
+        """ Jump to `label` when `left test right` is false """
+        if test not in X64_JUMPS:
+            raise ValueError(test)
+        left, right = _x64_operand(left), _x64_operand(right)
+        if isinstance(left, int) and isinstance(right, int):
+            if not NEGATED_TESTS[test](left, right):
+                return
+            self.emit("jmp", label)
+            return
+        if isinstance(left, int):
+            left, right, test = right, left, MIRRORED_TESTS[test]
+        self.emit("branch", X64_JUMPS[NEGATED_CONDITIONS[test]], left, right, label)
+
+    def lower_if(self, left, test, right, *rest):
+        end = self.new_label()
+        self.branch_unless(left, test, right, end)
+        self.blocks.append(("IF", end))
+
+    def lower_else(self, *args):
+        if not self.blocks or self.blocks[-1][0] != "IF":
+            raise ValueError("ELSE without IF")
+        _, skipped = self.blocks.pop()
+        end = self.new_label()
+        self.emit("jmp", end)
+        self.emit("label", skipped)
+        self.blocks.append(("ELSE", end))
+
+    def lower_while(self, left, test, right, *rest):
+        top, end = self.new_label(), self.new_label()
+        self.loops += 1
+        self.emit("label", top)
+        self.branch_unless(left, test, right, end)
+        self.blocks.append(("WHILE", end, top))
+
+    def lower_for(self, var, start, stop, step="1"):
+        step = int(step)
+        if step == 0:
+            raise ValueError(step)
+        self.emit("mov", var, _x64_operand(start))
+        top, end = self.new_label(), self.new_label()
+        self.loops += 1
+        self.emit("label", top)
+        self.branch_unless(var, "<" if step > 0 else ">", stop, end)
+        self.blocks.append(("FOR", end, top, var, step))
+
+    def lower_func(self, name, *args):
+        self.diagnostics.append(f"Not supported by the x64 backend: FUNC {name} (body skipped)")
+
+    def lower_end(self, *args):
+        if not self.blocks:
+            return
+        block = self.blocks.pop()
+        if block[0] == "FOR":
+            _, end, top, var, step = block
+            self.emit("add" if step > 0 else "sub", var, abs(step))
+        if block[0] in ("WHILE", "FOR"):
+            self.emit("jmp", block[2])
+            self.loops -= 1
+        self.emit("label", block[1])
+
+def _x64_reads_writes(op):
+    """ Variables an op reads and writes """
+    kind = op[0]
+    if kind == "mov":
+        return [op[2]] if isinstance(op[2], str) else [], [op[1]]
+    if kind in ("add", "sub"):
+        return [op[1]] + ([op[2]] if isinstance(op[2], str) else []), [op[1]]
+    if kind == "print":
+        return [op[1]] if isinstance(op[1], str) else [], []
+    if kind == "branch":
+        return [arg for arg in op[2:4] if isinstance(arg, str)], []
+    return [], []
+
+class LiveInterval:
+    __slots__ = ("var", "start", "end", "weight", "crosses_call", "location")
+
+    def __init__(self, var, start):
+        self.var = var
+        self.start = start
+        self.end = start
+        self.weight = 0
+        self.crosses_call = False
+        self.location = None
+
+def _bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def live_intervals(ops, depth):
+    """ One interval per variable from liveness over the op list: the first
+        to the last position where it is live or written, with how often
+        it is used (scaled by loop depth) and whether it must survive a
+        PRINT. Variables read before any write are live on entry. """
+    names = {}
+    for op in ops:
+        reads, writes = _x64_reads_writes(op)
+        for var in reads + writes:
+            names.setdefault(var, len(names))
+    variables = list(names)
+    uses, defs = [], []
+    for op in ops:
+        reads, writes = _x64_reads_writes(op)
+        uses.append(sum(1 << names[var] for var in set(reads)))
+        defs.append(sum(1 << names[var] for var in set(writes)))
+
+    # Basic blocks start at labels and after jumps; the fixed point is
+    # found per block, then spread over the ops inside each block
+    starts = sorted({0} | {pc for pc, op in enumerate(ops) if op[0] == "label"} |
+                    {pc + 1 for pc, op in enumerate(ops)
+                     if op[0] in ("jmp", "branch", "exit") and pc + 1 < len(ops)})
+    block_at = {start: n for n, start in enumerate(starts)}
+    labels = {op[1]: block_at[pc] for pc, op in enumerate(ops) if op[0] == "label"}
+    bounds = list(zip(starts, starts[1:] + [len(ops)]))
+    gen, kill, successors = [], [], []
+    for n, (start, end) in enumerate(bounds):
+        live = killed = 0
+        for pc in range(end - 1, start - 1, -1):
+            live = uses[pc] | (live & ~defs[pc])
+            killed |= defs[pc]
+        gen.append(live)
+        kill.append(killed)
+        last = ops[end - 1] if end > start else ("label",)
+        following = (n + 1,) if n + 1 < len(bounds) else ()
+        if last[0] == "jmp":
+            successors.append((labels[last[1]],))
+        elif last[0] == "branch":
+            successors.append(following + (labels[last[4]],))
+        elif last[0] == "exit":
+            successors.append(())
+        else:
+            successors.append(following)
+    block_in = [0] * len(bounds)
+    block_out = [0] * len(bounds)
+    changed = True
+    while changed:
+        changed = False
+        for n in range(len(bounds) - 1, -1, -1):
+            out = 0
+            for succ in successors[n]:
+                out |= block_in[succ]
+            live = gen[n] | (out & ~kill[n])
+            if live != block_in[n] or out != block_out[n]:
+                block_in[n], block_out[n] = live, out
+                changed = True
+    live_in = [0] * len(ops)
+    live_out = [0] * len(ops)
+    for n, (start, end) in enumerate(bounds):
+        live = block_out[n]
+        for pc in range(end - 1, start - 1, -1):
+            live_out[pc] = live
+            live = live_in[pc] = uses[pc] | (live & ~defs[pc])
+
+    # Interval ends are where a variable is first and last live or
+    # written: scan forwards and backwards for the bits not seen yet
+    intervals = {}
+    seen = 0
+    crossing = 0
+    for pc, op in enumerate(ops):
+        touched = live_in[pc] | defs[pc]
+        for bit in _bits(touched & ~seen):
+            intervals[variables[bit]] = LiveInterval(variables[bit], pc)
+        seen |= touched
+        if op[0] in ("print", "text"):
+            crossing |= live_out[pc]
+    seen = 0
+    for pc in range(len(ops) - 1, -1, -1):
+        touched = live_in[pc] | defs[pc]
+        for bit in _bits(touched & ~seen):
+            intervals[variables[bit]].end = pc
+        seen |= touched
+    for bit in _bits(crossing):
+        intervals[variables[bit]].crosses_call = True
+    for pc, op in enumerate(ops):
+        reads, writes = _x64_reads_writes(op)
+        for var in reads + writes:
+            intervals[var].weight += LOOP_WEIGHT ** depth[pc]
+    entry = [var for var, bit in names.items() if live_in[0] >> bit & 1] if ops else []
+    return sorted(intervals.values(), key=lambda interval: interval.start), entry
+
+class LinearScanAllocator:
+    """ Linear scan (Poletto & Sarkar) over live intervals sorted by start.
+        When every register is taken the interval with the lowest use
+        weight, this one or an active one, goes to a stack slot, so hot
+        and loop-carried variables keep registers. Intervals that cross a
+        PRINT only get registers outside `clobbered`. """
+
+    def __init__(self, registers=X64_REGISTERS, clobbered=X64_PRINT_CLOBBERS):
+        self.registers = registers
+        self.preserved = [reg for reg in registers if reg not in clobbered]
+        # Intervals that cross no call try the clobbered registers first,
+        # leaving the preserved ones for those that do
+        self.any_register = [reg for reg in registers if reg in clobbered] + self.preserved
+        self.slots = 0
+
+    def allocate(self, intervals):
+        active = []
+        free = set(self.registers)
+        for interval in intervals:
+            for done in [other for other in active if other.end < interval.start]:
+                active.remove(done)
+                free.add(done.location)
+            candidates = self.preserved if interval.crosses_call else self.any_register
+            register = next((reg for reg in candidates if reg in free), None)
+            if register is not None:
+                free.discard(register)
+                interval.location = register
+                active.append(interval)
+                continue
+            victims = [other for other in active if other.location in candidates]
+            victim = min(victims, key=lambda other: other.weight, default=None)
+            if victim is not None and victim.weight < interval.weight:
+                interval.location = victim.location
+                active.remove(victim)
+                active.append(interval)
+                self.spill(victim)
+            else:
+                self.spill(interval)
+        return {interval.var: interval.location for interval in intervals}
+
+    def spill(self, interval):
+        self.slots += 1
+        interval.location = f"qword [rbp-{8 * self.slots}]"
+
+def _is_memory(location):
+    return isinstance(location, str) and "[" in location
+
+def _fits_imm32(value):
+    return -2 ** 31 <= value < 2 ** 31
+
+class X64Emitter:
+    """ NASM text for lowered ops given each variable's location. With
+        `memory_only` every variable is a fixed memory cell and every op
+        goes through rax / rbx, the way the template backend does it. """
+
+    def __init__(self, locations, memory_only=False):
+        self.locations = locations
+        self.memory_only = memory_only
+        self.lines = []
+
+    def operand(self, src):
+        return str(src) if isinstance(src, int) else self.locations[src]
+
+    def into_scratch(self, src, scratch=X64_SCRATCH):
+        self.lines.append(f"mov {scratch}, {self.operand(src)}")
+        return scratch
+
+    def emit(self, ops):
+        for op in ops:
+            getattr(self, f"emit_{op[0]}")(*op[1:])
+        return self.lines
+
+    def emit_mov(self, var, src):
+        dst, value = self.locations[var], self.operand(src)
+        if dst == value:
+            return
+        if _is_memory(dst) and (_is_memory(value) or
+                                (isinstance(src, int) and not _fits_imm32(src))):
+            value = self.into_scratch(src)
+        self.lines.append(f"mov {dst}, {value}")
+
+    def emit_arithmetic(self, mnemonic, var, src):
+        dst, value = self.locations[var], self.operand(src)
+        if self.memory_only:
+            self.lines.append(f"mov rax, {dst}")
+            self.into_scratch(src, "rbx")
+            self.lines.append(f"{mnemonic} rax, rbx")
+            self.lines.append(f"mov {dst}, rax")
+            return
+        if (_is_memory(dst) and _is_memory(value)) or \
+                (isinstance(src, int) and not _fits_imm32(src)):
+            value = self.into_scratch(src)
+        self.lines.append(f"{mnemonic} {dst}, {value}")
+
+    def emit_add(self, var, src):
+        self.emit_arithmetic("add", var, src)
+
+    def emit_sub(self, var, src):
+        self.emit_arithmetic("sub", var, src)
+
+    def emit_print(self, src):
+        self.into_scratch(src)
+        self.lines.append("call print_int")
+
+    def emit_text(self, label):
+        self.lines += ["mov eax, 1", "mov edi, 1", f"lea rsi, [rel {label}]",
+                       f"mov edx, {label}_len", "syscall"]
+
+    def emit_label(self, name):
+        self.lines.append(f"{name}:")
+
+    def emit_jmp(self, name):
+        self.lines.append(f"jmp {name}")
+
+    def emit_branch(self, jump, left, right, label):
+        # `left` is always a variable: lowering puts constants on the right
+        first, second = self.operand(left), self.operand(right)
+        if self.memory_only:
+            first = self.into_scratch(left)
+            second = self.into_scratch(right, "rbx")
+        elif isinstance(right, int) and not _fits_imm32(right):
+            second = self.into_scratch(right)
+        elif _is_memory(first) and _is_memory(second):
+            first = self.into_scratch(left)
+        self.lines.append(f"cmp {first}, {second}")
+        self.lines.append(f"{jump} {label}")
+
+    def emit_exit(self):
+        self.lines += ["mov eax, 60", "xor edi, edi", "syscall"]
+
+def count_memory_accesses(asm):
+    """ (loads, stores) through memory operands; a read-modify-write of
+        memory counts as both """
+    loads = stores = 0
+    for line in map(AsmLine, (text for text in split_asm(asm) if "[" in text)):
+        if not line.is_instruction or line.op == "lea":
+            continue
+        for index, operand in enumerate(line.operands):
+            if "[" not in operand:
+                continue
+            if index > 0 or line.op in ("cmp", "test", "push"):
+                loads += 1
+            elif line.op == "mov":
+                stores += 1
+            else:
+                loads += 1
+                stores += 1
+    return loads, stores
+
+def generate_x64(instructions, allocate=True):
+    """ NASM for `instructions` and what the allocator did. Without
+        `allocate` every variable lives in a .bss cell, for comparison. """
+    lowering = X64Lowering()
+    ops = lowering.lower(instructions)
+    intervals, entry = live_intervals(ops, lowering.depth)
+    # Variables read before they are written start at 0, as in the interpreter
+    ops[:0] = [("mov", var, 0) for var in entry]
+    if allocate:
+        allocator = LinearScanAllocator()
+        locations = allocator.allocate(intervals)
+        slots = allocator.slots
+    else:
+        locations = {interval.var: f"qword [rel vars+{8 * n}]"
+                     for n, interval in enumerate(intervals)}
+        slots = 0
+    body = X64Emitter(locations, memory_only=not allocate).emit(ops)
+    loads, stores = count_memory_accesses(body)
+    asm = ["section .text", "global _start", "_start:"]
+    if slots:
+        asm += ["push rbp", "mov rbp, rsp", f"sub rsp, {8 * slots}"]
+    asm += body
+    asm += ["mov eax, 60", "xor edi, edi", "syscall"]
+    if any(op[0] == "print" for op in ops):
+        asm += X64_PRINT_ROUTINE
+    if lowering.strings:
+        asm.append("section .data")
+        for n, text in enumerate(lowering.strings, 1):
+            asm.append(f"str{n} db {', '.join(str(byte) for byte in text.encode())}, 10")
+            asm.append(f"str{n}_len equ $ - str{n}")
+    if not allocate and intervals:
+        asm += ["section .bss", f"vars resq {len(intervals)}"]
+    registers = {location for location in locations.values() if not _is_memory(location)}
+    stats = {
+        "variables": len(intervals),
+        "registers": len(registers),
+        "spilled": slots,
+        "loads": loads,
+        "stores": stores,
+        "diagnostics": lowering.diagnostics,
+    }
+    return asm, stats
+
+# === ELF64 Emitter ===
+# An in-process assembler for the NASM subset the compiler emits, writing
+# a static Linux ELF64 executable without nasm or a linker. Jumps, calls
+# and RIP-relative operands always take 32-bit displacements, so every
+# instruction's size is known before any label is placed: one pass lays
+# the program out and a second encodes it with the addresses filled in.
+import re
+import stat
+import struct
+from functools import lru_cache
+
+ELF_BASE_ADDRESS = 0x400000
+ELF_DATA_ADDRESS = 0x600000
+ELF_PAGE = 0x1000
+ELF_SEGMENTS = 2
+ELF_HEADER = struct.Struct("<4sBBBBB7xHHIQQQIHHHHHH")
+ELF_PROGRAM_HEADER = struct.Struct("<IIQQQQQQ")
+PT_LOAD = 1
+PF_X, PF_W, PF_R = 1, 2, 4
+
+GPR_CODES = {name: code for code, name in enumerate(
+    ("rax", "rcx", "rdx", "rbx", "rsp", "rbp", "rsi", "rdi",
+     "r8", "r9", "r10", "r11", "r12", "r13", "r14", "r15"))}
+GPR32_CODES = {name: code for code, name in enumerate(
+    ("eax", "ecx", "edx", "ebx", "esp", "ebp", "esi", "edi",
+     "r8d", "r9d", "r10d", "r11d", "r12d", "r13d", "r14d", "r15d"))}
+GPR8_CODES = {name: code for code, name in enumerate(
+    ("al", "cl", "dl", "bl", "spl", "bpl", "sil", "dil",
+     "r8b", "r9b", "r10b", "r11b", "r12b", "r13b", "r14b", "r15b"))}
+OPERAND_SIZES = {"byte": 8, "dword": 32, "qword": 64}
+# Group-1 arithmetic: the /digit of the immediate forms and the base of
+# the register forms (base + 1: r/m, reg; base + 3: reg, r/m)
+ALU_OPS = {"add": 0, "or": 1, "and": 4, "sub": 5, "xor": 6, "cmp": 7}
+UNARY_OPS = {"not": 2, "neg": 3, "mul": 4, "imul": 5, "div": 6, "idiv": 7}
+SHIFT_OPS = {"shl": 4, "sal": 4, "shr": 5, "sar": 7}
+CONDITION_CODES = {
+    "jo": 0x0, "jno": 0x1, "jb": 0x2, "jae": 0x3, "je": 0x4, "jz": 0x4, "jne": 0x5, "jnz": 0x5,
+    "jbe": 0x6, "ja": 0x7, "js": 0x8, "jns": 0x9, "jp": 0xA, "jnp": 0xB,
+    "jl": 0xC, "jge": 0xD, "jle": 0xE, "jg": 0xF,
+}
+ADDRESS_TERM = re.compile(r"([+-]?)\s*([^+\-\s]+)")
+DATA_ITEM = re.compile(r"'[^']*'|\"[^\"]*\"|[^,\s]+")
+FIXED_ENCODINGS = {
+    "syscall": b"\x0f\x05", "ret": b"\xc3", "nop": b"\x90", "pause": b"\xf3\x90",
+    "cqo": b"\x48\x99", "leave": b"\xc9", "hlt": b"\xf4",
+}
+
+class AssemblerError(ValueError):
+    pass
+
+class Register:
+    __slots__ = ("code", "size", "name")
+
+    def __init__(self, code, size, name):
+        self.code, self.size, self.name = code, size, name
+
+class Memory:
+    """ [base+disp], [rel symbol+disp] or an absolute [symbol+disp] """
+    __slots__ = ("base", "disp", "symbol", "relative", "size")
+
+    def __init__(self, base, disp, symbol, relative, size):
+        self.base, self.disp, self.symbol = base, disp, symbol
+        self.relative, self.size = relative, size
+
+class Immediate:
+    __slots__ = ("value", "symbol")
+
+    def __init__(self, value, symbol=None):
+        self.value, self.symbol = value, symbol
+
+@lru_cache(maxsize=4096)
+def parse_operand(text):
+    """ Register, Memory or Immediate; operands are never mutated, so
+        repeated operand text shares one parsed object """
+    text = text.strip()
+    size = None
+    first, _, rest = text.partition(" ")
+    if first.lower() in OPERAND_SIZES and rest:
+        size, text = OPERAND_SIZES[first.lower()], rest.strip()
+    lower = text.lower()
+    for codes, bits in ((GPR_CODES, 64), (GPR32_CODES, 32), (GPR8_CODES, 8)):
+        if lower in codes:
+            return Register(codes[lower], bits, lower)
+    if text.startswith("["):
+        inner = text.strip("[]").strip()
+        relative = inner.lower().startswith("rel ")
+        if relative:
+            inner = inner[4:].strip()
+        base = symbol = None
+        disp = 0
+        for sign, term in ADDRESS_TERM.findall(inner):
+            if term.lower() in GPR_CODES and base is None:
+                base = GPR_CODES[term.lower()]
+                continue
+            value = immediate(term)
+            if value is not None:
+                disp += -value if sign == "-" else value
+            else:
+                symbol = term
+        return Memory(base, disp, symbol, relative, size)
+    value = immediate(text)
+    return Immediate(value) if value is not None else Immediate(0, text)
+
+def _fits(value, bits):
+    return -(1 << (bits - 1)) <= value < (1 << (bits - 1))
+
+class X64Assembler:
+    """ Assembles NASM text (a string or a list of lines) into .text /
+        .data bytes and a .bss size.
+        `symbols` maps every label and `equ` constant to its address or
+        value after assemble(). """
+
+    def __init__(self, text_address=ELF_BASE_ADDRESS, data_address=ELF_DATA_ADDRESS):
+        self.text_address = text_address
+        self.data_address = data_address
+        self.symbols = {}
+        self.encoded = {}
+        self.referenced = False
+        self.final = False
+
+    def assemble(self, asm):
+        if isinstance(asm, str):
+            asm = [asm]
+        lines = [AsmLine(line) for line in split_asm(asm)]
+        # Layout pass with forward references at 0, then the real encoding
+        self.symbols = {}
+        self.encoded = {}
+        self.final = False
+        self.layout(lines)
+        self.final = True
+        return self.layout(lines)
+
+    def layout(self, lines):
+        text, data = bytearray(), bytearray()
+        bss = 0
+        section = ".text"
+        scope = ""
+        text_base = self.text_address
+        for number, line in enumerate(lines, 1):
+            if line.op is None:
+                continue
+            if line.op in ("section", "segment"):
+                section = line.operands[0].split()[0] if line.operands else ".text"
+                continue
+            if line.op in ASM_DIRECTIVES:
+                continue
+            if line.op == "label":
+                name = line.operands[0]
+                if name.startswith("."):
+                    name = scope + name
+                else:
+                    scope = name
+                self.symbols[name] = self.here(section, text_base, text, data, bss)
+                continue
+            try:
+                if section == ".text":
+                    if number in self.encoded:
+                        text += self.encoded[number]
+                        continue
+                    self.referenced = False
+                    code = self.encode(line, text_base + len(text), scope)
+                    if not self.referenced:
+                        # No address in it: the second pass reuses it as is
+                        self.encoded[number] = code
+                    text += code
+                else:
+                    here = self.here(section, text_base, text, data, bss)
+                    size = self.define(line, section, data, here)
+                    if section == ".bss":
+                        bss += size
+            except (AttributeError, IndexError, TypeError, ValueError, struct.error) as e:
+                raise AssemblerError(f"line {number}: cannot assemble '{line.text.strip()}' ({e})")
+        return bytes(text), bytes(data), bss
+
+    def here(self, section, text_base, text, data, bss):
+        if section == ".text":
+            return text_base + len(text)
+        if section == ".data":
+            return self.data_address + len(data)
+        return self.data_address + len(data) + bss
+
+    def define(self, line, section, data, here):
+        """ `name db ...`, `name equ ...` and `name resq n` lines """
+        name, directive, rest = (line.text.split(";", 1)[0].split(None, 2) + [""])[:3]
+        directive = directive.lower()
+        args = DATA_ITEM.findall(rest)
+        if directive == "equ":
+            expression = rest.replace("$", str(here))
+            self.symbols[name] = self.evaluate(expression)
+            return 0
+        self.symbols[name] = here
+        if directive in ("resb", "resq"):
+            return int(args[0]) * (8 if directive == "resq" else 1)
+        if directive == "db":
+            for arg in args:
+                if arg[:1] in ("'", '"'):
+                    data += arg[1:-1].encode()
+                else:
+                    data.append(immediate(arg) & 0xFF)
+        elif directive == "dq":
+            for arg in args:
+                data += struct.pack("<q", immediate(arg))
+        else:
+            raise AssemblerError(f"unknown directive {directive}")
+        return 0
+
+    def evaluate(self, expression):
+        value = 0
+        for sign, term in ADDRESS_TERM.findall(expression):
+            number = immediate(term)
+            number = self.resolve(term, "") if number is None else number
+            value += -number if sign == "-" else number
+        return value
+
+    def resolve(self, symbol, scope):
+        self.referenced = True
+        name = scope + symbol if symbol.startswith(".") else symbol
+        if name not in self.symbols:
+            if self.final:
+                raise AssemblerError(f"undefined symbol {symbol}")
+            return 0
+        return self.symbols[name]
+
+    # --- instruction encoding ---
+    def encode(self, line, address, scope):
+        op = line.op
+        if op in FIXED_ENCODINGS:
+            return FIXED_ENCODINGS[op]
+        operands = [parse_operand(operand) for operand in line.operands]
+        if op in ("jmp", "call") or op in CONDITION_CODES:
+            opcode = (b"\xe9" if op == "jmp" else b"\xe8" if op == "call"
+                      else bytes((0x0F, 0x80 | CONDITION_CODES[op])))
+            target = self.resolve(operands[0].symbol, scope)
+            end = address + len(opcode) + 4
+            return opcode + struct.pack("<i", target - end)
+        encoder = getattr(self, f"encode_{op}", None)
+        if encoder is None:
+            if op in ALU_OPS:
+                return self.encode_alu(ALU_OPS[op], operands, address, scope)
+            if op in UNARY_OPS and len(operands) == 1:
+                return self.rm(b"\xf7", UNARY_OPS[op], operands[0], address, scope)
+            if op in SHIFT_OPS:
+                return self.rm(b"\xc1", SHIFT_OPS[op], operands[0], address, scope,
+                               struct.pack("<B", operands[1].value & 0xFF))
+            raise AssemblerError(f"unsupported instruction {op}")
+        return encoder(operands, address, scope)
+
+    def rm(self, opcode, reg, operand, address, scope, tail=b"", size=None):
+        """ opcode + ModRM with `reg` (a Register or a /digit) against a
+            register or memory operand, REX as needed, then `tail` """
+        size = size or operand.size or (reg.size if isinstance(reg, Register) else 64)
+        reg_code = reg.code if isinstance(reg, Register) else reg
+        rex = 0x48 if size == 64 else 0x40
+        needs_rex = size == 64
+        if isinstance(reg, Register) and reg.size == 8 and 4 <= reg.code < 8:
+            needs_rex = True
+        if reg_code >= 8:
+            rex |= 0x04
+            needs_rex = True
+        rip_target = None
+        if isinstance(operand, Register):
+            if operand.code >= 8:
+                rex |= 0x01
+                needs_rex = True
+            if operand.size == 8 and 4 <= operand.code < 8:
+                needs_rex = True
+            encoded = bytes((0xC0 | (reg_code & 7) << 3 | operand.code & 7,))
+        else:
+            disp = operand.disp
+            if operand.symbol is not None:
+                disp += self.resolve(operand.symbol, scope)
+            if operand.base is None and operand.relative:
+                encoded = bytes(((reg_code & 7) << 3 | 5,)) + b"\0\0\0\0"
+                rip_target = disp
+            elif operand.base is None:
+                # Absolute address through a SIB with no base or index
+                encoded = bytes(((reg_code & 7) << 3 | 4, 0x25)) + struct.pack("<i", disp)
+            else:
+                base = operand.base
+                if base >= 8:
+                    rex |= 0x01
+                    needs_rex = True
+                if disp == 0 and base & 7 != 5:
+                    mod, tail_disp = 0, b""
+                elif _fits(disp, 8):
+                    mod, tail_disp = 1, struct.pack("<b", disp)
+                else:
+                    mod, tail_disp = 2, struct.pack("<i", disp)
+                sib = b"\x24" if base & 7 == 4 else b""
+                encoded = bytes((mod << 6 | (reg_code & 7) << 3 | base & 7,)) + sib + tail_disp
+        prefix = bytes((rex,)) if needs_rex else b""
+        code = bytearray(prefix + opcode + encoded + tail)
+        if rip_target is not None:
+            at = len(prefix) + len(opcode) + 1
+            code[at:at + 4] = struct.pack("<i", rip_target - (address + len(code)))
+        return bytes(code)
+
+    def immediate_value(self, operand, scope):
+        if operand.symbol is None:
+            return operand.value
+        return self.resolve(operand.symbol, scope)
+
+    def encode_alu(self, digit, operands, address, scope):
+        dst, src = operands
+        size = dst.size or src.size or 64
+        if isinstance(src, Immediate):
+            value = self.immediate_value(src, scope)
+            if size == 8:
+                return self.rm(b"\x80", digit, dst, address, scope, struct.pack("<B", value & 0xFF), size)
+            if src.symbol is None and _fits(value, 8):
+                return self.rm(b"\x83", digit, dst, address, scope, struct.pack("<b", value), size)
+            return self.rm(b"\x81", digit, dst, address, scope, struct.pack("<i", value), size)
+        base = digit << 3
+        if isinstance(src, Register):
+            return self.rm(bytes((base | (0 if size == 8 else 1),)), src, dst, address, scope)
+        return self.rm(bytes((base | (2 if size == 8 else 3),)), dst, src, address, scope)
+
+    def encode_mov(self, operands, address, scope):
+        dst, src = operands
+        if isinstance(src, Immediate):
+            value = self.immediate_value(src, scope)
+            if isinstance(dst, Register):
+                prefix = b"\x41" if dst.code >= 8 else b""
+                if dst.size == 8:
+                    prefix = prefix or (b"\x40" if 4 <= dst.code < 8 else b"")
+                    return prefix + bytes((0xB0 | dst.code & 7, value & 0xFF))
+                if dst.size == 32 or (src.symbol is None and 0 <= value < 1 << 32):
+                    # mov r32, imm32 zero-extends into the full register
+                    return prefix + bytes((0xB8 | dst.code & 7,)) + struct.pack("<I", value & 0xFFFFFFFF)
+                if src.symbol is not None or _fits(value, 32):
+                    return self.rm(b"\xc7", 0, dst, address, scope, struct.pack("<i", value))
+                rex = 0x49 if dst.code >= 8 else 0x48
+                return bytes((rex, 0xB8 | dst.code & 7)) + struct.pack("<q", value)
+            size = dst.size or 64
+            if size == 8:
+                return self.rm(b"\xc6", 0, dst, address, scope, struct.pack("<B", value & 0xFF), 8)
+            return self.rm(b"\xc7", 0, dst, address, scope, struct.pack("<i", value), size)
+        if isinstance(src, Register):
+            return self.rm(b"\x88" if src.size == 8 else b"\x89", src, dst, address, scope)
+        return self.rm(b"\x8a" if dst.size == 8 else b"\x8b", dst, src, address, scope)
+
+    def encode_lea(self, operands, address, scope):
+        return self.rm(b"\x8d", operands[0], operands[1], address, scope)
+
+    def encode_test(self, operands, address, scope):
+        dst, src = operands
+        return self.rm(b"\x84" if src.size == 8 else b"\x85", src, dst, address, scope)
+
+    def encode_imul(self, operands, address, scope):
+        if len(operands) == 1:
+            return self.rm(b"\xf7", 5, operands[0], address, scope)
+        return self.rm(b"\x0f\xaf", operands[0], operands[1], address, scope)
+
+    def encode_inc(self, operands, address, scope):
+        return self.rm(b"\xfe" if operands[0].size == 8 else b"\xff", 0, operands[0], address, scope)
+
+    def encode_dec(self, operands, address, scope):
+        return self.rm(b"\xfe" if operands[0].size == 8 else b"\xff", 1, operands[0], address, scope)
+
+    def encode_push(self, operands, address, scope):
+        register = operands[0]
+        return (b"\x41" if register.code >= 8 else b"") + bytes((0x50 | register.code & 7,))
+
+    def encode_pop(self, operands, address, scope):
+        register = operands[0]
+        return (b"\x41" if register.code >= 8 else b"") + bytes((0x58 | register.code & 7,))
+
+def assemble_elf64(asm, entry="_start"):
+    """ Static ELF64 executable image for NASM text: one read / execute
+        segment with the headers and .text, and a read / write segment
+        for .data and .bss when there are any. Room is left for both
+        program headers either way, so .text always starts at the same
+        address. """
+    headers = ELF_HEADER.size + ELF_SEGMENTS * ELF_PROGRAM_HEADER.size
+    assembler = X64Assembler(ELF_BASE_ADDRESS + headers)
+    text, data, bss = assembler.assemble(asm)
+    has_data = bool(data or bss)
+    if entry not in assembler.symbols:
+        raise AssemblerError(f"entry point '{entry}' not defined")
+    program_headers = [ELF_PROGRAM_HEADER.pack(
+        PT_LOAD, PF_R | PF_X, 0, ELF_BASE_ADDRESS, ELF_BASE_ADDRESS,
+        headers + len(text), headers + len(text), ELF_PAGE)]
+    image = bytearray()
+    if has_data:
+        data_offset = _align(headers + len(text), ELF_PAGE)
+        program_headers.append(ELF_PROGRAM_HEADER.pack(
+            PT_LOAD, PF_R | PF_W, data_offset, ELF_DATA_ADDRESS, ELF_DATA_ADDRESS,
+            len(data), len(data) + bss, ELF_PAGE))
+    image += ELF_HEADER.pack(
+        b"\x7fELF", 2, 1, 1, 0, 0,           # 64-bit, little endian, SysV
+        2, 0x3E, 1,                         # ET_EXEC, x86-64, version
+        assembler.symbols[entry], ELF_HEADER.size, 0, 0,
+        ELF_HEADER.size, ELF_PROGRAM_HEADER.size, len(program_headers), 64, 0, 0)
+    for header in program_headers:
+        image += header
+    image += bytes(headers - len(image))
+    image += text
+    if has_data:
+        image += bytes(data_offset - len(image))
+        image += data
+    return bytes(image)
+
+def _align(n, alignment):
+    return (n + alignment - 1) // alignment * alignment
+
+def write_elf64(path, asm, entry="_start"):
+    """ Assemble `asm` and write it to `path` as an executable file """
+    image = assemble_elf64(asm, entry)
+    with open(path, "wb") as file:
+        file.write(image)
+    mode = os.stat(path).st_mode
+    os.chmod(path, mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return len(image)
 
 # SuperCodeX Compiler: Parses, Translates, Assembles, Links
 
@@ -1164,49 +5306,293 @@ SCDX_TO_ASM = {
     "DIV": "idiv rbx",
 }
 
-# Compiler Function
-def compile_supercodex(input_file):
+SOURCE_TOKEN = re.compile(r'"[^"]*"?|[^\s,]+')
+
+def parse_source(source):
+    """ One Instruction per non-blank source line; commas separate arguments
+        as well as spaces, and a quoted string is one argument """
+    instructions = []
+    for number, line in enumerate(source.splitlines(), 1):
+        tokens = SOURCE_TOKEN.findall(line)
+        if tokens:
+            instructions.append(Instruction(tokens[0], tokens[1:], number))
+    return instructions
+
+def generate_assembly(source, optimize=False, dump_ir=None, regalloc=False):
+    """ Assembly text for a source, plus the diagnostics raised on the way.
+        With `optimize` the instructions go through the InstructionOptimizer
+        before emission and the assembly through the PeepholeOptimizer
+        after; `dump_ir` is a stream for the IR after each pass. With
+        `regalloc` the x64 backend compiles variables into registers
+        instead of expanding the SCDX_TO_ASM templates. """
     asm_code = [
         "section .text",
         "global _start",
         "_start:"
     ]
+    instructions = parse_source(source)
+    if regalloc:
+        if optimize:
+            instructions, _ = optimize_instructions(instructions, dump=dump_ir)
+        asm_code, stats = generate_x64(instructions)
+        if optimize:
+            asm_code = PeepholeOptimizer().optimize(asm_code)
+        return "\n".join(asm_code), stats["diagnostics"]
+    # Diagnostics describe the source as written, not the optimized IR
+    diagnostics = [f"Unknown command: {instr.op}" for instr in instructions
+                   if instr.op not in SCDX_TO_ASM and instr.op != "EXIT"]
+    if optimize:
+        instructions, _ = optimize_instructions(instructions, dump=dump_ir)
+
+    for instr in instructions:
+        if instr.op in SCDX_TO_ASM:
+            asm_code.append(SCDX_TO_ASM[instr.op])
+        elif instr.op == "EXIT":
+            asm_code.append("mov rax, 60\nxor rdi, rdi\nsyscall")
 
-    with open(input_file, "r") as file:
-        for line in file:
-            tokens = line.strip().split()
-            if not tokens:
-                continue
-            
-            command = tokens[0].upper()
-            if command in SCDX_TO_ASM:
-                asm_code.append(SCDX_TO_ASM[command])
-            elif command == "EXIT":
-                asm_code.append("mov rax, 60\nxor rdi, rdi\nsyscall")
-            else:
-                print(f"Unknown command: {command}")
-    
     asm_code.append("mov rax, 60\nxor rdi, rdi\nsyscall")  # Ensure program exits
-    asm_code = "\n".join(asm_code)
+    if optimize:
+        asm_code = PeepholeOptimizer().optimize(asm_code)
+    return "\n".join(asm_code), diagnostics
 
-    # Write Assembly File
-    with open("output.asm", "w") as asm_file:
-        asm_file.write(asm_code)
-    
-    print("[+] Assembly Code Generated: output.asm")
+def _write_if_changed(path, text):
+    """ Leave an identical output alone so its timestamp, and make, stay quiet """
+    try:
+        with open(path, "r") as file:
+            if file.read() == text:
+                return False
+    except OSError:
+        pass
+    with open(path, "w") as file:
+        file.write(text)
+    return True
 
-    # Assemble using NASM
-    subprocess.run(["nasm", "-f", "win64", "output.asm", "-o", "output.obj"], check=True)
+# Compiler Function
+def compile_supercodex(input_file, output_file="output.asm", flags=(), cache=True, assemble=True):
+    """ `cache` is True for the default on-disk cache, a CompilationCache, or
+        None/False to always rebuild. Returns whether the cache was hit,
+        whether the output changed, and the diagnostics. Raises
+        AssemblerError rather than build an executable from x64 backend
+        output with diagnostics, as it would drop what they name. """
+    if cache is True:
+        cache = CompilationCache()
+
+    with open(input_file, "rb") as file:
+        source = file.read()
+
+    # Windows builds go through nasm and lld-link; anywhere else the ELF64
+    # emitter writes a static Linux executable without spawning anything.
+    # That one is always built from the x64 backend: the SCDX_TO_ASM
+    # templates use the macOS write syscall and pass PRINT nothing to write
+    windows = sys.platform == "win32"
+    if assemble and not windows and "--regalloc" not in flags:
+        flags = [*flags, "--regalloc"]
+
+    key = cache.key(source, flags) if cache else None
+    entry = cache.get(key) if cache else None
+    cached = entry is not None
+    if entry is None:
+        asm_code, diagnostics = generate_assembly(source.decode(), "--optimize" in flags,
+                                                  sys.stdout if "--dump-ir" in flags else None,
+                                                  "--regalloc" in flags)
+        entry = {"asm": asm_code, "diagnostics": diagnostics}
+        if cache:
+            cache.put(key, entry)
+    else:
+        print(f"[+] Cache hit: {input_file}")
 
-    # Link using LLD
-    subprocess.run(["lld-link", "/subsystem:console", "/entry:_start", "output.obj"], check=True)
+    for message in entry["diagnostics"]:
+        print(message)
 
-    print("[+] Compilation Successful! Run output.exe")
+    # Write Assembly File
+    changed = _write_if_changed(output_file, entry["asm"])
+    print(f"[+] Assembly Code Generated: {output_file}" if changed
+          else f"[+] Assembly Unchanged: {output_file}")
+    result = {"cached": cached, "changed": changed, "diagnostics": entry["diagnostics"]}
+    if not assemble:
+        return result
+    if "--regalloc" in flags and entry["diagnostics"]:
+        # The x64 backend left something out; that executable would run
+        # differently from the program
+        raise AssemblerError(f"{input_file}: the x64 backend could not compile everything "
+                             f"(see the diagnostics above), so no executable was built")
+
+    base = os.path.splitext(output_file)[0]
+    executable = f"{base}.exe" if windows else base if base != output_file else f"{base}.out"
+    if not changed and os.path.exists(executable):
+        print(f"[+] Up to date: {executable}")
+        return result
+
+    if windows:
+        # Assemble using NASM
+        subprocess.run(["nasm", "-f", "win64", output_file, "-o", f"{base}.obj"], check=True)
+
+        # Link using LLD
+        subprocess.run(["lld-link", "/subsystem:console", "/entry:_start", f"{base}.obj"], check=True)
+    else:
+        write_elf64(executable, entry["asm"])
+
+    print(f"[+] Compilation Successful! Run {executable}")
+    return result
+
+# === Batch Compilation ===
+import contextlib
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+def collect_sources(paths):
+    """ .scdx files named directly or found under the given directories """
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, _, names in os.walk(path):
+                sources.extend(os.path.join(folder, name) for name in names if name.endswith(".scdx"))
+        else:
+            sources.append(path)
+    return sorted(sources)
+
+def batch_output_paths(sources, out_dir=None):
+    """ <source>.asm next to each source, or mirrored under out_dir so files
+        with the same name in different folders do not collide """
+    if out_dir is None:
+        return [os.path.splitext(source)[0] + ".asm" for source in sources]
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(source)) for source in sources])
+    outputs = []
+    for source in sources:
+        relative = os.path.relpath(os.path.abspath(source), root)
+        outputs.append(os.path.join(out_dir, os.path.splitext(relative)[0] + ".asm"))
+    return outputs
+
+_worker_cache = None
+
+def _start_worker(cache_dir, cache_size):
+    # One CompilationCache per worker process, reused for all its files
+    global _worker_cache
+    _worker_cache = CompilationCache(cache_dir, cache_size) if cache_dir else None
+
+def _compile_job(job):
+    input_file, output_file, flags, assemble = job
+    start = time.perf_counter()
+    log = io.StringIO()
+    result = {"input": input_file, "output": output_file, "cached": False,
+              "diagnostics": [], "error": None}
+    # The worker's cache outlives this job; report only what the job added
+    before = _worker_cache.counters() if _worker_cache else {}
+    try:
+        os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+        with contextlib.redirect_stdout(log):
+            result.update(compile_supercodex(input_file, output_file, flags, _worker_cache, assemble))
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    result["log"] = log.getvalue()
+    result["cache"] = {name: count - before[name]
+                       for name, count in _worker_cache.counters().items()} if _worker_cache else {}
+    return result
+
+class BatchReport:
+    """ Per-file results of compile_batch with the deferred errors of every
+        file gathered into one ErrorDeferral """
+
+    def __init__(self, results, wall_time, workers):
+        self.results = results
+        self.wall_time = wall_time
+        self.workers = workers
+        self.errors = ErrorDeferral()
+        for result in results:
+            for message in result["diagnostics"]:
+                self.errors.deferred.append(f"{result['input']}: {message}")
+            if result["error"]:
+                self.errors.deferred.append(f"{result['input']}: {result['error']}")
+
+    @property
+    def failed(self):
+        return [result for result in self.results if result["error"]]
+
+    def cache_counters(self):
+        """ Cache hits, misses, stores and evictions summed over every file """
+        totals = dict.fromkeys(CompilationCache.COUNTERS, 0)
+        for result in self.results:
+            for name, count in result["cache"].items():
+                totals[name] += count
+        return totals
+
+    def report(self, slowest=10):
+        busy = sum(result["seconds"] for result in self.results)
+        hits = sum(result["cached"] for result in self.results)
+        print(f"[+] {len(self.results)} files in {self.wall_time:.2f}s on {self.workers} workers "
+              f"({busy:.2f}s compiling, {hits} cache hits, {len(self.failed)} failed)")
+        if slowest:
+            print(f"    slowest {min(slowest, len(self.results))}:")
+            for result in sorted(self.results, key=lambda r: r["seconds"], reverse=True)[:slowest]:
+                print(f"    {result['seconds'] * 1e3:9.2f}ms  {result['input']}")
+        self.errors.report()
+
+def compile_batch(inputs, out_dir=None, flags=(), workers=None, cache_dir=CACHE_DIR,
+                  cache_size=CACHE_MAX_BYTES, assemble=False, chunksize=None):
+    """ Compile many .scdx files (or directories of them) across a process
+        pool. Pass cache_dir=None to bypass the compilation cache. """
+    sources = collect_sources(inputs)
+    outputs = batch_output_paths(sources, out_dir) if sources else []
+    jobs = [(source, output, list(flags), assemble) for source, output in zip(sources, outputs)]
+    workers = workers or os.cpu_count() or 1
+    if chunksize is None:
+        # Few big chunks keep pool overhead low; several per worker keep the load even
+        chunksize = max(1, len(jobs) // (workers * 8))
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers, initializer=_start_worker,
+                             initargs=(cache_dir, cache_size)) as pool:
+        results = list(pool.map(_compile_job, jobs, chunksize=chunksize))
+    return BatchReport(results, time.perf_counter() - start, workers)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="SuperCodeX compiler",
+        epilog="Unrecognised --flags are passed through and become part of the cache key. "
+               "--optimize runs the IR and peephole optimizers; --dump-ir also prints the "
+               "IR after every optimizer pass when the file is rebuilt; --regalloc "
+               "compiles variables to registers with the x64 backend, which is "
+               "always used for Linux executables; no executable is built when that "
+               "backend reports something it cannot compile.")
+    parser.add_argument("inputs", nargs="+", help=".scdx files, or directories to compile in a batch")
+    parser.add_argument("-o", "--output", default="output.asm", help="output for a single file")
+    parser.add_argument("-S", dest="assemble", action="store_false",
+                        help="stop after writing assembly")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes for a batch (default: one per core)")
+    parser.add_argument("--out-dir", help="batch outputs go here instead of next to each source")
+    parser.add_argument("--no-cache", action="store_true", help="always rebuild")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--cache-size", type=int, default=CACHE_MAX_BYTES,
+                        help="evict least recently used entries past this many bytes")
+    parser.add_argument("--cache-stats", action="store_true")
+    opts, flags = parser.parse_known_args(argv)
+
+    if len(opts.inputs) > 1 or os.path.isdir(opts.inputs[0]) or opts.out_dir:
+        batch = compile_batch(opts.inputs, opts.out_dir, flags, opts.jobs,
+                              None if opts.no_cache else opts.cache_dir, opts.cache_size,
+                              opts.assemble)
+        batch.report()
+        if opts.cache_stats and not opts.no_cache:
+            # The workers' caches are gone; count their lookups against the same directory
+            cache = CompilationCache(opts.cache_dir, opts.cache_size)
+            cache.merge(batch.cache_counters())
+            cache.report()
+        return 1 if batch.failed else 0
+
+    cache = None if opts.no_cache else CompilationCache(opts.cache_dir, opts.cache_size)
+    try:
+        compile_supercodex(opts.inputs[0], opts.output, flags, cache, opts.assemble)
+    except AssemblerError as e:
+        print(f"[-] {e}")
+        return 1
+    finally:
+        if cache and opts.cache_stats:
+            cache.report()
+    return 0
 
 # Run Compiler
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python supercodex_compiler.py <input.scdx>")
-        sys.exit(1)
-    
-    compile_supercodex(sys.argv[1])
+    sys.exit(main())